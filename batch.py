@@ -0,0 +1,317 @@
+"""
+批量处理命令行入口：对多个CSV/WAV采集文件并行执行 加载 → 解调 → 滤波 → 变换 → 出图
+
+用法示例:
+    python batch.py "data/input_data/*.csv" --workers 4 --memory-limit 4096 --render raster
+    python batch.py data/input_data --transform cwt --decimate --output-dir data/output_data/nightly
+
+每个输入在独立的工作进程中处理（Agg后端，不弹出窗口），完成记录追加到输出目录下的
+manifest.jsonl。再次运行相同的命令时，输入文件与参数均未变化且输出仍存在的条目会被跳过。
+"""
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+CAPTURE_EXTENSIONS = ('.csv', '.wav')
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def _init_worker(memory_limit_mb, threads):
+    """
+    工作进程初始化：限制数值库线程数、使用非交互的Agg后端、设置地址空间上限
+    """
+    if threads:
+        for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMBA_NUM_THREADS'):
+            os.environ[name] = str(threads)
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    if memory_limit_mb:
+        try:
+            import resource
+        except ImportError:
+            print("Warning: per-worker memory limit is not supported on this platform")
+            return
+        limit = int(memory_limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_capture(file_path, kwargs, log_path):
+    """
+    在工作进程中处理单个采集文件，标准输出与警告重定向到日志文件
+
+    返回:
+        result (dict): status ('ok'/'failed')、outputs、seconds、error
+    """
+    start = time.perf_counter()
+    outputs, error = [], None
+
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            from func.input_func.process import process_csv_file, process_wav_file
+
+            if file_path.lower().endswith('.wav'):
+                save_path = process_wav_file(file_path=file_path, **kwargs)
+            else:
+                save_path = process_csv_file(file_path=file_path, **kwargs)
+
+            if save_path is None:
+                error = "failed to load input"
+            else:
+                # 主图以及加了后缀的Mel图、各通道图和对比图；瓦片模式下为各金字塔的索引文件
+                base = glob.escape(save_path[:-len('.png')])
+                outputs = sorted(glob.glob(base + '*.png') + glob.glob(base + '*_tiles/index.json'))
+                if not outputs:
+                    error = "no output written"
+        except MemoryError:
+            error = "MemoryError (worker memory limit reached)"
+            print(traceback.format_exc())
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(traceback.format_exc())
+
+    return {'status': 'failed' if error else 'ok', 'outputs': outputs,
+            'seconds': time.perf_counter() - start, 'error': error}
+
+
+def collect_inputs(patterns):
+    """
+    展开glob模式与目录（目录下递归查找.csv/.wav），去重并排序
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.update(os.path.join(root, n) for n in names if n.lower().endswith(CAPTURE_EXTENSIONS))
+        else:
+            files.update(p for p in glob.glob(pattern, recursive=True)
+                         if os.path.isfile(p) and p.lower().endswith(CAPTURE_EXTENSIONS))
+    return sorted(os.path.abspath(p) for p in files)
+
+
+def output_prefixes(files):
+    """
+    为每个输入生成输出文件名前缀（文件名主干；重名时加上上级目录名）
+    """
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in files]
+    prefixes = {}
+    for path, stem in zip(files, stems):
+        if stems.count(stem) > 1:
+            stem = f"{os.path.basename(os.path.dirname(path))}_{stem}"
+        prefixes[path] = f"{stem}_"
+    return prefixes
+
+
+def params_hash(kwargs):
+    """
+    处理参数的哈希，参数变化后旧的完成记录不再有效
+    """
+    return hashlib.sha1(json.dumps(kwargs, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def load_manifest(manifest_path):
+    """
+    读取manifest，返回 (输入路径, 大小, 修改时间, 参数哈希) → 最后一条记录
+    """
+    records = {}
+    if not os.path.exists(manifest_path):
+        return records
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 上次运行中断时可能留下不完整的行
+            records[(record['input'], record['size'], record['mtime'], record['params'])] = record
+    return records
+
+
+def _is_done(record):
+    return record is not None and record['status'] == 'ok' and all(os.path.exists(p) for p in record['outputs'])
+
+
+def build_kwargs(args):
+    """
+    由命令行参数构造process_csv_file/process_wav_file共用的关键字参数（与main.py中的参数一一对应）
+    """
+    win_length = args.win_length or args.n_fft
+    return dict(
+        n_fft=args.n_fft, hop_length=args.hop_length or win_length // 8,
+        win_length=win_length, window=args.window, n_mels=args.n_mels, max_height=args.max_height,
+        vmin=args.vmin, filter_cutoff_freq=args.filter_cutoff_freq, filter_order=args.filter_order,
+        library=args.library, transform_method=args.transform,
+        wavelet=args.wavelet, scale_min=args.scale_min, scale_max=args.scale_max, scale_count=args.scale_count,
+        decimate=args.decimate, cwt_engine=args.cwt_engine, cwt_columns=args.cwt_columns,
+        cwt_pooling=args.cwt_pooling, render=args.render, n_jobs=args.shard_jobs,
+        transform_cache=args.transform_cache, plot_mel=args.plot_mel, dtype=args.dtype, trace=args.trace,
+        trace_summary=args.trace_summary, output_dir=args.output_dir
+    )
+
+
+def run_batch(files, kwargs, csv_kwargs, wav_kwargs, output_dir, workers, memory_limit_mb=None, threads=1,
+              resume=True):
+    """
+    在进程池中处理所有输入，完成一个就向manifest追加一条记录
+
+    参数:
+        files (list): 输入文件的绝对路径
+        kwargs (dict): 共用的处理参数（见build_kwargs）
+        csv_kwargs (dict): 仅用于CSV输入的参数（采样率、通道、解调）
+        wav_kwargs (dict): 仅用于WAV输入的参数（采样率、通道与时间范围）
+        output_dir (str): 输出目录（同时存放manifest.jsonl与logs/）
+        workers (int): 工作进程数
+        memory_limit_mb (int): 每个工作进程的地址空间上限 (MB)，默认None表示不限制
+        threads (int): 每个工作进程的数值库线程数
+        resume (bool): 是否跳过manifest中已完成的输入
+
+    返回:
+        n_failed (int): 失败的输入数量
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    log_dir = os.path.join(output_dir, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    records = load_manifest(manifest_path) if resume else {}
+    prefixes = output_prefixes(files)
+
+    jobs = []
+    for path in files:
+        job_kwargs = dict(kwargs, output_prefix=prefixes[path])
+        job_kwargs.update(wav_kwargs if path.lower().endswith('.wav') else csv_kwargs)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime, params_hash(job_kwargs))
+        if _is_done(records.get(key)):
+            continue
+        jobs.append((path, key, job_kwargs))
+
+    print(f"{len(files)} inputs, {len(files) - len(jobs)} already done, {len(jobs)} to process "
+          f"with {workers} workers")
+
+    n_failed = 0
+    context = multiprocessing.get_context('spawn')
+    with open(manifest_path, 'a', encoding='utf-8') as manifest, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                initargs=(memory_limit_mb, threads)) as pool:
+        futures = {}
+        for path, key, job_kwargs in jobs:
+            log_path = os.path.join(log_dir, f"{job_kwargs['output_prefix']}log.txt")
+            futures[pool.submit(_run_capture, path, job_kwargs, log_path)] = (path, key)
+
+        for i, future in enumerate(as_completed(futures), 1):
+            path, key = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # 工作进程被系统终止（例如超出物理内存），剩余任务在下次运行时重试
+                result = {'status': 'failed', 'outputs': [], 'seconds': None,
+                          'error': "worker process terminated abruptly"}
+
+            record = dict(zip(('input', 'size', 'mtime', 'params'), key), **result)
+            manifest.write(json.dumps(record, ensure_ascii=False) + '\n')
+            manifest.flush()
+
+            if result['status'] != 'ok':
+                n_failed += 1
+            seconds = f"{result['seconds']:.1f} s" if result['seconds'] is not None else "-"
+            print(f"[{i}/{len(jobs)}] {result['status']:<6} {seconds:>8}  {os.path.basename(path)}"
+                  + (f"  ({result['error']})" if result['error'] else ""))
+
+    return n_failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch spectrogram generation for CSV/WAV captures")
+    parser.add_argument('inputs', nargs='+', help="Glob patterns or directories of .csv/.wav captures")
+    parser.add_argument('--output-dir', default='data/output_data/batch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--memory-limit', type=int, default=None, help="Per-worker address space limit (MB)")
+    parser.add_argument('--threads', type=int, default=1, help="Numeric library threads per worker")
+    parser.add_argument('--shard-jobs', type=int, default=1,
+                        help="Processes per capture for time-sharded STFT/CWT (-1 for all CPUs)")
+    parser.add_argument('--no-mel', dest='plot_mel', action='store_false',
+                        help="Skip the Mel spectrogram (librosa STFT only)")
+    parser.add_argument('--no-transform-cache', dest='transform_cache', action='store_false',
+                        help="Do not read or write the transform cache (data/cache/transforms)")
+    parser.add_argument('--no-trace', dest='trace', action='store_false',
+                        help="Do not write the per-stage <output>_trace.json next to each image")
+    parser.add_argument('--trace-summary', action='store_true',
+                        help="Append the per-stage timing table to each capture's log")
+    parser.add_argument('--no-resume', dest='resume', action='store_false',
+                        help="Reprocess inputs already recorded as done in the manifest")
+
+    parser.add_argument('--transform', choices=('stft', 'cwt'), default='stft')
+    parser.add_argument('--library', choices=('librosa', 'scipy', 'native', 'zoom'), default='librosa')
+    parser.add_argument('--render', choices=('matplotlib', 'raster', 'tiles'), default='matplotlib')
+    parser.add_argument('--sample-rate', type=lambda v: int(float(v)), default=int(5e6),
+                        help="CSV sample rate in Hz, 0 reads it from the file header")
+    parser.add_argument('--wav-sample-rate', type=lambda v: int(float(v)), default=0,
+                        help="Resample WAV files to this rate in Hz, 0 keeps the native rate")
+    parser.add_argument('--wav-channel', type=int, default=None,
+                        help="WAV channel index (default: average all channels to mono)")
+    parser.add_argument('--wav-offset', type=float, default=0.0, help="Start of the analyzed WAV range in seconds")
+    parser.add_argument('--wav-duration', type=float, default=None,
+                        help="Length of the analyzed WAV range in seconds (default: to the end)")
+    parser.add_argument('--dtype', choices=('float32', 'float64'), default=None,
+                        help="Pipeline precision (default: float64 for CSV, float32 for WAV)")
+    parser.add_argument('--max-height', type=float, default=4000)
+    parser.add_argument('--vmin', type=float, default=-60)
+
+    parser.add_argument('--n-fft', type=int, default=32768 * 4)
+    parser.add_argument('--win-length', type=int, default=None, help="Defaults to n_fft")
+    parser.add_argument('--hop-length', type=int, default=None, help="Defaults to win_length // 8")
+    parser.add_argument('--window', default='hann')
+    parser.add_argument('--n-mels', type=int, default=256)
+
+    parser.add_argument('--wavelet', default='morl')
+    parser.add_argument('--scale-min', type=float, default=1)
+    parser.add_argument('--scale-max', type=float, default=100000)
+    parser.add_argument('--scale-count', type=int, default=256)
+    parser.add_argument('--cwt-engine', choices=('fft', 'pywt'), default='fft')
+    parser.add_argument('--cwt-columns', type=int, default=4096, help="0 keeps one column per sample")
+    parser.add_argument('--cwt-pooling', choices=('mean', 'max'), default='mean')
+
+    parser.add_argument('--filter-cutoff-freq', type=float, default=20000, help="0 disables the lowpass filter")
+    parser.add_argument('--filter-order', type=int, default=4)
+    parser.add_argument('--decimate', action=argparse.BooleanOptionalAction, default=True)
+
+    parser.add_argument('--channel', choices=('CH1V', 'CH2V'), default='CH1V')
+    parser.add_argument('--channels', nargs='+', choices=('CH1V', 'CH2V'), default=None,
+                        help="Analyze several channels from one parse (overrides --channel)")
+    parser.add_argument('--cross-view', choices=('difference', 'coherence'), default=None,
+                        help="Cross-channel image for --channels")
+    parser.add_argument('--demodulated', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--demod-method', choices=('fft', 'fir'), default='fft')
+    args = parser.parse_args(argv)
+
+    args.filter_cutoff_freq = args.filter_cutoff_freq or None
+    args.cwt_columns = args.cwt_columns or None
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("No .csv/.wav inputs found")
+        return 1
+
+    kwargs = build_kwargs(args)
+    csv_kwargs = dict(sample_rate=args.sample_rate or None, channel=args.channel,
+                      demodulated=args.demodulated, demod_method=args.demod_method,
+                      channels=args.channels, cross_view=args.cross_view)
+    wav_kwargs = dict(sample_rate=args.wav_sample_rate or None, wav_channel=args.wav_channel,
+                      offset=args.wav_offset, duration=args.wav_duration)
+
+    n_failed = run_batch(files, kwargs, csv_kwargs, wav_kwargs, args.output_dir, max(1, args.workers),
+                         memory_limit_mb=args.memory_limit, threads=args.threads, resume=args.resume)
+    print(f"Done: {len(files)} inputs, {n_failed} failed. Manifest: {os.path.join(args.output_dir, MANIFEST_NAME)}")
+    return 1 if n_failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+整条处理流水线的分阶段基准测试：在合成采集数据上逐阶段测量耗时与内存，结果写入JSON，
+并可与之前版本的JSON结果比较，标出变慢的阶段。
+
+阶段：CSV加载 → 希尔伯特解调（fft/fir） → （全速率低通滤波） → 抽取 → 低通滤波 → STFT（librosa/scipy/native）
+      → CWT（pywt/fft/分块） → 出图（matplotlib/raster）
+
+用法（在仓库根目录运行）:
+    python -m benchmarks.bench_pipeline --seconds 0.5 2 --n-fft 32768 131072 --json data/benchmarks/pipeline.json
+    python -m benchmarks.bench_pipeline --seconds 2 --baseline data/benchmarks/pipeline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from func.input_func.csv_input import load_data_from_csv_chunked
+from func.analysis_func.demodulate import demodulate_hilbert
+from func.analysis_func.decimate import decimate_for_analysis
+from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.stft_librosa import perform_stft_librosa
+from func.analysis_func.stft_scipy import perform_stft_scipy
+from func.analysis_func.stft_native import perform_stft_native
+from func.analysis_func.cwt_pywavelets import perform_cwt_pywt, perform_cwt_blocked, generate_scales
+from func.analysis_func.cwt_fft import perform_cwt_fft
+from func.plot_func.stft_spectrogram import stft_plot_spectrogram
+from func.plot_func.cwt_spectrogram import cwt_plot_scalogram
+from benchmarks.common import measure, environment, save_json, load_json
+from benchmarks.synthetic import generate_capture, default_name
+
+
+def _describe(value):
+    """
+    记录数组（或数组元组中第一个数组）的形状与类型
+    """
+    if isinstance(value, tuple):
+        value = value[0]
+    if isinstance(value, np.ndarray):
+        return {'shape': list(value.shape), 'dtype': value.dtype.name}
+    return None
+
+
+class StageRunner:
+    """
+    依次执行并记录各阶段；每阶段重复repeat次取最快一次（第一次同时起到预热作用，例如librosa的延迟导入），
+    被测函数的进度输出被屏蔽，只打印每阶段一行结果
+    """
+
+    def __init__(self, capture, repeat=2):
+        self.capture = capture
+        self.repeat = max(1, repeat)
+        self.results = []
+
+    def run(self, stage, func, data=None, **params):
+        runs = []
+        for _ in range(self.repeat):
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                result, stats = measure(stage, func)
+            runs.append(stats)
+        stats = min(runs, key=lambda r: r['seconds'])
+        stats.update(all_seconds=[r['seconds'] for r in runs], peak_mb=max(r['peak_mb'] for r in runs))
+        stats.update(capture=self.capture, params=params, input=_describe(data), output=_describe(result))
+        self.results.append(stats)
+        param_text = ' '.join(f'{k}={v}' for k, v in params.items())
+        print(f"  {stage:<24} {stats['seconds']:8.3f} s  {stats['peak_mb']:9.1f} MB peak  {param_text}")
+        return result
+
+    def skip(self, stage, reason, **params):
+        self.results.append({'name': stage, 'capture': self.capture, 'params': params, 'skipped': reason})
+        print(f"  {stage:<24} skipped ({reason})")
+
+
+def bench_capture(path, seconds, sample_rate, args, plot_dir):
+    """
+    对一个合成采集文件执行全部阶段
+    """
+    runner = StageRunner({'seconds': seconds, 'sample_rate': sample_rate}, repeat=args.repeat)
+
+    audio_data, _ = runner.run('csv_load', lambda: load_data_from_csv_chunked(
+        path, None, channel='CH1V', dtype=np.float64, use_cache=False))
+    runner.run('demodulate_fir', lambda: demodulate_hilbert(audio_data, method='fir'), audio_data)
+    audio_data = runner.run('demodulate_fft', lambda: demodulate_hilbert(audio_data, method='fft'), audio_data)
+
+    rate, factor = sample_rate, 1
+    scale_min, scale_max = args.scale_min, args.scale_max
+    cutoff = args.cutoff
+    if args.decimate:
+        # 抽取后截止频率常常不低于新的奈奎斯特频率（抗混叠滤波器已限带），流水线不再单独滤波；
+        # 在抽取前的全速率信号上单独计时，以便仍能跟踪滤波器本身的性能
+        if cutoff and cutoff < sample_rate / 2:
+            runner.run('lowpass_filter_full_rate', lambda: lowpass_filter(audio_data, sample_rate, cutoff,
+                                                                          order=args.order),
+                       audio_data, cutoff=cutoff, order=args.order)
+        audio_data, params = runner.run('decimate', lambda: decimate_for_analysis(
+            audio_data, sample_rate, args.max_height, args.n_fft[0], args.n_fft[0] // 8, args.n_fft[0],
+            filter_cutoff_freq=cutoff, scale_min=scale_min, scale_max=scale_max), audio_data,
+            max_height=args.max_height)
+        rate, factor = params['sample_rate'], params['factor']
+        scale_min, scale_max = params['scale_min'], params['scale_max']
+
+    if cutoff and cutoff < rate / 2:
+        audio_data = runner.run('lowpass_filter', lambda: lowpass_filter(audio_data, rate, cutoff, order=args.order),
+                                audio_data, cutoff=cutoff, order=args.order)
+    elif cutoff:
+        runner.skip('lowpass_filter', f"cutoff {cutoff:g} Hz >= Nyquist {rate / 2:g} Hz"
+                                      f"{' after decimation' if factor > 1 else ''}", cutoff=cutoff, order=args.order)
+
+    for n_fft in args.n_fft:
+        n = max(n_fft // factor, 16)
+        hop = max(n // 8, 1)
+        stft_params = dict(n_fft=n, hop_length=hop)
+        stft_result, _, _ = runner.run('stft_librosa', lambda: perform_stft_librosa(audio_data, rate, n, hop, n),
+                                       audio_data, **stft_params)
+        runner.run('stft_scipy', lambda: perform_stft_scipy(audio_data, rate, n, hop, n), audio_data, **stft_params)
+        runner.run('stft_native', lambda: perform_stft_native(audio_data, rate, n, hop, n), audio_data, **stft_params)
+
+        for render in ('matplotlib', 'raster'):
+            save_path = os.path.join(plot_dir, f'stft_{render}.png')
+            runner.run(f'plot_stft_{render}', lambda: stft_plot_spectrogram(
+                stft_result, rate, hop, n, 'hann', n, args.max_height, save_path=save_path, vmin=-60, render=render),
+                stft_result, **stft_params)
+        del stft_result
+
+    for scale_count in args.scale_count:
+        scales = generate_scales(rate, 'morl', scale_min, scale_max, scale_count, decimated=factor > 1)
+        cwt_params = dict(scales=len(scales))
+
+        if len(scales) * len(audio_data) <= args.cwt_max_cells:
+            runner.run('cwt_pywt', lambda: perform_cwt_pywt(audio_data, rate, scales), audio_data, **cwt_params)
+            power, frequencies = runner.run('cwt_fft', lambda: perform_cwt_fft(
+                audio_data, rate, scales, dtype=np.float32, power_only=True), audio_data, **cwt_params)
+            save_path = os.path.join(plot_dir, 'cwt_raster.png')
+            runner.run('plot_cwt_raster', lambda: cwt_plot_scalogram(
+                power, frequencies, audio_data, rate, 'morl', scales, args.max_height, save_path=save_path,
+                vmin=-60, is_power=True, render='raster'), power, **cwt_params)
+            del power
+        else:
+            runner.skip('cwt_pywt', f"{len(scales)} x {len(audio_data)} cells > --cwt-max-cells", **cwt_params)
+            runner.skip('cwt_fft', f"{len(scales)} x {len(audio_data)} cells > --cwt-max-cells", **cwt_params)
+
+        runner.run('cwt_blocked', lambda: perform_cwt_blocked(audio_data, rate, scales, n_columns=args.cwt_columns),
+                   audio_data, n_columns=args.cwt_columns, **cwt_params)
+
+    return runner.results
+
+
+def _result_key(stats):
+    capture = stats['capture']
+    return (capture['seconds'], capture['sample_rate'], stats['name'], json.dumps(stats['params'], sort_keys=True))
+
+
+def compare(results, baseline, threshold=1.2):
+    """
+    与之前版本的结果比较，打印耗时比值，返回变慢超过threshold倍的阶段数
+    """
+    previous = {_result_key(s): s for s in baseline['runs'] if 'seconds' in s}
+    commit = baseline.get('environment', {}).get('commit')
+    print(f"\nComparison with baseline ({commit or 'unknown commit'}), slower than {threshold:g}x flagged:")
+
+    n_regressions = 0
+    for stats in results:
+        old = previous.get(_result_key(stats))
+        if old is None or 'seconds' not in stats:
+            continue
+        ratio = stats['seconds'] / max(old['seconds'], 1e-9)
+        flag = '  <-- regression' if ratio > threshold else ''
+        n_regressions += bool(flag)
+        print(f"  {stats['name']:<24} {old['seconds']:8.3f} s -> {stats['seconds']:8.3f} s  ({ratio:5.2f}x){flag}")
+    return n_regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of the spectrogram pipeline")
+    parser.add_argument('--seconds', type=float, nargs='+', default=[0.5, 2.0], help="Capture lengths")
+    parser.add_argument('--sample-rate', type=float, nargs='+', default=[5e6], help="Capture sample rates")
+    parser.add_argument('--n-fft', type=int, nargs='+', default=[32768, 131072],
+                        help="FFT sizes at the capture rate (scaled down with decimation)")
+    parser.add_argument('--scale-count', type=int, nargs='+', default=[64])
+    parser.add_argument('--scale-min', type=float, default=1)
+    parser.add_argument('--scale-max', type=float, default=100000)
+    parser.add_argument('--cwt-columns', type=int, default=4096)
+    parser.add_argument('--cwt-max-cells', type=float, default=2e8,
+                        help="Skip full-resolution CWT stages above this many scale x sample cells")
+    parser.add_argument('--max-height', type=float, default=4000)
+    parser.add_argument('--cutoff', type=float, default=20000)
+    parser.add_argument('--order', type=int, default=4)
+    parser.add_argument('--decimate', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--repeat', type=int, default=2, help="Runs per stage; the fastest is reported")
+    parser.add_argument('--work-dir', help="Directory for generated captures (reused between runs)")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against a previous JSON result")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or os.path.join(tempfile.gettempdir(), 'spectrogram_bench')
+    results = []
+
+    with tempfile.TemporaryDirectory() as plot_dir:
+        for sample_rate in args.sample_rate:
+            for seconds in args.seconds:
+                path = os.path.join(work_dir, default_name(seconds, sample_rate, 0.5))
+                if not os.path.exists(path):
+                    print(f"Generating {path}...")
+                    generate_capture(path, seconds, sample_rate)
+                print(f"\n{os.path.basename(path)} ({int(seconds * sample_rate)} samples)")
+                results.extend(bench_capture(path, seconds, sample_rate, args, plot_dir))
+
+    report = {'environment': environment(), 'config': vars(args), 'runs': results}
+    if args.json:
+        save_json(report, args.json)
+        print(f"\nResults written to {args.json}")
+
+    if args.baseline:
+        n_regressions = compare(results, load_json(args.baseline), args.threshold)
+        return 1 if n_regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
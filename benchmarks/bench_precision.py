@@ -0,0 +1,145 @@
+"""
+float32与float64流水线的精度与内存对比：解调 -> 抽取 -> 低通滤波 -> STFT（librosa/原生）与CWT（FFT），
+以float64结果为参考，按出图方式（相对整幅最大值的dB，裁剪到vmin）统计dB误差
+
+用法（在仓库根目录运行）:
+    python -m benchmarks.bench_precision --seconds 2 --sample-rate 5e6 --json data/bench/precision.json
+"""
+import argparse
+import contextlib
+import io
+import numpy as np
+from func.analysis_func.demodulate import demodulate_hilbert
+from func.analysis_func.decimate import decimate_for_analysis
+from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.stft_librosa import perform_stft_librosa
+from func.analysis_func.stft_native import perform_stft_native
+from func.analysis_func.cwt_fft import perform_cwt_fft
+from func.analysis_func.cwt_pywavelets import generate_scales
+from benchmarks.common import measure, environment, save_json
+from benchmarks.synthetic import generate_block
+
+
+def run_pipeline(capture, sample_rate, dtype, args):
+    """
+    以dtype精度执行一次流水线，返回各谱图的功率矩阵（及最终时域信号）与各阶段的测量结果
+    """
+    outputs, stats = {}, []
+
+    def stage(name, func):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, info = measure(name, func)
+        info['dtype'] = np.dtype(dtype).name
+        stats.append(info)
+        return result
+
+    audio_data = capture.astype(dtype)
+    audio_data = stage('demodulate', lambda: demodulate_hilbert(audio_data))
+    audio_data, params = stage('decimate', lambda: decimate_for_analysis(
+        audio_data, sample_rate, args.max_height, args.n_fft, args.n_fft // 8, args.n_fft,
+        filter_cutoff_freq=args.cutoff, scale_min=args.scale_min, scale_max=args.scale_max))
+    rate = params['sample_rate']
+    if params['filter_cutoff_freq'] is not None:
+        audio_data = stage('lowpass_filter', lambda: lowpass_filter(audio_data, rate, args.cutoff, order=args.order))
+
+    n_fft, hop = params['n_fft'], params['hop_length']
+    stft_result, _, _ = stage('stft_librosa', lambda: perform_stft_librosa(audio_data, rate, n_fft, hop, n_fft))
+    outputs['stft_librosa'] = (np.abs(stft_result) ** 2, stft_result.dtype)
+    stft_result, _, _ = stage('stft_native', lambda: perform_stft_native(
+        audio_data, rate, n_fft, hop, n_fft, dtype=dtype))
+    outputs['stft_native'] = (np.abs(stft_result) ** 2, stft_result.dtype)
+    del stft_result
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        scales = generate_scales(rate, 'morl', params['scale_min'], params['scale_max'], args.scale_count,
+                                 decimated=params['factor'] > 1)
+    power, _ = stage('cwt_fft', lambda: perform_cwt_fft(audio_data, rate, scales, dtype=dtype, power_only=True))
+    outputs['cwt_fft'] = (power, power.dtype)
+
+    outputs['signal'] = (audio_data, audio_data.dtype)
+    return outputs, stats
+
+
+def db_error(power, reference, vmin):
+    """
+    按出图方式换算为相对整幅最大值的dB并裁剪到vmin，只统计参考值高于vmin的单元
+    """
+    def to_db(p):
+        p = np.asarray(p, dtype=np.float64)
+        return np.maximum(10 * np.log10(np.maximum(p, 1e-20) / max(p.max(), 1e-20)), vmin)
+
+    ref_db = to_db(reference)
+    visible = ref_db > vmin
+    error = np.abs(to_db(power) - ref_db)[visible]
+    if not error.size:
+        return {'cells': 0}
+    return {
+        'cells': int(error.size),
+        'max_db': float(error.max()),
+        'mean_db': float(error.mean()),
+        'p99_db': float(np.percentile(error, 99))
+    }
+
+
+def run(seconds, sample_rate, args):
+    n_points = int(seconds * sample_rate)
+    capture = generate_block(0, n_points, sample_rate, gains=(1.0,), delays=(0.0,))[0]
+
+    # 预热一次（首次调用librosa/scipy.fft的初始化开销不计入）
+    run_pipeline(capture[:n_points // 8], sample_rate, np.float32, args)
+    reference, reference_stats = run_pipeline(capture, sample_rate, np.float64, args)
+    single, single_stats = run_pipeline(capture, sample_rate, np.float32, args)
+
+    signal64, signal32 = reference.pop('signal')[0], single.pop('signal')[0]
+    errors = {'signal': {'max_abs': float(np.max(np.abs(signal32 - signal64))),
+                         'dtype': signal32.dtype.name}}
+    for name, (power, dtype) in single.items():
+        errors[name] = dict(db_error(power, reference[name][0], args.vmin), dtype=np.dtype(dtype).name)
+
+    return {
+        'n_points': n_points,
+        'sample_rate': sample_rate,
+        'vmin': args.vmin,
+        'stages': reference_stats + single_stats,
+        'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare float32 and float64 pipeline precision and memory")
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--sample-rate', type=float, default=5e6)
+    parser.add_argument('--n-fft', type=int, default=131072)
+    parser.add_argument('--max-height', type=float, default=4000)
+    parser.add_argument('--cutoff', type=float, default=2000)
+    parser.add_argument('--order', type=int, default=4)
+    parser.add_argument('--scale-min', type=float, default=1)
+    parser.add_argument('--scale-max', type=float, default=100000)
+    parser.add_argument('--scale-count', type=int, default=64)
+    parser.add_argument('--vmin', type=float, default=-80, help="dB floor of the plots; cells below are ignored")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.seconds, args.sample_rate, args)
+
+    print(f"{report['n_points']} samples at {args.sample_rate:g} Hz, vmin {args.vmin} dB")
+    print(f"  {'stage':<16} {'float64 s':>10} {'float32 s':>10} {'float64 MB':>11} {'float32 MB':>11}")
+    by_dtype = {(s['name'], s['dtype']): s for s in report['stages']}
+    for name in dict.fromkeys(s['name'] for s in report['stages']):
+        s64, s32 = by_dtype[(name, 'float64')], by_dtype[(name, 'float32')]
+        print(f"  {name:<16} {s64['seconds']:10.3f} {s32['seconds']:10.3f} "
+              f"{s64['peak_mb']:11.1f} {s32['peak_mb']:11.1f}")
+
+    print(f"  signal after filter: max |float32 - float64| = {report['errors']['signal']['max_abs']:.3e}")
+    for name, error in report['errors'].items():
+        if name != 'signal' and error['cells']:
+            print(f"  {name:<16} ({error['dtype']}) dB error over {error['cells']} cells: "
+                  f"max {error['max_db']:.2e}, mean {error['mean_db']:.2e}, p99 {error['p99_db']:.2e}")
+
+    if args.json:
+        report['environment'] = environment()
+        save_json(report, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+频谱图服务的延迟基准：在本进程内启动serve.py的服务器（127.0.0.1，系统分配端口），用本地HTTP客户端依次请求
+冷启动、只改vmin、只改max_height（抽取级数不变）、原始数组、瓦片，以及多个并发的相同请求（检查是否只计算一次）
+
+用法（在仓库根目录运行）:
+    python -m benchmarks.bench_service --file data/input_data/fs5e6_tswp500ms_t2s_demo.csv
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from urllib.request import urlopen
+from benchmarks.common import save_json
+from benchmarks.synthetic import generate_capture
+from serve import SpectrogramService, make_server
+
+
+def _get(base, path, **params):
+    start = time.perf_counter()
+    with urlopen(f'{base}{path}?{urlencode(params)}') as response:
+        body = response.read()
+        cache = response.headers.get('X-Cache', '')
+    return {'path': path, 'seconds': time.perf_counter() - start, 'bytes': len(body), 'cache': cache}
+
+
+def run(file_path, concurrency, transform_cache):
+    with tempfile.TemporaryDirectory() as tile_dir:
+        service = SpectrogramService(tile_dir=tile_dir)
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        common = {'file': file_path, 'transform_cache': str(transform_cache).lower()}
+
+        steps = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, path, params in [
+                ('cold', '/spectrogram.png', {}),
+                ('repeat', '/spectrogram.png', {}),
+                ('vmin tweak', '/spectrogram.png', {'vmin': -40}),
+                ('max_height tweak', '/spectrogram.png', {'max_height': 3500}),
+                ('raw arrays', '/raw.npz', {}),
+                ('tile index', '/tiles/index.json', {}),
+                ('tile png', '/tiles/0/0_0.png', {'vmin': -50}),
+                ('new window (transform)', '/spectrogram.png', {'window': 'hamming'}),
+            ]:
+                steps.append(dict(_get(base, path, **common, **params), name=name))
+
+            # 多个并发的相同请求（新的变换参数）：应只计算一次
+            before = service.stats()
+            with ThreadPoolExecutor(concurrency) as pool:
+                concurrent = list(pool.map(
+                    lambda _: _get(base, '/spectrogram.png', **common, window='blackman'), range(concurrency)))
+            after = service.stats()
+
+        server.shutdown()
+        server.server_close()
+
+    return {
+        'file': file_path,
+        'steps': steps,
+        'concurrent': {
+            'requests': concurrency,
+            'max_seconds': max(r['seconds'] for r in concurrent),
+            'transforms': after['spectra']['miss'] - before['spectra']['miss'],
+            # 等待者可能合并在图像层（同一图像键）或频谱层
+            'coalesced': sum(after[name]['coalesced'] - before[name]['coalesced'] for name in after)
+        },
+        'stats': service.stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local spectrogram service")
+    parser.add_argument('--file', help="Capture to request (default: a generated 2 s, 5 MSa/s capture)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--transform-cache', action=argparse.BooleanOptionalAction, default=False,
+                        help="Also use the on-disk transform cache (off: measure the in-memory caches only)")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        file_path = args.file
+        if file_path is None:
+            file_path = os.path.join(work_dir, 'capture.csv')
+            generate_capture(file_path, seconds=2.0, sample_rate=5e6)
+        report = run(file_path, args.concurrency, args.transform_cache)
+
+    for step in report['steps']:
+        print(f"  {step['name']:<24} {step['seconds'] * 1e3:9.1f} ms  {step['bytes']:>9} B  {step['cache']}")
+    c = report['concurrent']
+    print(f"  {c['requests']} concurrent identical requests: {c['max_seconds'] * 1e3:.1f} ms, "
+          f"{c['transforms']} transform(s), {c['coalesced']} coalesced")
+
+    if args.json:
+        save_json(report, args.json)
+
+
+if __name__ == '__main__':
+    main()
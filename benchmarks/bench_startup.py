@@ -0,0 +1,145 @@
+"""
+启动时间基准与回归检查：每个场景在新的Python进程中运行多次，记录导入耗时（进程内）与整个进程的墙钟时间，
+并检查导入后加载了哪些重量级依赖——只导入流水线或只选择一种变换后端时，不应加载其他后端的依赖。
+
+出现不应加载的依赖、或比--baseline给出的上次结果慢超过容差时以非零状态退出，可放在CI中防止启动时间回退。
+
+用法（在仓库根目录运行）:
+    python -m benchmarks.bench_startup --json data/bench/startup.json
+    python -m benchmarks.bench_startup --baseline data/bench/startup.json --tolerance 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.common import environment, load_json, save_json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时不应加载的重量级模块（只在所选后端或出图方式需要时导入）
+HEAVY_MODULES = ('scipy.signal', 'scipy.ndimage', 'pandas', 'pywt', 'librosa.core', 'librosa.display',
+                 'matplotlib.pyplot')
+
+# 场景: 名称 → (进程内执行的导入代码, 允许加载的重量级模块)；导入scipy.signal时会一并导入scipy.ndimage
+SCENARIOS = {
+    'import pipeline': ("import func.input_func.process", ()),
+    'backend stft/native': ("from func.analysis_func.registry import get_backend; get_backend('stft', 'native')", ()),
+    'backend stft/librosa': ("from func.analysis_func.registry import get_backend; get_backend('stft', 'librosa')",
+                             ('scipy.signal', 'scipy.ndimage', 'librosa.core')),
+    'backend stft/scipy': ("from func.analysis_func.registry import get_backend; get_backend('stft', 'scipy')",
+                           ('scipy.signal', 'scipy.ndimage')),
+    'backend stft/zoom': ("from func.analysis_func.registry import get_backend; get_backend('stft', 'zoom')",
+                          ('scipy.signal', 'scipy.ndimage')),
+    'backend cwt': ("from func.analysis_func.registry import get_backend; get_backend('cwt')", ('pywt',)),
+    'import service': ("import serve", ('pywt',)),  # 尺度参数解析需要generate_scales
+}
+
+# 命令行入口: 名称 → 参数（只测进程墙钟时间）
+COMMANDS = {
+    'batch.py --help': ['batch.py', '--help'],
+    'live.py --help': ['live.py', '--help'],
+}
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'modules': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _run_scenario(code, repeat):
+    """
+    在新进程中执行code repeat次，返回导入耗时与进程墙钟时间的中位数，以及加载的重量级模块
+    """
+    import_times, wall_times, modules = [], [], set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', _CHILD.format(code=code, heavy=HEAVY_MODULES)],
+                                cwd=ROOT, capture_output=True, text=True, check=True)
+        wall_times.append(time.perf_counter() - start)
+        child = json.loads(result.stdout.strip().splitlines()[-1])
+        import_times.append(child['seconds'])
+        modules.update(child['modules'])
+    return {'import_ms': statistics.median(import_times) * 1e3, 'wall_ms': statistics.median(wall_times) * 1e3,
+            'heavy_modules': sorted(modules)}
+
+
+def _run_command(args, repeat):
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True, check=True)
+        wall_times.append(time.perf_counter() - start)
+    return {'wall_ms': statistics.median(wall_times) * 1e3}
+
+
+def run(repeat):
+    results = {}
+    for name, (code, allowed) in SCENARIOS.items():
+        results[name] = _run_scenario(code, repeat)
+        results[name]['unexpected_modules'] = [m for m in results[name]['heavy_modules'] if m not in allowed]
+    for name, args in COMMANDS.items():
+        results[name] = _run_command(args, repeat)
+    # 解释器本身的启动时间，作为墙钟时间的参照
+    results['python -c pass'] = _run_command(['-c', 'pass'], repeat)
+    return results
+
+
+def check(results, baseline=None, tolerance=0.5, slack_ms=20.0):
+    """
+    返回回归问题列表：不应加载的重量级模块，以及比基线慢超过(1 + tolerance)倍加slack_ms的场景
+    """
+    problems = []
+    for name, result in results.items():
+        if result.get('unexpected_modules'):
+            problems.append(f"{name}: loads {', '.join(result['unexpected_modules'])}")
+    if baseline:
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            for metric in ('import_ms', 'wall_ms'):
+                if metric in result and metric in previous:
+                    limit = previous[metric] * (1 + tolerance) + slack_ms
+                    if result[metric] > limit:
+                        problems.append(f"{name}: {metric} {result[metric]:.0f} ms > {limit:.0f} ms "
+                                        f"(baseline {previous[metric]:.0f} ms)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure startup/import time and guard against regressions")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh processes per scenario (median is reported)")
+    parser.add_argument('--baseline', help="Previous --json result to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed relative slowdown vs. the baseline")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    for name, result in results.items():
+        import_text = f"import {result['import_ms']:7.1f} ms" if 'import_ms' in result else ' ' * 19
+        modules = ', '.join(result.get('heavy_modules', [])) or '-'
+        print(f"  {name:<24} {import_text}   process {result['wall_ms']:7.1f} ms   "
+              f"{modules if 'heavy_modules' in result else ''}")
+
+    baseline = load_json(args.baseline)['results'] if args.baseline else None
+    problems = check(results, baseline, args.tolerance)
+
+    if args.json:
+        save_json({'environment': environment(), 'repeat': args.repeat, 'results': results}, args.json)
+
+    if problems:
+        print("\nStartup regressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("\nNo startup regressions")
+
+
+if __name__ == '__main__':
+    main()
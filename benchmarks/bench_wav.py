@@ -0,0 +1,100 @@
+"""
+WAV加载基准：生成一个大WAV文件（默认2 GB，16位双声道），比较内存映射加载（只解析文件头、只转换所选通道与时间段）
+与librosa.load（解码整个文件，原来默认还会重采样到44100 Hz）的耗时与内存
+
+刚写出的文件在页缓存中，结果相当于热缓存；冷缓存时内存映射只读取实际访问到的页，打开文件的耗时不变。
+
+用法（在仓库根目录运行）:
+    python -m benchmarks.bench_wav --size-mb 2048 --json data/bench/wav.json
+    python -m benchmarks.bench_wav --size-mb 256 --subtype PCM_24 --librosa
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import numpy as np
+from func.input_func.wav_input import open_wav_memmap, load_wav_range, load_audio_from_file
+from benchmarks.common import measure, environment, save_json
+
+SUBTYPE_BYTES = {'PCM_16': 2, 'PCM_24': 3, 'PCM_32': 4, 'FLOAT': 4}
+
+
+def write_wav(path, size_mb, sample_rate, n_channels, subtype, block_frames=1 << 20):
+    """
+    分块写出约size_mb的WAV文件（各通道为不同频率的正弦加噪声），返回帧数
+    """
+    import soundfile as sf
+
+    n_frames = int(size_mb * 1e6) // (SUBTYPE_BYTES[subtype] * n_channels)
+    rng = np.random.default_rng(0)
+    freqs = 440.0 * (1 + np.arange(n_channels))
+    # 数据超过4 GB时RIFF的长度字段不够用，改写RF64
+    container = 'RF64' if n_frames * SUBTYPE_BYTES[subtype] * n_channels >= 2 ** 32 - 1024 else 'WAV'
+    with sf.SoundFile(path, 'w', samplerate=sample_rate, channels=n_channels, subtype=subtype,
+                      format=container) as f:
+        for start in range(0, n_frames, block_frames):
+            t = (start + np.arange(min(block_frames, n_frames - start)))[:, None] / sample_rate
+            block = 0.5 * np.sin(2 * np.pi * freqs * t) + 0.01 * rng.standard_normal((len(t), n_channels))
+            f.write(block.astype(np.float32))
+    return n_frames
+
+
+def run(path, n_frames, sample_rate, args):
+    stats = []
+
+    def stage(name, func):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, info = measure(name, func)
+        stats.append(info)
+        return result
+
+    frames, _ = stage('open (header + memmap)', lambda: open_wav_memmap(path))
+    del frames
+    middle = n_frames / sample_rate / 2
+    stage(f'{args.window:g} s window, channel 0',
+          lambda: load_wav_range(path, 0, offset=middle, duration=args.window))
+    stage(f'{args.window:g} s window, mono mix',
+          lambda: load_wav_range(path, None, offset=middle, duration=args.window))
+    stage('load_audio_from_file, channel 0',
+          lambda: load_audio_from_file(path, channel=0, use_cache=False))
+    if args.librosa:
+        import librosa
+        stage('librosa.load sr=None', lambda: librosa.load(path, sr=None, dtype=np.float32))
+        stage('librosa.load sr=44100', lambda: librosa.load(path, sr=44100, dtype=np.float32))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory-mapped WAV loading with librosa.load")
+    parser.add_argument('--size-mb', type=float, default=2048, help="Size of the generated WAV file")
+    parser.add_argument('--subtype', choices=sorted(SUBTYPE_BYTES), default='PCM_16')
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--sample-rate', type=int, default=48000)
+    parser.add_argument('--window', type=float, default=10.0, help="Seconds loaded by the time-range scenarios")
+    parser.add_argument('--librosa', action='store_true', help="Also time librosa.load (slow for large files)")
+    parser.add_argument('--path', help="WAV file to write and load (default: a temporary file, deleted afterwards)")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.gettempdir(), 'bench_wav.wav')
+    n_frames = write_wav(path, args.size_mb, args.sample_rate, args.channels, args.subtype)
+    try:
+        stats = run(path, n_frames, args.sample_rate, args)
+    finally:
+        if not args.path:
+            os.remove(path)
+
+    print(f"{args.size_mb:g} MB {args.subtype} WAV, {args.channels} channels, {args.sample_rate} Hz, "
+          f"{n_frames / args.sample_rate:.0f} seconds")
+    print(f"  {'scenario':<34} {'seconds':>9} {'peak MB':>9}")
+    for s in stats:
+        print(f"  {s['name']:<34} {s['seconds']:9.4f} {s['peak_mb']:9.1f}")
+
+    if args.json:
+        save_json({'environment': environment(), 'size_mb': args.size_mb, 'subtype': args.subtype,
+                   'channels': args.channels, 'sample_rate': args.sample_rate, 'stages': stats}, args.json)
+
+
+if __name__ == '__main__':
+    main()
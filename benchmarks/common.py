@@ -0,0 +1,85 @@
+"""
+基准测试共用工具：单次调用的耗时/内存测量、运行环境信息、JSON结果读写
+"""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+def _max_rss_mb():
+    """
+    进程峰值常驻内存（MB；Linux上ru_maxrss单位为KB）
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(name, func):
+    """
+    测量一次调用的墙钟时间、CPU时间与峰值内存
+
+    peak_mb为tracemalloc统计的本次调用内Python/numpy分配峰值；
+    max_rss_mb为调用结束时的进程峰值常驻内存（单调不减，包含之前阶段）
+
+    返回:
+        result: func()的返回值
+        stats (dict): name、seconds、cpu_seconds、peak_mb、max_rss_mb
+    """
+    tracemalloc.start()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        result = func()
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {'name': name, 'seconds': elapsed, 'cpu_seconds': cpu, 'peak_mb': peak / 1e6,
+                    'max_rss_mb': _max_rss_mb()}
+
+
+def environment():
+    """
+    记录结果对应的代码版本与运行环境，便于不同版本之间比较
+    """
+    import numpy
+    import scipy
+    import librosa
+    import pywt
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        commit = None
+
+    return {
+        'commit': commit or None,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'scipy': scipy.__version__,
+        'librosa': librosa.__version__,
+        'pywt': pywt.__version__,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def save_json(report, path):
+    """
+    写出JSON结果（目录不存在时自动创建）
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
@@ -0,0 +1,122 @@
+"""
+合成示波器采集数据：载波经扫频正弦包络调幅（AM），两通道增益/时延/噪声不同，
+CSV格式与示波器导出的一致（CH1V,CH2V,t0=0,tInc=...表头），也可生成无表头的单列简单格式。
+
+用法（在仓库根目录运行）:
+    python -m benchmarks.synthetic --seconds 2 --sample-rate 5e6 --out-dir data/input_data
+"""
+import argparse
+import os
+import numpy as np
+
+
+def default_name(seconds, sample_rate, sweep_period, layout='header'):
+    """
+    按示例文件的命名方式生成文件名，例如fs5e6_tswp500ms_t2s_synth.csv
+    """
+    mantissa, exponent = f'{sample_rate:e}'.split('e')
+    suffix = 'synth' if layout == 'header' else 'synth_simple'
+    return f"fs{float(mantissa):g}e{int(exponent)}_tswp{sweep_period * 1e3:g}ms_t{seconds:g}s_{suffix}.csv"
+
+
+def sweep_envelope(t, sweep_start=200.0, sweep_stop=4000.0, sweep_period=0.5):
+    """
+    周期性线性扫频正弦：每sweep_period秒从sweep_start扫到sweep_stop，相位在周期之间连续
+    """
+    k, tau = np.divmod(t, sweep_period)
+    rate = (sweep_stop - sweep_start) / sweep_period
+    cycle_phase = sweep_start * sweep_period + rate * sweep_period ** 2 / 2
+    return np.sin(2 * np.pi * (k * cycle_phase + sweep_start * tau + rate * tau ** 2 / 2))
+
+
+def generate_block(start, n_points, sample_rate, carrier_freq=200e3, sweep_start=200.0, sweep_stop=4000.0,
+                   sweep_period=0.5, am_depth=0.5, noise=0.01, gains=(1.0, 0.5), delays=(0.0, 2e-4), rng=None):
+    """
+    生成从第start个采样点开始的n_points个采样点，返回shape为(len(gains), n_points)的数组
+
+    参数:
+        start (int): 起始采样点
+        n_points (int): 采样点数
+        sample_rate (float): 采样率
+        carrier_freq (float): 载波频率 (Hz)
+        sweep_start, sweep_stop (float): 包络扫频的起止频率 (Hz)
+        sweep_period (float): 扫频周期 (s)
+        am_depth (float): 调制深度
+        noise (float): 高斯白噪声标准差（相对载波幅度）
+        gains (tuple): 各通道增益
+        delays (tuple): 各通道包络时延 (s)
+        rng (np.random.Generator): 随机数生成器
+    """
+    rng = rng or np.random.default_rng(0)
+    t = (start + np.arange(n_points)) / sample_rate
+    carrier = np.sin(2 * np.pi * carrier_freq * t)
+
+    block = np.empty((len(gains), n_points))
+    for i, (gain, delay) in enumerate(zip(gains, delays)):
+        envelope = 1 + am_depth * sweep_envelope(t - delay, sweep_start, sweep_stop, sweep_period)
+        block[i] = gain * envelope * carrier + noise * rng.standard_normal(n_points)
+    return block
+
+
+def generate_capture(path, seconds=2.0, sample_rate=5e6, layout='header', block_size=1 << 20, seed=0, **signal_kwargs):
+    """
+    分块生成合成采集数据并写入CSV文件（内存与block_size相关，与采集长度无关）
+
+    参数:
+        path (str): 输出CSV路径
+        seconds (float): 采集时长 (s)
+        sample_rate (float): 采样率
+        layout (str): 'header'（CH1V,CH2V两列+tInc表头）或'simple'（无表头，只有CH1V一列）
+        block_size (int): 每块采样点数
+        seed (int): 噪声随机种子
+        signal_kwargs: 传给generate_block的信号参数
+
+    返回:
+        path (str): 输出路径
+    """
+    if layout not in ('header', 'simple'):
+        raise ValueError(f"Unsupported layout: {layout}. Use 'header' or 'simple'")
+
+    n_points = int(round(seconds * sample_rate))
+    rng = np.random.default_rng(seed)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, 'w') as f:
+        if layout == 'header':
+            f.write(f"CH1V,CH2V,t0=0,tInc={1 / sample_rate:g},\n")
+        for start in range(0, n_points, block_size):
+            block = generate_block(start, min(block_size, n_points - start), sample_rate, rng=rng, **signal_kwargs)
+            columns = block.T if layout == 'header' else block[:1].T
+            np.savetxt(f, columns, fmt='%.6f', delimiter=',')
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic AM / swept-sine scope capture")
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--sample-rate', type=float, default=5e6)
+    parser.add_argument('--carrier', type=float, default=200e3, help="Carrier frequency in Hz")
+    parser.add_argument('--sweep', type=float, nargs=2, default=(200.0, 4000.0), metavar=('START', 'STOP'),
+                        help="Envelope sweep range in Hz")
+    parser.add_argument('--sweep-period', type=float, default=0.5, help="Sweep period in seconds")
+    parser.add_argument('--am-depth', type=float, default=0.5)
+    parser.add_argument('--noise', type=float, default=0.01)
+    parser.add_argument('--layout', choices=('header', 'simple'), default='header')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', default='data/input_data')
+    parser.add_argument('--out', help="Output path (defaults to a name derived from the parameters)")
+    args = parser.parse_args()
+
+    path = args.out or os.path.join(args.out_dir, default_name(args.seconds, args.sample_rate, args.sweep_period,
+                                                                args.layout))
+    generate_capture(path, args.seconds, args.sample_rate, layout=args.layout, seed=args.seed,
+                     carrier_freq=args.carrier, sweep_start=args.sweep[0], sweep_stop=args.sweep[1],
+                     sweep_period=args.sweep_period, am_depth=args.am_depth, noise=args.noise)
+    print(f"Wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
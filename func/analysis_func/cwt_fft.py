@@ -0,0 +1,181 @@
+from collections import OrderedDict
+import numpy as np
+import pywt
+from scipy import fft as sp_fft
+
+
+BANK_CACHE_MAX_BYTES = 512 * 1024 ** 2  # 频域小波核缓存的总大小上限（字节）
+_kernel_cache = {}
+_bank_cache = OrderedDict()
+
+
+def _scales_key(scales):
+    return np.ascontiguousarray(scales, dtype=np.float64).tobytes()
+
+
+def scale_kernels(wavelet, scales):
+    """
+    生成与pywt.cwt完全一致的各尺度时域卷积核（结果缓存）
+
+    pywt.cwt的系数为 -sqrt(s) * diff(conv(x, int_psi_s)) 的中间部分，这里把差分和
+    系数 -sqrt(s) 合并进卷积核h，使 coef[k] = conv(x, h)[k + offset]。
+
+    参数:
+        wavelet (str): 小波基函数
+        scales (np.ndarray): 尺度数组
+
+    返回:
+        kernels (list): 各尺度的时域卷积核
+        offsets (np.ndarray): 各尺度输出相对线性卷积结果的偏移
+        is_complex (bool): 是否为复小波
+    """
+    cache_key = (str(wavelet), _scales_key(scales))
+    if cache_key in _kernel_cache:
+        return _kernel_cache[cache_key]
+
+    wavelet_obj = pywt.ContinuousWavelet(wavelet) if isinstance(wavelet, str) else wavelet
+    int_psi, x = pywt.integrate_wavelet(wavelet_obj, precision=12)
+    is_complex = bool(wavelet_obj.complex_cwt)
+    if is_complex:
+        int_psi = np.conj(int_psi)
+
+    step = x[1] - x[0]
+    kernels = []
+    offsets = np.empty(len(scales), dtype=np.int64)
+    for i, scale in enumerate(scales):
+        j = (np.arange(scale * (x[-1] - x[0]) + 1) / (scale * step)).astype(int)
+        j = j[j < int_psi.size]
+        int_psi_scale = int_psi[j][::-1]
+        if int_psi_scale.size < 2:
+            raise ValueError(f"Selected scale of {scale} too small.")
+
+        h = np.zeros(int_psi_scale.size + 1, dtype=int_psi_scale.dtype)
+        h[:-1] += int_psi_scale
+        h[1:] -= int_psi_scale
+        kernels.append(-np.sqrt(scale) * h)
+        offsets[i] = (int_psi_scale.size - 2) // 2 + 1
+
+    _kernel_cache[cache_key] = (kernels, offsets, is_complex)
+    return kernels, offsets, is_complex
+
+
+def wavelet_bank(wavelet, scales, n_fft, sample_rate, dtype=np.complex64):
+    """
+    计算长度为n_fft的频域小波核组与对应频率（按wavelet、scales、n_fft、sample_rate缓存）
+
+    实小波使用rfft（只保存非负频率），复小波使用完整fft。总大小超过
+    BANK_CACHE_MAX_BYTES的核组不缓存，避免长信号占用过多内存。
+
+    返回:
+        bank (np.ndarray): 频域核组，shape为(len(scales), n_freq)
+        frequencies (np.ndarray): 各尺度对应的频率 (Hz)
+    """
+    cache_key = (str(wavelet), _scales_key(scales), n_fft, sample_rate, np.dtype(dtype).str)
+    if cache_key in _bank_cache:
+        _bank_cache.move_to_end(cache_key)
+        return _bank_cache[cache_key]
+
+    kernels, _, is_complex = scale_kernels(wavelet, scales)
+    n_freq = n_fft if is_complex else n_fft // 2 + 1
+    bank = np.empty((len(scales), n_freq), dtype=dtype)
+    for i, h in enumerate(kernels):
+        bank[i] = sp_fft.fft(h, n_fft) if is_complex else sp_fft.rfft(h, n_fft)
+
+    frequencies = pywt.scale2frequency(wavelet, scales) * sample_rate
+
+    if bank.nbytes <= BANK_CACHE_MAX_BYTES:
+        _bank_cache[cache_key] = (bank, frequencies)
+        total = sum(entry[0].nbytes for entry in _bank_cache.values())
+        while total > BANK_CACHE_MAX_BYTES:
+            _, (evicted, _) = _bank_cache.popitem(last=False)
+            total -= evicted.nbytes
+
+    return bank, frequencies
+
+
+def wavelet_bank_batches(wavelet, scales, n_fft, sample_rate, dtype=np.complex64, batch_size=16):
+    """
+    按batch_size个尺度一批产生频域小波核：整个核组不超过BANK_CACHE_MAX_BYTES时取自wavelet_bank（缓存）的切片，
+    否则每批在一个batch_size x n_freq的缓冲区中临时计算，整个核组从不生成
+
+    返回:
+        generator: 逐批产生(start, stop, bank)，bank为scales[start:stop]的频域核，shape为(stop - start, n_freq)
+                   （临时计算时下一批会覆盖上一批的缓冲区）
+    """
+    kernels, _, is_complex = scale_kernels(wavelet, scales)
+    n_freq = n_fft if is_complex else n_fft // 2 + 1
+
+    if len(scales) * n_freq * np.dtype(dtype).itemsize <= BANK_CACHE_MAX_BYTES:
+        bank, _ = wavelet_bank(wavelet, scales, n_fft, sample_rate, dtype)
+        for start in range(0, len(scales), batch_size):
+            stop = min(start + batch_size, len(scales))
+            yield start, stop, bank[start:stop]
+        return
+
+    buffer = np.empty((min(batch_size, len(scales)), n_freq), dtype=dtype)
+    for start in range(0, len(scales), batch_size):
+        stop = min(start + batch_size, len(scales))
+        for i in range(stop - start):
+            h = kernels[start + i]
+            buffer[i] = sp_fft.fft(h, n_fft) if is_complex else sp_fft.rfft(h, n_fft)
+        yield start, stop, buffer[:stop - start]
+
+
+def perform_cwt_fft(audio_data, sample_rate, scales, wavelet='morl', dtype=np.float32,
+                    power_only=False, batch_size=16, workers=-1):
+    """
+    基于FFT的连续小波变换：信号只做一次正向FFT，与缓存的频域小波核相乘后批量逆FFT
+
+    结果与pywt.cwt一致（在所选精度内）。power_only=True时每批直接计算|系数|^2，
+    完整的复系数矩阵从不生成；频域核组超过BANK_CACHE_MAX_BYTES时也按批计算（见wavelet_bank_batches）。
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 采样率
+        scales (np.ndarray): 尺度数组
+        wavelet (str): 小波基函数，默认'morl'
+        dtype: 计算精度，np.float32（复数为complex64）或np.float64，默认np.float32
+        power_only (bool): 是否只返回功率矩阵，默认False
+        batch_size (int): 每批逆FFT处理的尺度数量
+        workers (int): scipy.fft使用的线程数，-1表示使用全部CPU
+
+    返回:
+        coefficients (np.ndarray): CWT系数矩阵（power_only时为功率矩阵），shape为(len(scales), len(audio_data))
+        frequencies (np.ndarray): 对应的频率数组
+    """
+    real_dtype = np.dtype(dtype)
+    complex_dtype = np.result_type(real_dtype, np.complex64)
+    audio_data = np.asarray(audio_data, dtype=real_dtype)
+    n_points = audio_data.shape[-1]
+
+    kernels, offsets, is_complex = scale_kernels(wavelet, scales)
+    n_fft = sp_fft.next_fast_len(n_points + max(len(h) for h in kernels))
+    frequencies = pywt.scale2frequency(wavelet, scales) * sample_rate
+
+    if is_complex:
+        spectrum = sp_fft.fft(audio_data, n_fft, workers=workers)
+    else:
+        spectrum = sp_fft.rfft(audio_data, n_fft, workers=workers)
+
+    if power_only:
+        out_dtype = real_dtype
+    else:
+        out_dtype = complex_dtype if is_complex else real_dtype
+    coefficients = np.empty((len(scales), n_points), dtype=out_dtype)
+
+    # 核组太大不能缓存时按批临时计算，内存只有batch_size x n_freq
+    for start, stop, bank in wavelet_bank_batches(wavelet, scales, n_fft, sample_rate, complex_dtype, batch_size):
+        product = bank * spectrum
+        if is_complex:
+            conv = sp_fft.ifft(product, n_fft, axis=-1, workers=workers, overwrite_x=True)
+        else:
+            conv = sp_fft.irfft(product, n_fft, axis=-1, workers=workers, overwrite_x=True)
+
+        for i in range(stop - start):
+            segment = conv[i, offsets[start + i]:offsets[start + i] + n_points]
+            if power_only:
+                coefficients[start + i] = segment.real ** 2 + segment.imag ** 2 if is_complex else segment ** 2
+            else:
+                coefficients[start + i] = segment
+
+    return coefficients, frequencies
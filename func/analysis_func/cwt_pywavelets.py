@@ -1,7 +1,12 @@
 import numpy as np
 import pywt
+from scipy import fft as sp_fft
 from func.plot_func.cwt_spectrogram import cwt_plot_scalogram
 from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.cwt_fft import perform_cwt_fft, scale_kernels, wavelet_bank
+from func.analysis_func.parallel import parallel_cwt_blocked
+from func.analysis_func.transform_cache import cached_transform
+from func.output_func.trace import traced
 
 
 def perform_cwt_pywt(audio_data, sample_rate, scales, wavelet='morl'):
@@ -16,7 +21,7 @@ def perform_cwt_pywt(audio_data, sample_rate, scales, wavelet='morl'):
                       其他选项: 'mexh'(墨西哥帽), 'gaus1'-'gaus8'(高斯), 'cgau1'-'cgau8'(复高斯), 'cmor'(复Morlet)
         
     返回:
-        coefficients (np.ndarray): CWT系数矩阵，shape为(len(scales), len(audio_data))
+        coefficients (np.ndarray): CWT系数矩阵，shape为(len(scales), len(audio_data))，float32输入时为float32/complex64
         frequencies (np.ndarray): 对应的频率数组
     """
     # 执行连续小波变换
@@ -26,14 +31,207 @@ def perform_cwt_pywt(audio_data, sample_rate, scales, wavelet='morl'):
         wavelet,
         sampling_period=1.0/sample_rate
     )
+
+    # 旧版本PyWavelets总是返回float64/complex128，按输入精度转换回来
+    if audio_data.dtype == np.float32:
+        coefficients = coefficients.astype(np.complex64 if np.iscomplexobj(coefficients) else np.float32, copy=False)
     
     return coefficients, frequencies
 
 
+def _group_scales(kernel_lengths, batch_size):
+    """
+    按小波核长度把尺度分组：组内最长核不超过最短核的2倍，且每组不超过batch_size个尺度
+    """
+    order = np.argsort(kernel_lengths, kind='stable')
+    groups = []
+    current = []
+    for idx in order:
+        if current and (len(current) >= batch_size or kernel_lengths[idx] > 2 * kernel_lengths[current[0]]):
+            groups.append(np.array(current))
+            current = []
+        current.append(idx)
+    if current:
+        groups.append(np.array(current))
+    return groups
+
+
+def perform_cwt_blocked(audio_data, sample_rate, scales, wavelet='morl', n_columns=4096, pooling='mean',
+                        block_size=1 << 16, batch_size=16, dtype=np.float32, workers=-1, edges=None, span=None):
+    """
+    按时间分块（overlap-save）计算CWT功率，并在每块内直接池化到指定的输出时间分辨率
+
+    原理：
+    - 尺度按小波支撑长度分组，每组使用与其支撑长度匹配的FFT块长度
+    - 每块输入在两端多取小波支撑长度的样本（信号外补零），逆FFT后只保留无循环混叠的部分
+    - 每块的功率|系数|^2立即按输出列池化（均值或最大值）后丢弃
+    峰值内存只与块长度×每组尺度数有关，与信号长度无关。
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 采样率
+        scales (np.ndarray): 尺度数组
+        wavelet (str): 小波基函数，默认'morl'
+        n_columns (int): 输出的时间列数，默认4096（不超过信号长度）
+        pooling (str): 池化方式，'mean'（功率均值）或'max'（功率最大值），默认'mean'
+        block_size (int): 最小FFT块长度，默认65536
+        batch_size (int): 每组最多的尺度数量
+        dtype: 计算精度，np.float32或np.float64，默认np.float32
+        workers (int): scipy.fft使用的线程数，-1表示使用全部CPU
+        edges (np.ndarray): 输出列在时间轴上的边界（长度为列数+1），默认None表示按n_columns均分
+        span (tuple): 只计算第span[0]~span[1]列（用于按时间分片并行），默认None表示全部列
+
+    返回:
+        power (np.ndarray): 池化后的功率矩阵，shape为(len(scales), n_columns)（指定span时为span内的列数）
+        frequencies (np.ndarray): 对应的频率数组
+        times (np.ndarray): 各输出列的中心时间 (s)
+    """
+    if pooling not in ('mean', 'max'):
+        raise ValueError(f"Unsupported pooling: {pooling}. Use 'mean' or 'max'")
+
+    real_dtype = np.dtype(dtype)
+    complex_dtype = np.result_type(real_dtype, np.complex64)
+    # 不整体转换精度，每块取出时再转换（输入可能是共享内存或memmap中的大数组）
+    audio_data = np.asarray(audio_data)
+    n_points = len(audio_data)
+    n_columns = int(min(n_columns, n_points))
+
+    # 输出列在时间轴上的边界
+    if edges is None:
+        edges = np.linspace(0, n_points, n_columns + 1).astype(np.int64)
+    if span is None:
+        span = (0, len(edges) - 1)
+    edges = np.asarray(edges, dtype=np.int64)[span[0]:span[1] + 1]
+    widths = np.diff(edges)
+    n_columns = len(widths)
+    sample_start, sample_stop = int(edges[0]), int(edges[-1])
+
+    kernels, offsets, is_complex = scale_kernels(wavelet, scales)
+    kernel_lengths = np.array([len(h) for h in kernels])
+    frequencies = pywt.scale2frequency(wavelet, scales) * sample_rate
+
+    fill = 0 if pooling == 'mean' else -np.inf
+    power = np.full((len(scales), n_columns), fill, dtype=real_dtype)
+
+    for group in _group_scales(kernel_lengths, batch_size):
+        group_offsets = offsets[group]
+        # 每块输入起点向前延伸lead个样本，保证组内所有尺度的输出都没有循环混叠
+        lead = int(np.max(kernel_lengths[group] - 1 - group_offsets))
+        n_fft = sp_fft.next_fast_len(max(block_size, 4 * int(kernel_lengths[group].max())))
+        step = n_fft - lead - int(group_offsets.max())
+        bank, _ = wavelet_bank(wavelet, scales[group], n_fft, sample_rate, complex_dtype)
+
+        for start in range(sample_start, sample_stop, step):
+            stop = min(start + step, sample_stop)
+
+            # 取出本块所需的输入段，信号范围外补零
+            segment = np.zeros(n_fft, dtype=real_dtype)
+            src_start = start - lead
+            lo, hi = max(src_start, 0), min(src_start + n_fft, n_points)
+            segment[lo - src_start:hi - src_start] = audio_data[lo:hi]
+
+            if is_complex:
+                conv = sp_fft.ifft(bank * sp_fft.fft(segment, workers=workers), axis=-1, workers=workers)
+            else:
+                conv = sp_fft.irfft(bank * sp_fft.rfft(segment, workers=workers), n_fft, axis=-1, workers=workers)
+
+            # 本块覆盖的输出列及其在块内的切分点
+            first_col = np.searchsorted(edges, start, side='right') - 1
+            cuts = edges[(edges > start) & (edges < stop)]
+            cuts = np.concatenate(([start], cuts)) - start
+            cols = slice(first_col, first_col + len(cuts))
+
+            for i, scale_idx in enumerate(group):
+                begin = group_offsets[i] + lead
+                values = conv[i, begin:begin + (stop - start)]
+                block_power = values.real ** 2 + values.imag ** 2 if is_complex else values ** 2
+                if pooling == 'mean':
+                    power[scale_idx, cols] += np.add.reduceat(block_power, cuts)
+                else:
+                    np.maximum(power[scale_idx, cols], np.maximum.reduceat(block_power, cuts),
+                               out=power[scale_idx, cols])
+
+    if pooling == 'mean':
+        power /= widths
+
+    times = (edges[:-1] + edges[1:]) / 2 / sample_rate
+
+    return power, frequencies, times
+
+
+def generate_scales(sample_rate, wavelet='morl', scale_min=1, scale_max=128, scale_count=256, decimated=False):
+    """
+    生成线性分布的尺度数组
+
+    参数:
+        decimated (bool): 信号是否经过抽取；为True时去除中心频率高于奈奎斯特频率的尺度
+                          （抽取后尺度按抽取因子缩小，可能小于1，这些尺度只会产生混叠），默认False
+
+    返回:
+        scales (np.ndarray): 尺度数组
+    """
+    scales = np.arange(scale_min, scale_max, (scale_max - scale_min) / scale_count)
+    n_generated = len(scales)
+    if decimated:
+        scales = scales[pywt.scale2frequency(wavelet, scales) * sample_rate <= sample_rate / 2]
+    dropped = n_generated - len(scales)
+    print(f"\nGenerating scales: {len(scales)} scales from {scale_min} to {scale_max}"
+          + (f" ({dropped} above Nyquist after decimation dropped)" if dropped else ''))
+    return scales
+
+
+@traced()
+def perform_cwt(audio_data, sample_rate, scales, wavelet='morl', engine='fft', n_columns=None, pooling='mean',
+                n_jobs=1):
+    """
+    按engine/n_columns/n_jobs选择CWT实现；多通道输入(通道数, 采样点数)时逐通道计算并堆叠
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号，一维或(通道数, 采样点数)
+        sample_rate (int): 采样率
+        scales (np.ndarray): 尺度数组
+        wavelet (str): 小波基函数，默认'morl'
+        engine (str): 'fft'（只计算功率）或'pywt'，默认'fft'
+        n_columns (int): 分块CWT输出的时间列数（仅用于'fft'引擎），默认None表示每个采样点一列
+        pooling (str): 分块CWT的池化方式，'mean'或'max'，默认'mean'
+        n_jobs (int): 分块CWT按时间分片并行的进程数（仅用于'fft'引擎），默认1
+
+    返回:
+        coefficients (np.ndarray): 'fft'引擎为功率矩阵，'pywt'引擎为CWT系数；多通道时多出最前面的通道轴
+        frequencies (np.ndarray): 对应的频率数组
+        times (np.ndarray): 分块CWT各输出列的中心时间 (s)；每个采样点一列时为空数组
+    """
+    if audio_data.ndim > 1:
+        results = [perform_cwt(x, sample_rate, scales, wavelet, engine, n_columns, pooling, n_jobs)
+                   for x in audio_data]
+        return np.stack([r[0] for r in results]), results[0][1], results[0][2]
+
+    if engine == 'fft' and n_jobs != 1:
+        print(f"\nPerforming time-sharded CWT transformation with wavelet '{wavelet}' ({n_jobs} jobs)...")
+        return parallel_cwt_blocked(audio_data, sample_rate, scales, wavelet,
+                                    n_columns=n_columns, pooling=pooling, n_jobs=n_jobs)
+    if engine == 'fft' and n_columns:
+        print(f"\nPerforming blocked CWT transformation with wavelet '{wavelet}' ({n_columns} columns, {pooling} pooling)...")
+        return perform_cwt_blocked(audio_data, sample_rate, scales, wavelet, n_columns=n_columns, pooling=pooling)
+    if engine == 'fft':
+        print(f"\nPerforming FFT-based CWT transformation with wavelet '{wavelet}'...")
+        coefficients, frequencies = perform_cwt_fft(audio_data, sample_rate, scales, wavelet,
+                                                    dtype=np.float32, power_only=True)
+    elif engine == 'pywt':
+        print(f"\nPerforming CWT transformation with wavelet '{wavelet}'...")
+        coefficients, frequencies = perform_cwt_pywt(audio_data, sample_rate, scales, wavelet)
+    else:
+        raise ValueError(f"Unsupported CWT engine: {engine}. Use 'fft' or 'pywt'")
+    return coefficients, frequencies, np.empty(0)
+
+
+@traced()
 def analyze_audio_with_cwt_pywt(audio_data, sample_rate, scales=None, wavelet='morl',
                                  max_len=5000, save_path=None, vmin=-80,
                                  filter_cutoff_freq=None, filter_order=5,
-                                 scale_min=1, scale_max=128, scale_count=256):
+                                 scale_min=1, scale_max=128, scale_count=256, engine='fft',
+                                 n_columns=None, pooling='mean', render='matplotlib', n_jobs=1,
+                                 use_cache=True, decimated=False):
     """
     对音频进行完整的CWT分析并可视化
     
@@ -50,21 +248,43 @@ def analyze_audio_with_cwt_pywt(audio_data, sample_rate, scales=None, wavelet='m
         scale_min (int): 最小尺度值，默认1
         scale_max (int): 最大尺度值，默认128
         scale_count (int): 尺度数量，默认256
+        engine (str): CWT计算引擎，'fft'（频域核组+批量逆FFT，float32，只计算功率）
+                      或'pywt'（pywt.cwt逐尺度卷积），默认'fft'
+        n_columns (int): 若指定，则使用分块CWT并把功率池化为n_columns个时间列（仅用于'fft'引擎），
+                         默认None表示每个采样点一列
+        pooling (str): 分块CWT的池化方式，'mean'或'max'，默认'mean'
+        render (str): 出图方式，'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG），默认'matplotlib'
+        n_jobs (int): 进程数，大于1（或-1表示全部CPU）时按时间分片并行计算分块CWT（仅用于'fft'引擎），默认1
+        use_cache (bool): 是否使用变换结果缓存（按信号内容与全部参数寻址，命中时跳过滤波与变换），默认True
+        decimated (bool): 信号是否经过抽取（自动生成尺度时去除高于奈奎斯特频率的尺度），默认False
     """
-    
-    # 在CWT之前应用低通滤波
-    if filter_cutoff_freq is not None:
-        print(f"\nApplying lowpass filter before CWT (cutoff: {filter_cutoff_freq} Hz)...")
-        audio_data = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
-    
+
     # 如果未提供尺度数组，则自动生成
     if scales is None:
-        scales = np.arange(scale_min, scale_max, (scale_max - scale_min) / scale_count)
-        print(f"\nGenerating scales: {scale_count} scales from {scale_min} to {scale_max}")
-    
-    # 执行CWT
-    print(f"\nPerforming CWT transformation with wavelet '{wavelet}'...")
-    coefficients, frequencies = perform_cwt_pywt(audio_data, sample_rate, scales, wavelet)
+        scales = generate_scales(sample_rate, wavelet, scale_min, scale_max, scale_count, decimated=decimated)
+
+    if engine not in ('fft', 'pywt'):
+        raise ValueError(f"Unsupported CWT engine: {engine}. Use 'fft' or 'pywt'")
+
+    def compute():
+        filtered = audio_data
+
+        # 在CWT之前应用低通滤波
+        if filter_cutoff_freq is not None:
+            print(f"\nApplying lowpass filter before CWT (cutoff: {filter_cutoff_freq} Hz)...")
+            filtered = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
+
+        return perform_cwt(filtered, sample_rate, scales, wavelet, engine=engine,
+                           n_columns=n_columns, pooling=pooling, n_jobs=n_jobs)
+
+    # 'fft'引擎缓存功率，'pywt'引擎缓存系数的幅度（绘图时平方）；
+    # 单进程与分片并行的分块CWT只差浮点舍入，共用同一缓存条目
+    coefficients, frequencies, _, _ = cached_transform(
+        compute, audio_data, sample_rate, f'cwt_{engine}', use_cache=use_cache,
+        scales=np.asarray(scales), wavelet=wavelet,
+        n_columns=n_columns if engine == 'fft' else None, pooling=pooling if engine == 'fft' and n_columns else None,
+        filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
+    )
     
     # 绘制CWT频谱图（scalogram）
     print("\nPlotting CWT scalogram...")
@@ -73,7 +293,8 @@ def analyze_audio_with_cwt_pywt(audio_data, sample_rate, scales=None, wavelet='m
         wavelet, scales, max_len,
         save_path=save_path, vmin=vmin,
         scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
-        filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
+        filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
+        is_power=(engine == 'fft'), render=render
     )
     
     print("\nDone. CWT scalogram generated successfully.")
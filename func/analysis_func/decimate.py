@@ -0,0 +1,140 @@
+import numpy as np
+from func.output_func.trace import traced
+
+
+def plan_decimation(sample_rate, max_height, filter_cutoff_freq=None, guard=2.5, max_stage_factor=10):
+    """
+    根据最大显示频率和低通滤波截止频率选择安全的抽取因子，并拆分为多级
+
+    原理：
+    - 需要保留的最高频率为max_height与filter_cutoff_freq中的较小者
+    - 抽取后的采样率至少为该频率的guard倍，使其落在抗混叠滤波器的平坦通带内
+    - 总抽取因子拆分为多级（每级不超过max_stage_factor），每级的多相FIR滤波器更短
+
+    参数:
+        sample_rate (int): 原始采样率
+        max_height (float): 最大显示频率 (Hz)
+        filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)，None表示不使用滤波
+        guard (float): 抽取后采样率与保留频率之比的下限，默认2.5
+        max_stage_factor (int): 单级抽取因子的上限，默认10
+
+    返回:
+        stages (list): 各级抽取因子，空列表表示无需抽取
+    """
+    f_keep = max_height
+    if filter_cutoff_freq is not None and 0 < filter_cutoff_freq < f_keep:
+        f_keep = filter_cutoff_freq
+
+    if f_keep is None or f_keep <= 0:
+        return []
+
+    remaining = int(sample_rate // (guard * f_keep))
+    stages = []
+    while remaining >= 2:
+        factor = min(max_stage_factor, remaining)
+        stages.append(factor)
+        remaining //= factor
+
+    return stages
+
+
+def decimate_signal(audio_data, stages):
+    """
+    使用多相抗混叠FIR滤波器逐级抽取信号
+
+    参数:
+        audio_data (np.ndarray): 输入信号（沿最后一个轴抽取）
+        stages (list): 各级抽取因子
+
+    返回:
+        decimated_data (np.ndarray): 抽取后的信号
+    """
+    from scipy import signal
+    for factor in stages:
+        audio_data = signal.resample_poly(audio_data, 1, factor, axis=-1)
+    return audio_data
+
+
+def decimated_params(sample_rate, factor, n_fft, hop_length, win_length, filter_cutoff_freq=None,
+                     scale_min=1, scale_max=128):
+    """
+    按总抽取因子换算依赖采样率的变换参数（说明见decimate_for_analysis）
+
+    返回:
+        params (dict): 抽取后的sample_rate、n_fft、hop_length、win_length、
+                       filter_cutoff_freq、scale_min、scale_max，以及总抽取因子factor
+    """
+    params = {
+        'factor': factor,
+        'sample_rate': sample_rate,
+        'n_fft': n_fft,
+        'hop_length': hop_length,
+        'win_length': win_length,
+        'filter_cutoff_freq': filter_cutoff_freq,
+        'scale_min': scale_min,
+        'scale_max': scale_max
+    }
+    if factor == 1:
+        return params
+
+    new_rate = sample_rate / factor
+    if new_rate == int(new_rate):
+        new_rate = int(new_rate)
+
+    params.update({
+        'sample_rate': new_rate,
+        'n_fft': max(n_fft // factor, 16),
+        'hop_length': max(hop_length // factor, 1),
+        'win_length': max(win_length // factor, 16),
+        'scale_min': scale_min / factor,
+        'scale_max': scale_max / factor
+    })
+    params['win_length'] = min(params['win_length'], params['n_fft'])
+
+    if filter_cutoff_freq is not None and filter_cutoff_freq >= new_rate / 2:
+        params['filter_cutoff_freq'] = None
+    return params
+
+
+@traced()
+def decimate_for_analysis(audio_data, sample_rate, max_height, n_fft, hop_length, win_length,
+                          filter_cutoff_freq=None, scale_min=1, scale_max=128):
+    """
+    在STFT/CWT之前抽取信号，并同步调整依赖采样率的变换参数
+
+    - n_fft、hop_length、win_length按抽取因子缩小，保持频率分辨率和时间步长不变
+    - CWT尺度按抽取因子缩小，保持各尺度对应的频率不变
+    - 低通截止频率不低于抽取后奈奎斯特频率时不再需要单独滤波（抗混叠滤波器已限带）
+
+    参数:
+        audio_data (np.ndarray): 输入信号
+        sample_rate (int): 原始采样率
+        max_height (float): 最大显示频率 (Hz)
+        n_fft (int): FFT窗口大小
+        hop_length (int): 帧移大小
+        win_length (int): 窗口长度
+        filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)
+        scale_min (float): 最小尺度值
+        scale_max (float): 最大尺度值
+
+    返回:
+        audio_data (np.ndarray): 抽取后的信号
+        params (dict): 调整后的sample_rate、n_fft、hop_length、win_length、
+                       filter_cutoff_freq、scale_min、scale_max，以及总抽取因子factor
+    """
+    stages = plan_decimation(sample_rate, max_height, filter_cutoff_freq)
+    factor = int(np.prod(stages)) if stages else 1
+
+    params = decimated_params(sample_rate, factor, n_fft, hop_length, win_length,
+                              filter_cutoff_freq, scale_min, scale_max)
+    if factor == 1:
+        print("No decimation applied (sample rate already close to the band of interest)")
+        return audio_data, params
+
+    audio_data = decimate_signal(audio_data, stages)
+
+    stage_text = ' x '.join(str(q) for q in stages)
+    print(f"Decimated by {factor} ({stage_text}): {sample_rate} Hz -> {params['sample_rate']} Hz, {audio_data.shape[-1]} samples")
+    print(f"  n_fft={params['n_fft']}, hop_length={params['hop_length']}, win_length={params['win_length']}")
+
+    return audio_data, params
@@ -1,31 +1,235 @@
+from functools import lru_cache
 import numpy as np
-from scipy.signal import hilbert
+from scipy import fft as sp_fft
+from func.input_func.stream import iter_array_blocks
+from func.output_func.trace import traced
 
 
-def demodulate_hilbert(signal):
+def analytic(x, n=None):
+    """
+    沿最后一个轴计算解析信号（与scipy.signal.hilbert相同），频域加权在原地完成，
+    float32输入全程为complex64（不依赖scipy版本对精度的处理）
+
+    参数:
+        x (np.ndarray): 实数信号
+        n (int): FFT长度，默认为信号长度
+
+    返回:
+        analytic_signal (np.ndarray): 解析信号，长度为n
+    """
+    n = x.shape[-1] if n is None else n
+    spectrum = sp_fft.fft(x, n, axis=-1)
+    h = np.zeros(n, dtype=x.dtype)
+    h[0] = 1
+    if n % 2 == 0:
+        h[n // 2] = 1
+        h[1:n // 2] = 2
+    else:
+        h[1:(n + 1) // 2] = 2
+    spectrum *= h
+    return sp_fft.ifft(spectrum, axis=-1, overwrite_x=True)
+
+
+@traced()
+def demodulate_hilbert(signal, method='fft', fast_len=False, **stream_kwargs):
     """
     使用希尔伯特变换法进行信号解调
-    
+
     原理：
     - 使用希尔伯特变换计算信号的解析信号
     - 提取包络作为解调结果
     - 移除直流分量
-    
+
     参数:
-        signal (np.ndarray): 输入的调制信号
-        
+        signal (np.ndarray): 输入的调制信号，可以是(通道数, 采样点数)的多通道数组（沿最后一个轴解调）
+        method (str): 'fft'（整段FFT希尔伯特变换，减去全局均值）或
+                      'fir'（分块FIR希尔伯特滤波器，减去滑动均值，内存为O(块大小)），默认'fft'
+        fast_len (bool): method='fft'时是否补零到快速FFT长度再截断（质数等长度下FFT快得多）。
+                         补零后不再是周期延拓的希尔伯特变换，包络在信号两端与scipy.signal.hilbert
+                         有明显差异、中间部分也有微小差异，默认False（与scipy.signal.hilbert一致）
+        stream_kwargs: method='fir'时传给demodulate_hilbert_stream的参数
+
     返回:
-        demodulated_signal (np.ndarray): 解调后的信号
+        demodulated_signal (np.ndarray): 解调后的信号，类型与输入相同（整数输入为float64）
     """
-    # 使用希尔伯特变换计算解析信号
-    analytic_signal = hilbert(signal)
-    
+    dtype = signal.dtype if np.issubdtype(signal.dtype, np.floating) else np.float64
+
+    if method == 'fir':
+        # 分块流水线内部以float64计算（块大小的临时数组），每块输出转换为输入类型后再拼接
+        channels = signal.reshape(-1, signal.shape[-1]) if signal.ndim > 1 else [signal]
+        demodulated_signal = np.stack([
+            np.concatenate([block.astype(dtype, copy=False)
+                            for block in demodulate_hilbert_stream(iter_array_blocks(x), **stream_kwargs)])
+            for x in channels
+        ])
+        demodulated_signal = demodulated_signal.reshape(signal.shape[:-1] + demodulated_signal.shape[-1:])
+        print("Demodulation complete.")
+        return demodulated_signal
+    elif method != 'fft':
+        raise ValueError(f"Unsupported demodulation method: {method}. Use 'fft' or 'fir'")
+
+    # 使用希尔伯特变换计算解析信号（fast_len时补零到快速FFT长度后截断，结果与原长度变换不同）
+    n_points = signal.shape[-1]
+    n_fft = sp_fft.next_fast_len(n_points) if fast_len else n_points
+    analytic_signal = analytic(signal.astype(dtype, copy=False), n_fft)[..., :n_points]
+
     # 提取包络
     envelope = np.abs(analytic_signal)
-    
+    del analytic_signal
+
     # 移除直流分量
-    demodulated_signal = envelope - np.mean(envelope)
-    
+    demodulated_signal = envelope - np.mean(envelope, axis=-1, keepdims=True)
+
     print("Demodulation complete.")
-    
+
     return demodulated_signal
+
+
+@lru_cache(maxsize=8)
+def design_hilbert_fir(numtaps=511, beta=8.0):
+    """
+    设计奇数长度（III型）的FIR希尔伯特变换器：理想冲激响应2/(pi*k)（k为奇数）乘以Kaiser窗
+
+    参数:
+        numtaps (int): 滤波器长度（奇数）
+        beta (float): Kaiser窗参数
+
+    返回:
+        h (np.ndarray): 滤波器系数，群延迟为(numtaps - 1) // 2
+    """
+    if numtaps % 2 == 0:
+        raise ValueError("numtaps must be odd for a type III Hilbert FIR")
+    k = np.arange(numtaps) - (numtaps - 1) // 2
+    h = np.zeros(numtaps)
+    odd = k % 2 != 0
+    h[odd] = 2.0 / (np.pi * k[odd])
+    h *= np.kaiser(numtaps, beta)
+    h.setflags(write=False)
+    return h
+
+
+@lru_cache(maxsize=8)
+def design_decimation_fir(factor, taps_per_phase=20):
+    """
+    设计抽取因子为factor的抗混叠低通FIR（截止于抽取后奈奎斯特频率的0.8倍）
+    """
+    from scipy import signal as sp_signal
+    h = sp_signal.firwin(taps_per_phase * factor + 1, 0.8 / factor)
+    h.setflags(write=False)
+    return h
+
+
+def decimate_stream(blocks, factor):
+    """
+    分块多相FIR抽取：每块只计算保留的输出点（块间保留len(h)-1个样本），
+    抗混叠滤波器中心对准输出样本，输出与输入时间对齐；输入结束后补零输出最后半个滤波器长度内的样本
+
+    参数:
+        blocks (iterable): 逐块产生一维时域信号的迭代器
+        factor (int): 抽取因子
+
+    返回:
+        generator: 逐块产生抽取后的信号
+    """
+    h_dec = design_decimation_fir(factor)
+    h_dec_rev = h_dec[::-1]
+    history = np.zeros(len(h_dec) - 1)
+    # 第一个输出窗口的中心对准第0个样本
+    phase = (len(h_dec) - 1) // 2
+
+    def _decimate(x):
+        nonlocal history, phase
+        extended = np.concatenate((history, x))
+        windows = np.lib.stride_tricks.sliding_window_view(extended, len(h_dec))
+        output = windows[phase::factor] @ h_dec_rev
+        n_windows = len(windows)
+        phase = phase + factor * int(np.ceil(max(n_windows - phase, 0) / factor)) - n_windows
+        history = extended[len(extended) - (len(h_dec) - 1):]
+        return output
+
+    for block in blocks:
+        output = _decimate(np.asarray(block, dtype=np.float64))
+        if len(output):
+            yield output
+
+    # 补零输出最后半个抗混叠滤波器长度内的样本
+    tail = _decimate(np.zeros((len(h_dec) - 1) // 2))
+    if len(tail):
+        yield tail
+
+
+def _fir_stream(blocks, h, delay):
+    """
+    分块FIR滤波（overlap-save，块间保留len(h)-1个样本），并补偿delay个样本的群延迟，
+    产生(原始块, 滤波后块)对，两者长度相同且时间对齐
+    """
+    from scipy import signal as sp_signal
+    history = np.zeros(len(h) - 1)
+    raw_pending = np.zeros(0)
+    skipped = 0
+
+    def _process(block):
+        nonlocal history, raw_pending, skipped
+        extended = np.concatenate((history, block))
+        filtered = sp_signal.oaconvolve(extended, h, mode='valid')
+        history = extended[len(extended) - (len(h) - 1):]
+        # 丢弃开头delay个输出，使滤波结果与输入对齐
+        if skipped < delay:
+            drop = min(delay - skipped, len(filtered))
+            filtered = filtered[drop:]
+            skipped += drop
+        raw_pending = np.concatenate((raw_pending, block))
+        raw = raw_pending[:len(filtered)]
+        raw_pending = raw_pending[len(filtered):]
+        return raw, filtered
+
+    for block in blocks:
+        raw, filtered = _process(np.asarray(block, dtype=np.float64))
+        if len(filtered):
+            yield raw, filtered
+
+    # 输入结束后补delay个零，输出最后delay个对齐样本
+    raw, filtered = _process(np.zeros(delay))
+    if len(filtered):
+        yield raw[:len(filtered)], filtered
+
+
+def demodulate_hilbert_stream(blocks, numtaps=511, dc_window=1 << 16, decimation=1):
+    """
+    分块希尔伯特包络解调：FIR希尔伯特滤波器 + 滑动直流去除，可与后续抽取融合
+
+    原理：
+    - 解析信号的虚部由FIR希尔伯特变换器（overlap-save分块卷积）得到，实部为延迟对齐的原信号
+    - 包络 = sqrt(实部^2 + 虚部^2)
+    - 直流分量用时间常数为dc_window个样本的指数滑动平均估计并减去
+    - decimation > 1时，包络直接经多相抗混叠FIR只计算保留的输出点
+    内存占用为O(块大小)，不需要整段FFT。输出与输入时间对齐（已补偿滤波器群延迟）。
+
+    参数:
+        blocks (iterable): 逐块产生一维时域信号的迭代器
+        numtaps (int): 希尔伯特FIR长度（奇数），越长低频端带宽越宽，默认511
+        dc_window (int): 直流估计的时间常数（样本数），默认65536
+        decimation (int): 融合的抽取因子，默认1（不抽取）
+
+    返回:
+        generator: 逐块产生解调（及抽取）后的信号
+    """
+    from scipy import signal as sp_signal
+    h = design_hilbert_fir(numtaps)
+    alpha = 1.0 / dc_window
+
+    def _envelope():
+        dc_zi = None
+        for raw, imag in _fir_stream(blocks, h, (numtaps - 1) // 2):
+            envelope = np.hypot(raw, imag)
+
+            # 指数滑动平均估计直流分量，状态在块间传递（初值取第一块的均值，缩短收敛时间）
+            if dc_zi is None:
+                dc_zi = np.array([(1 - alpha) * np.mean(envelope)])
+            dc, dc_zi = sp_signal.lfilter([alpha], [1, -(1 - alpha)], envelope, zi=dc_zi)
+            yield envelope - dc
+
+    if decimation > 1:
+        yield from decimate_stream(_envelope(), decimation)
+    else:
+        yield from _envelope()
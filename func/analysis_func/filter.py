@@ -1,46 +1,188 @@
+from functools import lru_cache
 import numpy as np
-from scipy import signal
+from func.output_func.trace import traced
 
 
-def lowpass_filter(audio_data, sample_rate, cutoff_freq, order=5, filter_type='butter'):
+@lru_cache(maxsize=32)
+def design_lowpass_sos(sample_rate, cutoff_freq, order=5, filter_type='butter'):
     """
-    对音频数据应用低通滤波器
-    
+    设计二阶节(SOS)形式的低通滤波器（按类型、阶数、截止频率、采样率缓存）
+
+    SOS形式在截止频率远低于奈奎斯特频率、阶数较高时数值上比(b, a)形式稳定得多。
+
     参数:
-        audio_data (np.ndarray): 输入音频数据
         sample_rate (int): 采样率
         cutoff_freq (float): 截止频率 (Hz)
         order (int): 滤波器阶数，默认为5
         filter_type (str): 滤波器类型，'butter' (Butterworth) 或 'cheby1' (Chebyshev I)
-        
+
     返回:
-        filtered_data (np.ndarray): 滤波后的音频数据
+        sos (np.ndarray): 二阶节系数，shape为(n_sections, 6)（缓存共享，调用方不要原地修改；
+                          scipy的sosfilt要求可写缓冲区，因此不设为只读）
+    """
+    from scipy import signal
+    if filter_type == 'butter':
+        sos = signal.butter(order, cutoff_freq, btype='low', analog=False, output='sos', fs=sample_rate)
+    elif filter_type == 'cheby1':
+        sos = signal.cheby1(order, 0.5, cutoff_freq, btype='low', analog=False, output='sos', fs=sample_rate)
+    else:
+        raise ValueError(f"Unsupported filter type: {filter_type}. Use 'butter' or 'cheby1'")
+
+    return sos
+
+
+def _check_cutoff(sample_rate, cutoff_freq):
+    """
+    检查截止频率是否有效，无效时打印原因并返回False
     """
     if cutoff_freq is None or cutoff_freq <= 0:
         print("No lowpass filter applied (cutoff frequency not set)")
-        return audio_data
-    
-    # 检查截止频率是否有效
+        return False
+
     nyquist_freq = sample_rate / 2
     if cutoff_freq >= nyquist_freq:
         print(f"Warning: Cutoff frequency ({cutoff_freq} Hz) exceeds Nyquist frequency ({nyquist_freq} Hz)")
         print("No lowpass filter applied")
+        return False
+
+    return True
+
+
+DEFAULT_FILTER_BLOCK = 1 << 20  # 低精度输入分块滤波时每块的采样点数
+
+
+def _sosfilt_blocks(sos, segments, out, zi, reverse=False):
+    """
+    依次对各数据段(通道数, n)做sosfilt，滤波器状态以float64在段间传递，结果写入out的对应位置
+
+    参数:
+        segments (iterable): (起始位置, 数据段)，reverse=True时数据段按时间倒序处理并按原顺序写回
+        out (np.ndarray): 输出数组，shape为(通道数, 总长度)
+        zi (np.ndarray): 初始状态，shape为(n_sections, 通道数, 2)
+
+    返回:
+        zi (np.ndarray): 最终状态
+    """
+    from scipy import signal
+    for start, segment in segments:
+        segment = np.asarray(segment, dtype=np.float64)
+        if reverse:
+            segment = segment[:, ::-1]
+        filtered, zi = signal.sosfilt(sos, segment, axis=-1, zi=zi)
+        out[:, start:start + segment.shape[-1]] = filtered[:, ::-1] if reverse else filtered
+    return zi
+
+
+def _blocks(x, offset, block_size):
+    for start in range(0, x.shape[-1], block_size):
+        yield offset + start, x[:, start:start + block_size]
+
+
+def _sosfiltfilt_lowmem(sos, x, block_size=DEFAULT_FILTER_BLOCK):
+    """
+    与signal.sosfiltfilt(sos, x, axis=-1)相同的零相位滤波（奇对称延拓、稳态初值），但分块计算：
+    系数与滤波器状态保持float64，输出直接写入与x同类型的数组，不产生整段float64副本
+
+    x为float64以外的类型（例如float32）时使用；两个方向之间的中间结果按x的类型存储。
+    """
+    from scipy import signal
+    x2 = x.reshape(-1, x.shape[-1])
+    n_channels, n_points = x2.shape
+    edge = 3 * (2 * len(sos) + 1 - min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum()))
+    if n_points <= edge:
+        return signal.sosfiltfilt(sos, x, axis=-1).astype(x.dtype)
+
+    # 两端奇对称延拓（与sosfiltfilt的padtype='odd'一致）
+    left = 2 * x2[:, :1].astype(np.float64) - x2[:, edge:0:-1]
+    right = 2 * x2[:, -1:].astype(np.float64) - x2[:, -2:-edge - 2:-1]
+    zi0 = signal.sosfilt_zi(sos)[:, None, :]
+
+    y = np.empty((n_channels, n_points + 2 * edge), dtype=x.dtype)
+    forward = [(0, left), *_blocks(x2, edge, block_size), (edge + n_points, right)]
+    _sosfilt_blocks(sos, forward, y, zi0 * left[None, :, :1])
+
+    backward = [(start, y[:, start:start + block_size])
+                for start in reversed(range(0, y.shape[-1], block_size))]
+    _sosfilt_blocks(sos, backward, y, zi0 * y[None, :, -1:].astype(np.float64), reverse=True)
+
+    return y[:, edge:edge + n_points].reshape(x.shape)
+
+
+@traced()
+def lowpass_filter(audio_data, sample_rate, cutoff_freq, order=5, filter_type='butter', zero_phase=True):
+    """
+    对音频数据应用低通滤波器
+
+    参数:
+        audio_data (np.ndarray): 输入音频数据（沿最后一个轴滤波）
+        sample_rate (int): 采样率
+        cutoff_freq (float): 截止频率 (Hz)
+        order (int): 滤波器阶数，默认为5
+        filter_type (str): 滤波器类型，'butter' (Butterworth) 或 'cheby1' (Chebyshev I)
+        zero_phase (bool): True使用前后向零相位滤波(sosfiltfilt)，False使用单向因果滤波(sosfilt)，默认True
+
+    返回:
+        filtered_data (np.ndarray): 滤波后的音频数据，类型与输入相同（float32输入得到float32输出）
+    """
+    from scipy import signal
+    if not _check_cutoff(sample_rate, cutoff_freq):
         return audio_data
-    
-    # 归一化截止频率
-    normalized_cutoff = cutoff_freq / nyquist_freq
-    
-    # 设计滤波器
-    if filter_type == 'butter':
-        b, a = signal.butter(order, normalized_cutoff, btype='low', analog=False)
-    elif filter_type == 'cheby1':
-        b, a = signal.cheby1(order, 0.5, normalized_cutoff, btype='low', analog=False)
+
+    # 设计滤波器（SOS形式，结果缓存）
+    sos = design_lowpass_sos(sample_rate, cutoff_freq, order, filter_type)
+
+    # 应用滤波器；scipy会把float32输入提升为float64计算并返回float64，
+    # 因此低精度输入分块滤波（系数与状态仍为float64，截止频率远低于采样率时float32系数误差较大）
+    if audio_data.dtype == np.float64 or not np.issubdtype(audio_data.dtype, np.floating):
+        if zero_phase:
+            filtered_data = signal.sosfiltfilt(sos, audio_data, axis=-1)
+        else:
+            filtered_data = signal.sosfilt(sos, audio_data, axis=-1)
+    elif zero_phase:
+        filtered_data = _sosfiltfilt_lowmem(sos, audio_data)
     else:
-        raise ValueError(f"Unsupported filter type: {filter_type}. Use 'butter' or 'cheby1'")
-    
-    # 应用滤波器
-    filtered_data = signal.filtfilt(b, a, audio_data)
-    
+        x2 = audio_data.reshape(-1, audio_data.shape[-1])
+        filtered_data = np.empty_like(x2)
+        _sosfilt_blocks(sos, _blocks(x2, 0, DEFAULT_FILTER_BLOCK), filtered_data,
+                        np.zeros((len(sos), len(x2), 2)))
+        filtered_data = filtered_data.reshape(audio_data.shape)
+
     print(f"Applied {filter_type} lowpass filter: cutoff={cutoff_freq} Hz, order={order}")
-    
+
     return filtered_data
+
+
+def lowpass_filter_stream(blocks, sample_rate, cutoff_freq, order=5, filter_type='butter'):
+    """
+    对数据块迭代器逐块应用因果低通滤波器，滤波器状态zi在块间传递
+
+    结果与对整段信号调用sosfilt（初始状态为首个样本的稳态响应）一致，
+    内存占用为O(块大小)，可放在分块处理流水线中。
+
+    参数:
+        blocks (iterable): 逐块产生一维时域信号的迭代器
+        sample_rate (int): 采样率
+        cutoff_freq (float): 截止频率 (Hz)
+        order (int): 滤波器阶数，默认为5
+        filter_type (str): 滤波器类型，'butter' (Butterworth) 或 'cheby1' (Chebyshev I)
+
+    返回:
+        generator: 逐块产生滤波后的信号
+    """
+    from scipy import signal
+    if not _check_cutoff(sample_rate, cutoff_freq):
+        yield from blocks
+        return
+
+    sos = design_lowpass_sos(sample_rate, cutoff_freq, order, filter_type)
+    zi = None
+
+    for block in blocks:
+        block = np.asarray(block)
+        if not len(block):
+            continue
+        if zi is None:
+            # 以首个样本的稳态响应作为初始状态，避免起始阶跃
+            zi = signal.sosfilt_zi(sos) * block[0]
+        filtered, zi = signal.sosfilt(sos, block, zi=zi)
+        yield filtered
@@ -0,0 +1,88 @@
+from functools import lru_cache
+import numpy as np
+import librosa
+from scipy import sparse
+from func.output_func.trace import traced
+
+
+@lru_cache(maxsize=16)
+def fit_mel_bands(sample_rate, n_fft, n_mels, fmax):
+    """
+    返回不超过n_mels、且每个Mel滤波器都至少覆盖一个FFT频点的最大频带数
+
+    抽取后FFT点数较小、fmax较低时，0~fmax之间只有约一百个频点，频带过多时低频滤波器之间没有频点，
+    librosa会给出空滤波器警告，Mel图中也会出现空白或重复的频带。减少频带数时打印一次提示（结果按参数缓存）。
+
+    参数:
+        sample_rate (int): 采样率
+        n_fft (int): FFT窗口大小
+        n_mels (int): 请求的Mel滤波器数量
+        fmax (float): 最高频率 (Hz)
+
+    返回:
+        n_mels (int): 实际使用的Mel滤波器数量
+    """
+    bins = np.arange(n_fft // 2 + 1) * sample_rate / n_fft
+    fitted = max(1, min(n_mels, int(np.count_nonzero((bins > 0) & (bins <= fmax)))))
+    while fitted > 1:
+        # 第i个三角滤波器覆盖(f[i], f[i+2])，其中至少要有一个频点
+        edges = librosa.mel_frequencies(fitted + 2, fmin=0.0, fmax=fmax)
+        if np.all(np.searchsorted(bins, edges[2:], side='left') > np.searchsorted(bins, edges[:-2], side='right')):
+            break
+        fitted -= 1
+    if fitted < n_mels:
+        print(f"n_mels={n_mels} exceeds the FFT bins below {fmax:g} Hz "
+              f"(sample rate {sample_rate:g} Hz, n_fft {n_fft}); using {fitted} Mel bands")
+    return fitted
+
+
+@lru_cache(maxsize=16)
+def mel_filterbank(sample_rate, n_fft, n_mels, fmax):
+    """
+    计算并缓存稀疏Mel滤波器组（与librosa.filters.mel相同，Slaney归一化），只保留0~fmax覆盖的FFT频点
+
+    参数:
+        sample_rate (int): 采样率
+        n_fft (int): FFT窗口大小
+        n_mels (int): Mel滤波器数量
+        fmax (float): 最高频率 (Hz)，Mel频带均匀分布在0~fmax之间
+
+    返回:
+        basis (scipy.sparse.csr_matrix): 稀疏滤波器组，shape为(n_mels, n_bins)，n_bins为用到的前若干个FFT频点；
+                                         各次调用共享同一对象，不要修改
+    """
+    dense = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels, fmin=0.0, fmax=fmax)
+
+    # fmax以上的FFT频点权重全为0，直接截掉，矩阵乘法时也就不需要这部分STFT行
+    used = np.flatnonzero(dense.any(axis=0))
+    n_bins = used[-1] + 1 if len(used) else 1
+    return sparse.csr_matrix(dense[:, :n_bins])
+
+
+@traced()
+def stft_to_mel(stft_result, sample_rate, n_fft, n_mels, fmax=None):
+    """
+    由已计算的STFT结果得到Mel功率谱（一次稀疏矩阵乘法，不重新计算STFT）
+
+    参数:
+        stft_result (np.ndarray): STFT结果（复数或幅度），shape为(n_fft // 2 + 1, n_frames)
+        sample_rate (int): 采样率
+        n_fft (int): FFT窗口大小
+        n_mels (int): Mel滤波器数量
+        fmax (float): 最高频率 (Hz)，默认None表示sample_rate / 2
+
+    返回:
+        mel_spectrogram (np.ndarray): Mel功率谱，shape为(n_mels, n_frames)；n_mels超过fmax以下的FFT频点能支持的
+                                      数量时按fit_mel_bands减少
+        mel_frequencies (np.ndarray): 各Mel频带对应的频率 (Hz)
+    """
+    fmax = float(min(fmax or sample_rate / 2, sample_rate / 2))
+    n_mels = fit_mel_bands(sample_rate, n_fft, n_mels, fmax)
+    basis = mel_filterbank(sample_rate, n_fft, n_mels, fmax)
+
+    # 只对滤波器组用到的频点求功率
+    power = np.abs(stft_result[:basis.shape[1]]) ** 2
+    mel_spectrogram = basis @ power
+    mel_frequencies = librosa.mel_frequencies(n_mels, fmin=0.0, fmax=fmax)
+
+    return mel_spectrogram, mel_frequencies
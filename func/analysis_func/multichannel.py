@@ -0,0 +1,236 @@
+import numpy as np
+from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.registry import backend_entry, get_backend
+from func.analysis_func.mel import stft_to_mel
+from func.analysis_func.transform_cache import cached_transform
+from func.plot_func.pixel_reduce import crop_rows
+from func.plot_func.stft_spectrogram import stft_plot_spectrogram, plot_mel_spectrogram
+from func.plot_func.cwt_spectrogram import cwt_plot_scalogram
+from func.plot_func.cross_channel import plot_cross_channel
+from func.output_func.trace import traced
+
+
+CROSS_VIEWS = ('difference', 'coherence')  # 通道间对比图类型
+DIFFERENCE_RANGE_DB = 20  # dB差图的颜色范围 ±DIFFERENCE_RANGE_DB
+COHERENCE_FRAMES = 8  # 相干系数沿时间平滑的帧数
+
+
+@traced()
+def channel_difference_db(power_a, power_b):
+    """
+    两个通道功率之比的dB值（10*log10(P_a / P_b)），以两者最大功率的1e-12为下限避免log(0)
+    """
+    floor = max(np.max(power_a), np.max(power_b), 1e-30) * 1e-12
+    return 10 * np.log10(np.maximum(power_a, floor)) - 10 * np.log10(np.maximum(power_b, floor))
+
+
+@traced()
+def channel_coherence(spec_a, spec_b, n_frames=COHERENCE_FRAMES):
+    """
+    计算两个通道STFT的幅度平方相干系数 |<S_a S_b*>|^2 / (<|S_a|^2> <|S_b|^2>)，<>为沿时间n_frames帧的滑动平均
+
+    参数:
+        spec_a (np.ndarray): 通道A的STFT复数结果，shape为(n_freqs, n_frames)
+        spec_b (np.ndarray): 通道B的STFT复数结果，shape相同
+        n_frames (int): 平滑帧数，默认COHERENCE_FRAMES
+
+    返回:
+        coherence (np.ndarray): 0~1之间的相干系数，shape与输入相同
+    """
+    from scipy.ndimage import uniform_filter1d
+
+    def _smooth(x):
+        return uniform_filter1d(x, n_frames, axis=-1, mode='nearest')
+
+    cross = spec_a * np.conj(spec_b)
+    s_ab = _smooth(cross.real) ** 2 + _smooth(cross.imag) ** 2
+    s_aa = _smooth(np.abs(spec_a) ** 2)
+    s_bb = _smooth(np.abs(spec_b) ** 2)
+    denominator = s_aa * s_bb
+    return np.where(denominator > 0, s_ab / np.maximum(denominator, np.finfo(denominator.dtype).tiny), 0.0)
+
+
+@traced()
+def transform_channels(audio_data, sample_rate, n_fft, hop_length, win_length, window, max_len,
+                       filter_cutoff_freq=None, filter_order=5, library='librosa', transform_method='stft',
+                       wavelet='morl', scales=None, cwt_engine='fft', cwt_columns=None, cwt_pooling='mean',
+                       n_jobs=1, use_cache=True):
+    """
+    流水线的滤波+变换阶段（analyze_channels与服务共用）：低通滤波后按transform_method和library变换，
+    结果经过变换结果缓存（缓存名称与参数同单通道后端，同一信号与参数在各入口之间共用缓存条目）
+
+    滤波和librosa/scipy STFT沿最后一个轴对所有通道一次计算；native STFT、Zoom FFT与CWT逐通道计算。
+
+    参数:
+        audio_data (np.ndarray): 时域信号，一维或shape为(通道数, 采样点数)
+        max_len (float): 最大显示频率（Zoom FFT只计算0~max_len）
+        scales (np.ndarray): CWT尺度（generate_scales的结果，仅用于CWT）
+        其余参数同analyze_channels
+
+    返回:
+        matrices (np.ndarray): 变换结果（STFT为幅度，use_cache=False时为复数；fft引擎CWT为功率），多通道时第一维为通道
+        frequencies (np.ndarray): 频率数组
+        times (np.ndarray): 时间数组
+        hit (bool): 是否命中变换结果缓存
+    """
+    backend_entry(transform_method, library)
+    n_channels = len(audio_data) if audio_data.ndim > 1 else 1
+
+    def compute():
+        # 只在缓存未命中时导入变换后端
+        transform = get_backend(transform_method, library, role='transform')
+        filtered = audio_data
+
+        # 在变换之前对所有通道一次应用低通滤波
+        if filter_cutoff_freq is not None:
+            print(f"\nApplying lowpass filter to {n_channels} channel(s) (cutoff: {filter_cutoff_freq} Hz)...")
+            filtered = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
+
+        if transform_method == 'cwt':
+            return transform(filtered, sample_rate, scales, wavelet, engine=cwt_engine,
+                               n_columns=cwt_columns, pooling=cwt_pooling, n_jobs=n_jobs)
+
+        print(f"\nPerforming batched STFT ({library}) over {n_channels} channel(s)...")
+        if library in ('librosa', 'native'):
+            return transform(filtered, sample_rate, n_fft, hop_length, win_length, window, n_jobs=n_jobs)
+        if library == 'scipy':
+            return transform(filtered, sample_rate, n_fft, hop_length, win_length, window)
+        if filtered.ndim == 1:
+            return transform(filtered, sample_rate, n_fft, hop_length, win_length, window, f_max=max_len)
+        results = [transform(x, sample_rate, n_fft, hop_length, win_length, window, f_max=max_len)
+                   for x in filtered]
+        return np.stack([r[0] for r in results]), results[0][1], results[0][2]
+
+    if transform_method == 'cwt':
+        name = f'cwt_{cwt_engine}'
+        params = dict(scales=np.asarray(scales), wavelet=wavelet,
+                      n_columns=cwt_columns if cwt_engine == 'fft' else None,
+                      pooling=cwt_pooling if cwt_engine == 'fft' and cwt_columns else None)
+    else:
+        name = f'stft_{library}'
+        params = dict(n_fft=n_fft, hop_length=hop_length, win_length=win_length, window=window)
+        if library == 'zoom':
+            params.update(f_min=0.0, f_max=max_len, n_bins=None)
+
+    return cached_transform(compute, audio_data, sample_rate, name, use_cache=use_cache,
+                            filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order, **params)
+
+
+@traced()
+def analyze_channels(audio_data, sample_rate, channels, save_path, n_fft, hop_length, win_length, window, n_mels,
+                     max_len, vmin=-80, filter_cutoff_freq=None, filter_order=5,
+                     library='librosa', transform_method='stft',
+                     wavelet='morl', scale_min=1, scale_max=128, scale_count=256,
+                     cwt_engine='fft', cwt_columns=None, cwt_pooling='mean', render='matplotlib', n_jobs=1,
+                     use_cache=True, plot_mel=True, cross_view=None, decimated=False):
+    """
+    对多通道信号(通道数, 采样点数)批量滤波与变换，输出各通道的频谱图和可选的通道间对比图
+
+    滤波和librosa/scipy STFT沿最后一个轴对所有通道一次计算；native STFT、Zoom FFT与CWT逐通道计算。
+    各通道图像保存为save_path加'_<通道名>'后缀，对比图（前两个通道）加'_<cross_view>'后缀。
+
+    参数:
+        audio_data (np.ndarray): 多通道时域信号，shape为(通道数, 采样点数)
+        sample_rate (int): 采样率
+        channels (tuple): 各行对应的通道名
+        save_path (str): 图像保存路径（各输出在此基础上加后缀）
+        cross_view (str): 通道间对比图，None、'difference'（功率dB差，STFT/CWT均可）
+                          或'coherence'（幅度平方相干，仅STFT，需要相位，因此不使用变换结果缓存），默认None
+        use_cache (bool): 是否使用变换结果缓存，默认True
+        decimated (bool): 信号是否经过抽取（CWT去除高于奈奎斯特频率的尺度），默认False
+        其余参数同analyze_signal
+
+    返回:
+        output_paths (list): 写出的图像路径
+    """
+    if cross_view not in (None,) + CROSS_VIEWS:
+        raise ValueError(f"Unsupported cross-channel view: {cross_view}. Use None, 'difference' or 'coherence'")
+    if cross_view == 'coherence' and transform_method == 'cwt':
+        raise ValueError("Coherence needs the complex STFT; use cross_view='difference' with CWT")
+    backend_entry(transform_method, library)
+
+    scales = None
+    if transform_method == 'cwt':
+        from func.analysis_func.cwt_pywavelets import generate_scales
+        scales = generate_scales(sample_rate, wavelet, scale_min, scale_max, scale_count, decimated=decimated)
+
+    # 相干图需要复数STFT，缓存只保存幅度
+    matrices, frequencies, _, _ = transform_channels(
+        audio_data, sample_rate, n_fft, hop_length, win_length, window, max_len,
+        filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order, library=library,
+        transform_method=transform_method, wavelet=wavelet, scales=scales, cwt_engine=cwt_engine,
+        cwt_columns=cwt_columns, cwt_pooling=cwt_pooling, n_jobs=n_jobs,
+        use_cache=use_cache and cross_view != 'coherence'
+    )
+
+    output_paths = []
+    is_power = transform_method == 'cwt' and cwt_engine == 'fft'
+
+    for i, channel in enumerate(channels):
+        channel_path = save_path.replace('.png', f'_{channel}.png') if save_path else None
+        print(f"\nPlotting {channel}...")
+
+        if transform_method == 'cwt':
+            cwt_plot_scalogram(
+                matrices[i], frequencies, audio_data[i], sample_rate,
+                wavelet, scales, max_len,
+                save_path=channel_path, vmin=vmin,
+                scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
+                filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
+                is_power=is_power, render=render
+            )
+        else:
+            stft_plot_spectrogram(matrices[i], sample_rate, hop_length, win_length, window, n_fft, max_len,
+                                  save_path=channel_path, vmin=vmin,
+                                  frequencies=frequencies if library == 'zoom' else None, render=render)
+
+            # Mel频谱图复用同一STFT结果
+            if plot_mel and library == 'librosa':
+                mel_spectrogram, mel_frequencies = stft_to_mel(matrices[i], sample_rate, n_fft, n_mels, fmax=max_len)
+                mel_path = channel_path.replace('.png', '_mel.png') if channel_path else None
+                plot_mel_spectrogram(mel_spectrogram, mel_frequencies, sample_rate, n_fft, hop_length, win_length,
+                                     window, len(mel_frequencies), max_len, save_path=mel_path, vmin=vmin, render=render)
+                output_paths.append(mel_path)
+
+        output_paths.append(channel_path)
+
+    if cross_view and len(channels) >= 2:
+        # 只对显示频带内的行计算对比值
+        rows = crop_rows(np.asarray(frequencies), max_len)
+        spec_a, spec_b = matrices[0][rows], matrices[1][rows]
+        cross_frequencies = np.asarray(frequencies)[rows]
+
+        n_columns = spec_a.shape[-1]
+        if transform_method == 'cwt':
+            times = np.linspace(0, audio_data.shape[-1] / sample_rate, n_columns)
+        else:
+            times = np.arange(n_columns) * hop_length / sample_rate
+
+        pair = f'{channels[0]} vs {channels[1]}'
+        if cross_view == 'difference':
+            print(f"\nComputing power difference ({pair})...")
+            power_a = spec_a if is_power else np.abs(spec_a) ** 2
+            power_b = spec_b if is_power else np.abs(spec_b) ** 2
+            values = channel_difference_db(power_a, power_b)
+            view = dict(title=f'{channels[0]} - {channels[1]} 差异图', vmin=-DIFFERENCE_RANGE_DB,
+                        vmax=DIFFERENCE_RANGE_DB, cmap='RdBu_r', colorbar_format='%+2.0f dB')
+        else:
+            print(f"\nComputing magnitude-squared coherence ({pair}, {COHERENCE_FRAMES} frames)...")
+            values = channel_coherence(spec_a, spec_b)
+            view = dict(title=f'{channels[0]} / {channels[1]} 相干图', vmin=0, vmax=1, cmap='jet',
+                        colorbar_format='%.1f')
+
+        cross_path = save_path.replace('.png', f'_{cross_view}.png') if save_path else None
+        param_text = f'Channels = {pair}  |  Sample Rate = {sample_rate} Hz'
+        if transform_method == 'stft':
+            param_text += f'  |  FFT Size = {n_fft}  |  Hop Length = {hop_length}  |  Window = {window}'
+        else:
+            param_text += f'  |  Wavelet = {wavelet}  |  Scales = {scale_count} ({scale_min}-{scale_max})'
+
+        plot_cross_channel(values, cross_frequencies, times, max_len, save_path=cross_path,
+                           param_text=param_text, render=render, **view)
+        output_paths.append(cross_path)
+
+    print(f"\nDone. {len(channels)}-channel analysis generated successfully.")
+
+    return [path for path in output_paths if path]
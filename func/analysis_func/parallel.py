@@ -0,0 +1,203 @@
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import numpy as np
+
+
+def default_jobs(n_jobs=None):
+    """
+    解析并行进程数：None或-1表示使用全部CPU
+    """
+    if n_jobs is None or n_jobs < 0:
+        return os.cpu_count() or 1
+    return max(1, int(n_jobs))
+
+
+@contextmanager
+def shared_array(shape, dtype, source=None):
+    """
+    创建共享内存数组（退出时释放），可选地把source复制进去；已经是memmap的source直接共享其文件
+
+    参数:
+        shape (tuple): 数组形状
+        dtype: 数据类型
+        source (np.ndarray): 初始内容，默认None表示不初始化
+
+    返回:
+        (array, spec): 父进程中的数组视图，以及传给工作进程的描述（名称/文件、形状、类型），不需要序列化数组本身
+    """
+    dtype = np.dtype(dtype)
+
+    # 已经是磁盘上完整映射的memmap（例如CSV旁路缓存，不是切片视图）且类型一致时，工作进程直接映射同一文件
+    if isinstance(source, np.memmap) and isinstance(source.base, mmap.mmap) and source.dtype == dtype:
+        yield source, {'kind': 'memmap', 'path': source.filename, 'offset': source.offset,
+                       'shape': tuple(shape), 'dtype': dtype.str}
+        return
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    try:
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        if source is not None:
+            array[...] = source
+        yield array, {'kind': 'shm', 'name': shm.name, 'shape': tuple(shape), 'dtype': dtype.str}
+        del array
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@contextmanager
+def attach_array(spec):
+    """
+    在工作进程中按描述打开共享数组（共享内存或memmap）
+    """
+    if spec['kind'] == 'memmap':
+        yield np.memmap(spec['path'], dtype=spec['dtype'], mode='r', offset=spec['offset'], shape=spec['shape'])
+        return
+
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    try:
+        array = np.ndarray(spec['shape'], dtype=spec['dtype'], buffer=shm.buf)
+        yield array
+        del array
+    finally:
+        shm.close()
+
+
+def _segment(audio_data, start, stop):
+    """
+    取出[start, stop)的样本，超出信号范围的部分补零
+    """
+    segment = np.zeros(stop - start, dtype=audio_data.dtype)
+    lo, hi = max(start, 0), min(stop, len(audio_data))
+    if hi > lo:
+        segment[lo - start:hi - start] = audio_data[lo:hi]
+    return segment
+
+
+def _shard_bounds(n_items, n_shards):
+    """
+    把n_items个帧/列均分成n_shards段，返回各段的[起, 止)
+    """
+    edges = np.linspace(0, n_items, min(n_shards, n_items) + 1).astype(np.int64)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _stft_librosa_shard(audio_spec, out_spec, frame_start, frame_stop, n_fft, hop_length, win_length, window):
+    """
+    工作进程：计算第frame_start~frame_stop帧的librosa STFT，写入共享输出
+    """
+    import librosa
+
+    with attach_array(audio_spec) as audio_data, attach_array(out_spec) as out:
+        # 与librosa.stft(center=True)相同：第t帧以原信号的t*hop_length为中心，信号外补零
+        start = frame_start * hop_length - n_fft // 2
+        stop = (frame_stop - 1) * hop_length - n_fft // 2 + n_fft
+        segment = _segment(audio_data, start, stop)
+        out[:, frame_start:frame_stop] = librosa.stft(segment, n_fft=n_fft, hop_length=hop_length,
+                                                      win_length=win_length, window=window, center=False)
+
+
+def _cwt_blocked_shard(audio_spec, out_spec, col_start, col_stop, edges, sample_rate, scales, wavelet, pooling):
+    """
+    工作进程：计算第col_start~col_stop列的分块CWT功率，写入共享输出
+    """
+    from func.analysis_func.cwt_pywavelets import perform_cwt_blocked
+
+    with attach_array(audio_spec) as audio_data, attach_array(out_spec) as out:
+        power, _, _ = perform_cwt_blocked(audio_data, sample_rate, scales, wavelet, pooling=pooling,
+                                          edges=edges, span=(col_start, col_stop), workers=1)
+        out[:, col_start:col_stop] = power
+
+
+def _run_shards(worker, shards, n_jobs, audio_spec, out_spec, *params):
+    """
+    在spawn进程池中执行各分片worker(audio_spec, out_spec, 起, 止, *params)，任一分片出错时抛出异常
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(shards)), mp_context=context) as pool:
+        futures = [pool.submit(worker, audio_spec, out_spec, start, stop, *params) for start, stop in shards]
+        for future in futures:
+            future.result()
+
+
+def parallel_stft_librosa(audio_data, n_fft, hop_length, win_length, window='hann', n_jobs=None, shards_per_job=2):
+    """
+    按时间分片在多个进程中计算librosa STFT，结果与单进程librosa.stft(center=True)逐位相同
+
+    原理：
+    - 输入信号放入共享内存（已是memmap时直接共享文件），不序列化数组
+    - 每个分片负责一段连续的帧，取出这些帧覆盖的样本（两端各多n_fft//2，信号外补零），
+      用center=False计算，写入共享输出矩阵的对应列
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号
+        n_fft (int): FFT窗口大小
+        hop_length (int): 帧移大小
+        win_length (int): 窗口长度
+        window (str): 窗口函数类型，默认'hann'
+        n_jobs (int): 进程数，默认None表示使用全部CPU
+        shards_per_job (int): 每个进程分到的分片数，用于负载均衡，默认2
+
+    返回:
+        stft_result (np.ndarray): STFT复数结果，shape为(n_fft // 2 + 1, n_frames)
+    """
+    n_jobs = default_jobs(n_jobs)
+    n_frames = 1 + len(audio_data) // hop_length
+    out_dtype = np.result_type(audio_data.dtype, np.complex64)
+    shards = _shard_bounds(n_frames, n_jobs * shards_per_job)
+
+    with shared_array(audio_data.shape, audio_data.dtype, source=audio_data) as (_, audio_spec), \
+            shared_array((n_fft // 2 + 1, n_frames), out_dtype) as (out, out_spec):
+        _run_shards(_stft_librosa_shard, shards, n_jobs, audio_spec, out_spec, n_fft, hop_length, win_length, window)
+        stft_result = out.copy()
+
+    return stft_result
+
+
+def parallel_cwt_blocked(audio_data, sample_rate, scales, wavelet='morl', n_columns=4096, pooling='mean',
+                         n_jobs=None, shards_per_job=2, dtype=np.float32):
+    """
+    按时间分片在多个进程中计算分块CWT功率（perform_cwt_blocked），分片边界与输出列边界对齐
+
+    每个分片直接读取共享的完整信号，因此分片边界两侧的小波支撑区域与单进程计算相同；
+    与单进程结果只差分块FFT起点不同带来的浮点舍入误差。
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 采样率
+        scales (np.ndarray): 尺度数组
+        wavelet (str): 小波基函数，默认'morl'
+        n_columns (int): 输出的时间列数，默认4096，None表示每个采样点一列
+        pooling (str): 池化方式，'mean'或'max'，默认'mean'
+        n_jobs (int): 进程数，默认None表示使用全部CPU
+        shards_per_job (int): 每个进程分到的分片数，默认2
+        dtype: 计算精度，默认np.float32
+
+    返回:
+        power (np.ndarray): 功率矩阵，shape为(len(scales), n_columns)
+        frequencies (np.ndarray): 对应的频率数组
+        times (np.ndarray): 各输出列的中心时间 (s)
+    """
+    n_jobs = default_jobs(n_jobs)
+    n_points = len(audio_data)
+    n_columns = int(min(n_columns or n_points, n_points))
+    edges = np.linspace(0, n_points, n_columns + 1).astype(np.int64)
+    shards = _shard_bounds(n_columns, n_jobs * shards_per_job)
+    scales = np.asarray(scales)
+
+    # 信号按计算精度放入共享内存，各分片不再各自转换
+    with shared_array(audio_data.shape, dtype, source=audio_data) as (_, audio_spec), \
+            shared_array((len(scales), n_columns), dtype) as (out, out_spec):
+        _run_shards(_cwt_blocked_shard, shards, n_jobs, audio_spec, out_spec,
+                    edges, sample_rate, scales, wavelet, pooling)
+        power = out.copy()
+
+    import pywt
+    frequencies = pywt.scale2frequency(wavelet, scales) * sample_rate
+    times = (edges[:-1] + edges[1:]) / 2 / sample_rate
+
+    return power, frequencies, times
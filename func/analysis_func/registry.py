@@ -0,0 +1,81 @@
+import importlib
+
+# 变换后端登记表：(transform_method, library) → 模块与函数名。模块在第一次被选中时才导入，
+# 只运行一种变换时不会加载其他后端的依赖（librosa、pywt、scipy.signal等）。
+# CWT不区分library，键为('cwt', None)。
+# analyze: 变换+出图的入口（analyze_audio_with_*），transform: 只做变换的函数（perform_*），
+# options: analyze入口除公共参数外接受的参数，label: 进度信息中的名称
+BACKENDS = {
+    ('stft', 'librosa'): {
+        'module': 'func.analysis_func.stft_librosa',
+        'analyze': 'analyze_audio_with_stft_librosa',
+        'transform': 'perform_stft_librosa',
+        'options': ('n_mels', 'n_jobs', 'plot_mel'),
+        'label': 'librosa'
+    },
+    ('stft', 'scipy'): {
+        'module': 'func.analysis_func.stft_scipy',
+        'analyze': 'analyze_audio_with_stft_scipy',
+        'transform': 'perform_stft_scipy',
+        'options': (),
+        'label': 'scipy.signal.ShortTimeFFT'
+    },
+    ('stft', 'native'): {
+        'module': 'func.analysis_func.stft_native',
+        'analyze': 'analyze_audio_with_stft_native',
+        'transform': 'perform_stft_native',
+        'options': ('n_jobs',),
+        'label': 'native NumPy/scipy.fft STFT'
+    },
+    ('stft', 'zoom'): {
+        'module': 'func.analysis_func.stft_zoom',
+        'analyze': 'analyze_audio_with_stft_zoom',
+        'transform': 'perform_stft_zoom',
+        'options': (),
+        'label': 'band-limited Zoom FFT'
+    },
+    ('cwt', None): {
+        'module': 'func.analysis_func.cwt_pywavelets',
+        'analyze': 'analyze_audio_with_cwt_pywt',
+        'transform': 'perform_cwt',
+        'options': (),
+        'label': 'PyWavelets'
+    }
+}
+
+STFT_LIBRARIES = tuple(library for method, library in BACKENDS if method == 'stft')
+
+
+def backend_entry(transform_method, library=None):
+    """
+    查找变换后端的登记项（不导入模块）
+
+    参数:
+        transform_method (str): 'stft' 或 'cwt'
+        library (str): STFT实现，'librosa'、'scipy'、'native'或'zoom'；CWT时忽略
+
+    返回:
+        entry (dict): 登记项
+    """
+    key = (transform_method, library if transform_method == 'stft' else None)
+    if key not in BACKENDS:
+        if transform_method == 'stft':
+            raise ValueError(f"Unsupported STFT library: {library}. Use one of {', '.join(STFT_LIBRARIES)}")
+        raise ValueError(f"Unsupported transform method: {transform_method}. Use 'stft' or 'cwt'")
+    return BACKENDS[key]
+
+
+def get_backend(transform_method, library=None, role='analyze'):
+    """
+    按需导入并返回所选变换后端的函数
+
+    参数:
+        transform_method (str): 'stft' 或 'cwt'
+        library (str): STFT实现；CWT时忽略
+        role (str): 'analyze'（变换+出图）或 'transform'（只做变换），默认'analyze'
+
+    返回:
+        func (callable): 后端函数
+    """
+    entry = backend_entry(transform_method, library)
+    return getattr(importlib.import_module(entry['module']), entry[role])
@@ -0,0 +1,115 @@
+import threading
+import numpy as np
+from func.analysis_func.demodulate import demodulate_hilbert_stream, decimate_stream, design_decimation_fir
+from func.analysis_func.filter import lowpass_filter_stream
+from func.analysis_func.stft_stream import stream_stft
+
+
+class RollingSpectrogram:
+    """
+    固定大小的环形频谱缓冲区：最新的n_cols帧功率，写入与读取线程安全，内存不随运行时间增长
+
+    参数:
+        n_rows (int): 频率行数
+        n_cols (int): 保留的帧数（显示的时间跨度 = n_cols * 帧间隔）
+    """
+
+    def __init__(self, n_rows, n_cols):
+        self.power = np.zeros((n_rows, n_cols), dtype=np.float32)
+        self.n_cols = n_cols
+        self.head = 0  # 下一帧写入的列
+        self.total = 0  # 累计写入的帧数
+        self.arrivals = []  # 尚未显示的写入对应的数据到达时间
+        self._lock = threading.Lock()
+
+    def write(self, columns, arrival=None):
+        """
+        写入新帧（shape为(n_rows, 帧数)），超过n_cols的部分覆盖最旧的帧
+
+        参数:
+            columns (np.ndarray): 新帧的功率
+            arrival (float): 这些帧所依赖的最新数据块到达的时间（time.perf_counter），用于统计端到端延迟
+        """
+        written = columns.shape[1]
+        columns = columns[:, -self.n_cols:]
+        n = columns.shape[1]
+        with self._lock:
+            first = min(n, self.n_cols - self.head)
+            self.power[:, self.head:self.head + first] = columns[:, :first]
+            self.power[:, :n - first] = columns[:, first:]
+            self.head = (self.head + n) % self.n_cols
+            self.total += written
+            if arrival is not None:
+                self.arrivals.append(arrival)
+
+    def snapshot(self):
+        """
+        按时间顺序复制当前缓冲区，并取出上次读取以来写入的到达时间
+
+        返回:
+            power (np.ndarray): shape为(n_rows, n_cols)的功率，最后一列为最新帧
+            total (int): 累计写入的帧数
+            arrivals (list): 上次读取以来各次写入的数据到达时间
+        """
+        with self._lock:
+            power = np.concatenate((self.power[:, self.head:], self.power[:, :self.head]), axis=1)
+            arrivals, self.arrivals = self.arrivals, []
+            return power, self.total, arrivals
+
+
+def live_stft_frames(blocks, sample_rate, n_fft, hop_length, win_length, window='hann', demodulated=True,
+                     stages=(), filter_cutoff_freq=None, filter_order=5, max_height=None):
+    """
+    对实时到达的数据块增量执行 解调 → 抽取 → 因果低通滤波 → STFT，逐批产生新帧的功率
+
+    各级都在块间保存状态（FIR历史、滤波器zi、STFT重叠样本），每来一块只处理新样本，
+    处理量与内存只与块大小有关。与离线流水线不同，低通滤波为因果滤波（sosfilt，非零相位）。
+
+    参数:
+        blocks (iterable): 逐块产生一维时域信号的迭代器
+        sample_rate (int): 原始采样率
+        n_fft (int): FFT窗口大小（抽取后的采样率下）
+        hop_length (int): 帧移大小（抽取后的采样率下）
+        win_length (int): 窗口长度（抽取后的采样率下）
+        window (str): 窗口函数类型，默认'hann'
+        demodulated (bool): 是否进行希尔伯特包络解调（分块FIR），默认True
+        stages (tuple): 各级抽取因子（plan_decimation的结果），第一级与解调融合
+        filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)（抽取后的采样率下），None表示不滤波
+        filter_order (int): 滤波器阶数，默认5
+        max_height (float): 最大显示频率，只产生不超过它的频率行，默认None表示全部
+
+    返回:
+        generator: 逐批产生shape为(n_rows, n_frames)的float32功率矩阵
+    """
+    stages = list(stages)
+    rate = sample_rate / int(np.prod(stages)) if stages else sample_rate
+    if demodulated:
+        blocks = demodulate_hilbert_stream(blocks, decimation=stages[0] if stages else 1)
+        stages = stages[1:]
+    for factor in stages:
+        blocks = decimate_stream(blocks, factor)
+    if filter_cutoff_freq is not None:
+        blocks = lowpass_filter_stream(blocks, rate, filter_cutoff_freq, filter_order)
+
+    n_rows = n_fft // 2 + 1
+    if max_height is not None:
+        n_rows = min(n_rows, int(np.floor(max_height * n_fft / rate)) + 1)
+    for magnitude in stream_stft(blocks, n_fft, hop_length, win_length, window):
+        yield np.square(magnitude[:n_rows])
+
+
+def live_algorithmic_delay(sample_rate, n_fft, hop_length, demodulated=True, stages=(), numtaps=511):
+    """
+    实时流水线的算法延迟（s）：一个样本到达后，最多还要等多久的后续样本才能出现在显示的帧中
+
+    - 希尔伯特FIR需要(numtaps - 1) / 2个后续样本（原始采样率）
+    - 每级抽取FIR需要半个滤波器长度的后续样本（该级的输入采样率）
+    - 居中的STFT帧需要n_fft / 2个后续样本，帧按hop_length产生（抽取后的采样率）
+    因果低通滤波不需要后续样本，不计入（其群延迟表现为频谱的时间偏移）。
+    """
+    delay = (numtaps - 1) / 2 / sample_rate if demodulated else 0.0
+    rate = sample_rate
+    for factor in stages:
+        delay += (len(design_decimation_fir(factor)) - 1) / 2 / rate
+        rate /= factor
+    return delay + (n_fft // 2 + hop_length) / rate
@@ -1,46 +1,53 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import librosa
-import librosa.display
-from matplotlib import font_manager
 from func.plot_func.stft_spectrogram import stft_plot_spectrogram, plot_mel_spectrogram
 from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.parallel import parallel_stft_librosa
+from func.analysis_func.mel import stft_to_mel
+from func.analysis_func.transform_cache import cached_transform
+from func.output_func.trace import traced
 
 
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
-
-
-def perform_stft_librosa(audio_data, sample_rate, n_fft, hop_length, win_length, window='hann'):
+@traced()
+def perform_stft_librosa(audio_data, sample_rate, n_fft, hop_length, win_length, window='hann', n_jobs=1):
     """
     对音频数据执行STFT变换
     
     参数:
-        audio_data (np.ndarray): 音频时域信号
+        audio_data (np.ndarray): 音频时域信号，多通道时为(通道数, 采样点数)，沿最后一个轴一次计算
         sample_rate (int): 采样率
         n_fft (int): FFT窗口大小
         hop_length (int): 帧移大小
         win_length (int): 窗口长度
         window (str): 窗口函数类型，默认'hann'
+        n_jobs (int): 进程数，大于1（或-1表示全部CPU）时按时间分片并行计算，结果与单进程相同，默认1
         
     返回:
-        stft_result (np.ndarray): STFT复数结果
+        stft_result (np.ndarray): STFT复数结果，多通道时shape为(通道数, 频点数, 帧数)
         frequencies (np.ndarray): 频率数组
         times (np.ndarray): 时间数组
     """
-    # 使用librosa原生STFT函数
-    stft_result = librosa.stft(audio_data, n_fft=n_fft, hop_length=hop_length, win_length=win_length, window=window)
+    # 使用librosa原生STFT函数（可按时间分片多进程并行）
+    if n_jobs == 1:
+        stft_result = librosa.stft(audio_data, n_fft=n_fft, hop_length=hop_length, win_length=win_length, window=window)
+    elif audio_data.ndim == 1:
+        stft_result = parallel_stft_librosa(audio_data, n_fft, hop_length, win_length, window, n_jobs=n_jobs)
+    else:
+        stft_result = np.stack([parallel_stft_librosa(x, n_fft, hop_length, win_length, window, n_jobs=n_jobs)
+                                for x in audio_data])
     
     # 计算频率和时间轴
     frequencies = librosa.fft_frequencies(sr=sample_rate, n_fft=n_fft)
-    times = librosa.frames_to_time(np.arange(stft_result.shape[1]), sr=sample_rate, hop_length=hop_length)
+    times = librosa.frames_to_time(np.arange(stft_result.shape[-1]), sr=sample_rate, hop_length=hop_length)
     
     return stft_result, frequencies, times
 
 
+@traced()
 def analyze_audio_with_stft_librosa(audio_data, sample_rate, n_fft, hop_length, win_length, n_mels,
                                     max_len, window='hann', save_path=None, vmin=-80,
-                                    filter_cutoff_freq=None, filter_order=5):
+                                    filter_cutoff_freq=None, filter_order=5, render='matplotlib', n_jobs=1,
+                                    use_cache=True, plot_mel=True):
     """
     对音频进行完整的STFT分析并可视化
     
@@ -57,26 +64,43 @@ def analyze_audio_with_stft_librosa(audio_data, sample_rate, n_fft, hop_length,
         vmin (float): 颜色映射的最小值（dB），默认-80
         filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)，默认None表示不使用滤波
         filter_order (int): 低通滤波器阶数，默认5
+        render (str): 出图方式，'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG），默认'matplotlib'
+        n_jobs (int): STFT并行进程数，默认1
+        use_cache (bool): 是否使用变换结果缓存（按信号内容与全部参数寻址，命中时跳过滤波与变换），默认True
+        plot_mel (bool): 是否同时绘制Mel频谱图（由同一STFT结果经稀疏Mel滤波器组得到，Mel频带分布在0~max_len），默认True
     """
-    
-    # 在STFT之前应用低通滤波
-    if filter_cutoff_freq is not None:
-        print(f"\nApplying lowpass filter before STFT (cutoff: {filter_cutoff_freq} Hz)...")
-        audio_data = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
-    
-    # 执行STFT
-    print("\nPerforming STFT transformation...")
-    stft_result, frequencies, times = perform_stft_librosa(audio_data, sample_rate, n_fft, hop_length, win_length, window)
+
+    def compute():
+        filtered = audio_data
+
+        # 在STFT之前应用低通滤波
+        if filter_cutoff_freq is not None:
+            print(f"\nApplying lowpass filter before STFT (cutoff: {filter_cutoff_freq} Hz)...")
+            filtered = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
+
+        # 执行STFT
+        print("\nPerforming STFT transformation...")
+        return perform_stft_librosa(filtered, sample_rate, n_fft, hop_length, win_length, window, n_jobs=n_jobs)
+
+    stft_result, frequencies, times, _ = cached_transform(
+        compute, audio_data, sample_rate, 'stft_librosa', use_cache=use_cache,
+        n_fft=n_fft, hop_length=hop_length, win_length=win_length, window=window,
+        filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
+    )
     
     # 绘制标准频谱图
     print("\nPlotting standard spectrogram...")
     stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, window, n_fft, max_len,
-                          save_path=save_path, vmin=vmin)
+                          save_path=save_path, vmin=vmin, render=render)
     print("Standard spectrogram plotted.")
     
-    # 绘制Mel频谱图
-    #print("\nComputing Mel spectrogram...")
-    #mel_save_path = save_path.replace('.png', '_mel.png') if save_path else None
-    #plot_mel_spectrogram(audio_data, sample_rate, n_fft, hop_length, win_length, window, n_mels, max_len, save_path=mel_save_path, vmin=vmin)
+    # 绘制Mel频谱图（复用上面的STFT结果，不重新计算）
+    if plot_mel:
+        print("\nComputing Mel spectrogram from STFT...")
+        mel_spectrogram, mel_frequencies = stft_to_mel(stft_result, sample_rate, n_fft, n_mels, fmax=max_len)
+        mel_save_path = save_path.replace('.png', '_mel.png') if save_path else None
+        plot_mel_spectrogram(mel_spectrogram, mel_frequencies, sample_rate, n_fft, hop_length, win_length, window,
+                             len(mel_frequencies), max_len, save_path=mel_save_path, vmin=vmin, render=render)
+        print("Mel spectrogram plotted.")
 
     print("\nDone. Spectrograms generated successfully.")
\ No newline at end of file
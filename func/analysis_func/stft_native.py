@@ -0,0 +1,160 @@
+import os
+import numpy as np
+from scipy import fft as sp_fft
+from func.plot_func.stft_spectrogram import stft_plot_spectrogram
+from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.stft_stream import get_stft_window
+from func.analysis_func.transform_cache import cached_transform
+from func.output_func.trace import traced
+
+
+BATCH_BYTES = 32 * 1024 ** 2  # 每批加窗帧缓冲区的大小（字节）
+
+
+def _frame_segments(x, n_fft, hop_length, center=True):
+    """
+    按librosa.stft的分帧方式（center=True时两端各补n_fft//2个零）产生各段帧的滑动窗口视图
+
+    只有与补零区重叠的首尾几帧使用补零后的小缓冲区，中间的帧直接是原信号上的零拷贝视图。
+
+    返回:
+        n_frames (int): 总帧数
+        segments (list): [(起始帧号, 帧视图)]，帧视图shape为(帧数, n_fft)
+    """
+    n_points = len(x)
+    pad = n_fft // 2 if center else 0
+    if n_points + 2 * pad < n_fft:
+        raise ValueError(f"Signal of {n_points} samples is too short for n_fft={n_fft}")
+    n_frames = 1 + (n_points + 2 * pad - n_fft) // hop_length
+
+    def _view(buffer, count):
+        return np.lib.stride_tricks.sliding_window_view(buffer, n_fft)[::hop_length][:count]
+
+    if not pad:
+        return n_frames, [(0, _view(x, n_frames))]
+
+    # 第k帧在原信号中的起点为k * hop_length - pad；[first, last)内的帧不涉及补零
+    first = -(-pad // hop_length)
+    last = min((n_points + pad - n_fft) // hop_length + 1, n_frames) if n_points + pad >= n_fft else 0
+    if last <= first:
+        # 信号太短，直接整段补零
+        padded = np.pad(x, pad, mode='constant')
+        return n_frames, [(0, _view(padded, n_frames))]
+
+    head = np.concatenate((np.zeros(pad, dtype=x.dtype), x[:(first - 1) * hop_length + n_fft - pad]))
+    middle = x[first * hop_length - pad:]
+    tail = np.concatenate((x[last * hop_length - pad:], np.zeros(pad, dtype=x.dtype)))
+
+    segments = [(0, _view(head, first)), (first, _view(middle, last - first))]
+    if last < n_frames:
+        segments.append((last, _view(tail, n_frames - last)))
+    return n_frames, segments
+
+
+@traced()
+def perform_stft_native(audio_data, sample_rate, n_fft, hop_length, win_length, window='hann', n_jobs=-1,
+                        dtype=np.float32, center=True):
+    """
+    直接用NumPy/scipy.fft执行STFT：滑动窗口视图分帧（不复制信号），按批加窗到预分配的缓冲区，
+    再用scipy.fft.rfft多线程计算
+
+    分帧、补零与窗口约定与librosa.stft(center=True, pad_mode='constant')相同，结果在dtype精度内一致，
+    频率与时间轴也相同，可直接替换librosa后端。
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号，多通道时为(通道数, 采样点数)，逐通道计算
+        sample_rate (int): 采样率
+        n_fft (int): FFT窗口大小
+        hop_length (int): 帧移大小
+        win_length (int): 窗口长度
+        window (str): 窗口函数类型，默认'hann'
+        n_jobs (int): scipy.fft的线程数（workers），-1表示全部CPU，默认-1
+        dtype: 计算精度，默认np.float32（结果为complex64）
+        center (bool): 是否在两端补n_fft//2个零使帧居中，默认True
+
+    返回:
+        stft_result (np.ndarray): STFT复数结果，shape为(频点数, 帧数)，多通道时为(通道数, 频点数, 帧数)
+                                  （帧为行优先存储的转置视图）
+        frequencies (np.ndarray): 频率数组
+        times (np.ndarray): 时间数组
+    """
+    audio_data = np.asarray(audio_data)
+    workers = os.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+    win = get_stft_window(window, win_length, n_fft, dtype)
+    n_freqs = n_fft // 2 + 1
+    complex_dtype = np.result_type(dtype, np.complex64)
+
+    channels = audio_data.reshape(-1, audio_data.shape[-1])
+    n_frames = _frame_segments(channels[0], n_fft, hop_length, center)[0]
+    # 按(帧, 频点)存储，每批rfft结果连续写入；返回时转置为(频点, 帧)
+    output = np.empty((len(channels), n_frames, n_freqs), dtype=complex_dtype)
+
+    batch_frames = max(1, BATCH_BYTES // (n_fft * np.dtype(dtype).itemsize))
+    buffer = np.empty((min(batch_frames, n_frames), n_fft), dtype=dtype)
+
+    for channel, x in enumerate(channels):
+        for offset, frames in _frame_segments(x, n_fft, hop_length, center)[1]:
+            for start in range(0, len(frames), batch_frames):
+                batch = frames[start:start + batch_frames]
+                windowed = buffer[:len(batch)]
+                np.multiply(batch, win, out=windowed, casting='same_kind')
+                output[channel, offset + start:offset + start + len(batch)] = sp_fft.rfft(
+                    windowed, axis=-1, workers=workers, overwrite_x=True)
+
+    stft_result = np.swapaxes(output, -1, -2).reshape(audio_data.shape[:-1] + (n_freqs, n_frames))
+    frequencies = sp_fft.rfftfreq(n_fft, 1 / sample_rate)
+    times = np.arange(n_frames) * hop_length / sample_rate
+
+    return stft_result, frequencies, times
+
+
+@traced()
+def analyze_audio_with_stft_native(audio_data, sample_rate, n_fft, hop_length, win_length, max_len,
+                                   window='hann', save_path=None, vmin=-80, filter_cutoff_freq=None,
+                                   filter_order=5, render='matplotlib', n_jobs=-1, use_cache=True):
+    """
+    使用NumPy/scipy.fft原生STFT对音频进行分析并可视化（float32，多线程FFT）
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 采样率
+        n_fft (int): FFT窗口大小
+        hop_length (int): 帧移大小
+        win_length (int): 窗口长度
+        max_len (int): 最大显示频率
+        window (str): 窗口函数类型，默认'hann'
+        save_path (str): 图像保存路径
+        vmin (float): 颜色映射的最小值（dB），默认-80
+        filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)，默认None表示不使用滤波
+        filter_order (int): 低通滤波器阶数，默认5
+        render (str): 出图方式，'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG），默认'matplotlib'
+        n_jobs (int): FFT线程数，-1表示全部CPU，默认-1
+        use_cache (bool): 是否使用变换结果缓存（按信号内容与全部参数寻址，命中时跳过滤波与变换），默认True
+    """
+
+    def compute():
+        filtered = audio_data
+
+        # 在STFT之前应用低通滤波
+        if filter_cutoff_freq is not None:
+            print(f"\nApplying lowpass filter before STFT (cutoff: {filter_cutoff_freq} Hz)...")
+            filtered = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
+
+        # 执行STFT
+        print("\nPerforming native STFT transformation (strided frames, scipy.fft)...")
+        return perform_stft_native(filtered, sample_rate, n_fft, hop_length, win_length, window, n_jobs=n_jobs)
+
+    # 线程数只影响速度，不计入缓存键
+    stft_result, frequencies, times, _ = cached_transform(
+        compute, audio_data, sample_rate, 'stft_native', use_cache=use_cache,
+        n_fft=n_fft, hop_length=hop_length, win_length=win_length, window=window,
+        filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
+    )
+
+    # 绘制标准频谱图
+    print("\nPlotting standard spectrogram...")
+    stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, window, n_fft, max_len,
+                          save_path=save_path, vmin=vmin, render=render)
+    print("Standard spectrogram plotted.")
+
+    print("\nDone. Spectrogram generated successfully.")
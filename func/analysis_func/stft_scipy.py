@@ -1,22 +1,19 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from scipy.signal import ShortTimeFFT
 from scipy.signal.windows import get_window
-from matplotlib import font_manager
 from func.plot_func.stft_spectrogram import stft_plot_spectrogram
 from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.transform_cache import cached_transform
+from func.output_func.trace import traced
 
 
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
-
-
+@traced()
 def perform_stft_scipy(audio_data, sample_rate, n_fft, hop_length, win_length, window='hann'):
     """
     使用scipy.signal.ShortTimeFFT对音频数据执行STFT变换
     
     参数:
-        audio_data (np.ndarray): 音频时域信号
+        audio_data (np.ndarray): 音频时域信号，多通道时为(通道数, 采样点数)，沿最后一个轴一次计算
         sample_rate (int): 采样率
         n_fft (int): FFT窗口大小
         hop_length (int): 帧移大小
@@ -24,7 +21,7 @@ def perform_stft_scipy(audio_data, sample_rate, n_fft, hop_length, win_length, w
         window (str): 窗口函数类型，默认'hann'
         
     返回:
-        stft_result (np.ndarray): STFT复数结果
+        stft_result (np.ndarray): STFT复数结果，多通道时shape为(通道数, 频点数, 帧数)；float32输入时为complex64
         frequencies (np.ndarray): 频率数组
         times (np.ndarray): 时间数组
     """
@@ -38,18 +35,22 @@ def perform_stft_scipy(audio_data, sample_rate, n_fft, hop_length, win_length, w
                             fft_mode='onesided', mfft=n_fft, 
                             scale_to='magnitude')
     
-    # 执行STFT变换
+    # 执行STFT变换（ShortTimeFFT的输出数组固定为complex128，float32输入时转换回complex64）
     stft_result = stft_obj.stft(audio_data)
+    if audio_data.dtype == np.float32:
+        stft_result = stft_result.astype(np.complex64)
     
     # 获取频率和时间轴
     frequencies = stft_obj.f  # 频率数组
-    times = stft_obj.t(len(audio_data))  # 时间数组
+    times = stft_obj.t(audio_data.shape[-1])  # 时间数组
     
     return stft_result, frequencies, times
 
 
+@traced()
 def analyze_audio_with_stft_scipy(audio_data, sample_rate, n_fft, hop_length, win_length, max_len,
-                            window='hann', save_path=None, vmin=-80, filter_cutoff_freq=None, filter_order=5):
+                            window='hann', save_path=None, vmin=-80, filter_cutoff_freq=None, filter_order=5,
+                            render='matplotlib', use_cache=True):
     """
     使用scipy对音频进行完整的STFT分析并可视化
     
@@ -65,21 +66,37 @@ def analyze_audio_with_stft_scipy(audio_data, sample_rate, n_fft, hop_length, wi
         vmin (float): 颜色映射的最小值（dB），默认-80
         filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)，默认None表示不使用滤波
         filter_order (int): 低通滤波器阶数，默认5
+        render (str): 出图方式，'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG），默认'matplotlib'
+        use_cache (bool): 是否使用变换结果缓存（按信号内容与全部参数寻址，命中时跳过滤波与变换），默认True
+
+    返回:
+        stft_result (np.ndarray): STFT结果（缓存命中时为幅度矩阵）
+        frequencies (np.ndarray): 频率数组
+        times (np.ndarray): 时间数组
     """
-    
-    # 在STFT之前应用低通滤波
-    if filter_cutoff_freq is not None:
-        print(f"\nApplying lowpass filter before STFT (cutoff: {filter_cutoff_freq} Hz)...")
-        audio_data = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
-    
-    # 执行STFT
-    print("\nPerforming STFT transformation using scipy.signal.ShortTimeFFT...")
-    stft_result, frequencies, times = perform_stft_scipy(audio_data, sample_rate, n_fft, hop_length, win_length, window)
+
+    def compute():
+        filtered = audio_data
+
+        # 在STFT之前应用低通滤波
+        if filter_cutoff_freq is not None:
+            print(f"\nApplying lowpass filter before STFT (cutoff: {filter_cutoff_freq} Hz)...")
+            filtered = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
+
+        # 执行STFT
+        print("\nPerforming STFT transformation using scipy.signal.ShortTimeFFT...")
+        return perform_stft_scipy(filtered, sample_rate, n_fft, hop_length, win_length, window)
+
+    stft_result, frequencies, times, _ = cached_transform(
+        compute, audio_data, sample_rate, 'stft_scipy', use_cache=use_cache,
+        n_fft=n_fft, hop_length=hop_length, win_length=win_length, window=window,
+        filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
+    )
     
     # 绘制标准频谱图
     print("\nPlotting standard spectrogram...")
     stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, window, n_fft, max_len,
-                          save_path=save_path, vmin=vmin)
+                          save_path=save_path, vmin=vmin, render=render)
     print("Standard spectrogram plotted.")
     
     print("\nDone. Spectrogram generated successfully using scipy.")
@@ -0,0 +1,88 @@
+from functools import lru_cache
+import numpy as np
+from scipy import fft as sp_fft
+
+
+@lru_cache(maxsize=16)
+def get_stft_window(window, win_length, n_fft, dtype=np.float32):
+    """
+    生成与librosa.stft相同的窗口：win_length长的周期窗居中补零到n_fft（结果缓存，只读）
+
+    参数:
+        window (str): 窗口函数类型
+        win_length (int): 窗口长度
+        n_fft (int): FFT窗口大小
+        dtype: 窗口数据类型
+
+    返回:
+        win (np.ndarray): 长度为n_fft的窗口
+    """
+    from scipy.signal.windows import get_window
+    win = np.zeros(n_fft, dtype=dtype)
+    lpad = (n_fft - win_length) // 2
+    win[lpad:lpad + win_length] = get_window(window, win_length, fftbins=True)
+    win.setflags(write=False)
+    return win
+
+
+def _frames_magnitude(buffer, n_frames, n_fft, hop_length, win):
+    """
+    计算缓冲区开头n_frames帧的STFT幅度，返回shape为(n_fft//2+1, n_frames)
+    """
+    frames = np.lib.stride_tricks.sliding_window_view(buffer, n_fft)[::hop_length][:n_frames]
+    spectrum = sp_fft.rfft(frames * win, axis=-1)
+    return np.abs(spectrum).T
+
+
+def stream_stft(blocks, n_fft, hop_length=None, win_length=None, window='hann', center=True,
+                to_db=False, ref=1.0, amin=1e-5, dtype=np.float32):
+    """
+    对数据块迭代器执行流式STFT，逐批产生幅度帧，内存占用只与数据块大小有关
+
+    块与块之间保留n_fft - hop_length个重叠样本（窗口居中补零到n_fft，与librosa一致），
+    center=True时在流的开头和结尾各补n_fft//2个零，因此产生的帧与
+    librosa.stft(center=True, pad_mode='constant')逐帧一致（包括块边界处）。
+
+    参数:
+        blocks (iterable): 逐块产生一维时域信号的迭代器（如open_csv_blocks或iter_array_blocks）
+        n_fft (int): FFT窗口大小
+        hop_length (int): 帧移大小，默认win_length // 4
+        win_length (int): 窗口长度，默认n_fft
+        window (str): 窗口函数类型，默认'hann'
+        center (bool): 是否在两端补零使帧居中，默认True
+        to_db (bool): 是否转换为dB刻度（20*log10(max(amin, S) / ref)，固定参考值），默认False
+        ref (float): dB转换的参考幅度，默认1.0（流式处理无法使用全局最大值）
+        amin (float): dB转换的最小幅度，默认1e-5
+        dtype: 计算精度，默认np.float32
+
+    返回:
+        generator: 逐批产生shape为(n_fft//2+1, n_frames)的幅度（或dB）矩阵
+    """
+    win_length = n_fft if win_length is None else win_length
+    hop_length = win_length // 4 if hop_length is None else hop_length
+    win = get_stft_window(window, win_length, n_fft, dtype)
+    pad = n_fft // 2 if center else 0
+    db_offset = 20 * np.log10(max(amin, ref))
+
+    def _emit(buffer):
+        if len(buffer) < n_fft:
+            return None, buffer
+        n_frames = 1 + (len(buffer) - n_fft) // hop_length
+        magnitude = _frames_magnitude(buffer, n_frames, n_fft, hop_length, win)
+        if to_db:
+            magnitude = 20 * np.log10(np.maximum(magnitude, amin)) - db_offset
+        return magnitude, buffer[n_frames * hop_length:]
+
+    # buffer[0]始终是下一帧的起点
+    buffer = np.zeros(pad, dtype=dtype)
+    for block in blocks:
+        buffer = np.concatenate((buffer, np.asarray(block, dtype=dtype)))
+        magnitude, buffer = _emit(buffer)
+        if magnitude is not None:
+            yield magnitude
+
+    if pad:
+        buffer = np.concatenate((buffer, np.zeros(pad, dtype=dtype)))
+        magnitude, buffer = _emit(buffer)
+        if magnitude is not None:
+            yield magnitude
@@ -0,0 +1,122 @@
+import numpy as np
+from scipy.signal import ZoomFFT
+from scipy.signal.windows import get_window
+from func.plot_func.stft_spectrogram import stft_plot_spectrogram
+from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.transform_cache import cached_transform
+from func.output_func.trace import traced
+
+
+@traced()
+def perform_stft_zoom(audio_data, sample_rate, n_fft, hop_length, win_length, window='hann',
+                      f_min=0.0, f_max=None, n_bins=None, batch_frames=64):
+    """
+    使用chirp-z（Zoom FFT）执行带限STFT，只计算[f_min, f_max]频带内的频点
+
+    分帧方式与librosa.stft一致（center=True，两端各补n_fft//2个零，窗口居中补零到n_fft），
+    因此在相同频率处的结果与librosa.stft相同。各帧按批次一起做Zoom FFT。
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 采样率
+        n_fft (int): FFT窗口大小
+        hop_length (int): 帧移大小
+        win_length (int): 窗口长度
+        window (str): 窗口函数类型，默认'hann'
+        f_min (float): 频带下限 (Hz)，默认0
+        f_max (float): 频带上限 (Hz)，默认None表示奈奎斯特频率
+        n_bins (int): 频带内的频点数，默认None表示与n_fft点FFT相同的频率分辨率
+                      （此时f_max向下对齐到该频率网格）
+        batch_frames (int): 每批处理的帧数
+
+    返回:
+        stft_result (np.ndarray): STFT复数结果，shape为(n_bins, n_frames)；float32输入时为complex64
+        frequencies (np.ndarray): 频率数组
+        times (np.ndarray): 时间数组
+    """
+    if f_max is None or f_max > sample_rate / 2:
+        f_max = sample_rate / 2
+    if n_bins is None:
+        # 与n_fft点FFT相同的频率间隔，频带上限对齐到该网格，使频点与librosa的频点重合
+        n_bins = int(np.floor((f_max - f_min) * n_fft / sample_rate)) + 1
+        f_max = f_min + (n_bins - 1) * sample_rate / n_fft
+
+    # 与librosa相同：窗口居中补零到n_fft
+    audio_data = np.asarray(audio_data)
+    real_dtype = audio_data.dtype if audio_data.dtype == np.float32 else np.float64
+    win = np.zeros(n_fft, dtype=real_dtype)
+    lpad = (n_fft - win_length) // 2
+    win[lpad:lpad + win_length] = get_window(window, win_length, fftbins=True)
+
+    # 与librosa相同：两端补零后按hop_length分帧（零拷贝的滑动窗口视图）
+    padded = np.pad(audio_data, n_fft // 2, mode='constant')
+    frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop_length]
+    n_frames = frames.shape[0]
+
+    zoom = ZoomFFT(n_fft, [f_min, f_max], m=n_bins, fs=sample_rate, endpoint=True)
+    stft_result = np.empty((n_bins, n_frames), dtype=np.result_type(real_dtype, np.complex64))
+
+    for start in range(0, n_frames, batch_frames):
+        stop = min(start + batch_frames, n_frames)
+        stft_result[:, start:stop] = zoom(frames[start:stop] * win, axis=-1).T
+
+    frequencies = np.linspace(f_min, f_max, n_bins)
+    times = np.arange(n_frames) * hop_length / sample_rate
+
+    return stft_result, frequencies, times
+
+
+@traced()
+def analyze_audio_with_stft_zoom(audio_data, sample_rate, n_fft, hop_length, win_length, max_len,
+                                 window='hann', save_path=None, vmin=-80, filter_cutoff_freq=None,
+                                 filter_order=5, f_min=0.0, n_bins=None, render='matplotlib',
+                                 use_cache=True):
+    """
+    使用带限STFT（Zoom FFT）对音频进行分析并可视化，只计算0~max_len的频带
+
+    参数:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 采样率
+        n_fft (int): FFT窗口大小
+        hop_length (int): 帧移大小
+        win_length (int): 窗口长度
+        max_len (int): 最大显示频率，同时作为计算频带的上限
+        window (str): 窗口函数类型，默认'hann'
+        save_path (str): 图像保存路径
+        vmin (float): 颜色映射的最小值（dB），默认-80
+        filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)，默认None表示不使用滤波
+        filter_order (int): 低通滤波器阶数，默认5
+        f_min (float): 频带下限 (Hz)，默认0
+        n_bins (int): 频带内的频点数，默认None表示与n_fft点FFT相同的频率分辨率
+        render (str): 出图方式，'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG），默认'matplotlib'
+        use_cache (bool): 是否使用变换结果缓存（按信号内容与全部参数寻址，命中时跳过滤波与变换），默认True
+    """
+
+    def compute():
+        filtered = audio_data
+
+        # 在STFT之前应用低通滤波
+        if filter_cutoff_freq is not None:
+            print(f"\nApplying lowpass filter before STFT (cutoff: {filter_cutoff_freq} Hz)...")
+            filtered = lowpass_filter(audio_data, sample_rate, filter_cutoff_freq, order=filter_order)
+
+        # 执行带限STFT
+        print(f"\nPerforming band-limited STFT (Zoom FFT, {f_min}-{max_len} Hz)...")
+        return perform_stft_zoom(filtered, sample_rate, n_fft, hop_length, win_length,
+                                 window, f_min=f_min, f_max=max_len, n_bins=n_bins)
+
+    stft_result, frequencies, times, _ = cached_transform(
+        compute, audio_data, sample_rate, 'stft_zoom', use_cache=use_cache,
+        n_fft=n_fft, hop_length=hop_length, win_length=win_length, window=window,
+        f_min=f_min, f_max=max_len, n_bins=n_bins,
+        filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
+    )
+    print(f"  {len(frequencies)} bins x {len(times)} frames")
+
+    # 绘制标准频谱图
+    print("\nPlotting standard spectrogram...")
+    stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, window, n_fft, max_len,
+                          save_path=save_path, vmin=vmin, frequencies=frequencies, render=render)
+    print("Standard spectrogram plotted.")
+
+    print("\nDone. Band-limited spectrogram generated successfully.")
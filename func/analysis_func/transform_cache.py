@@ -0,0 +1,279 @@
+import os
+import json
+import hashlib
+import zipfile
+import numpy as np
+from func.input_func.cache import sidecar_paths, commit_sidecar, remove_entry, unique_tmp_path
+from func.output_func.trace import span
+
+
+DEFAULT_TRANSFORM_CACHE_DIR = 'data/cache/transforms'  # 变换结果缓存目录
+DEFAULT_TRANSFORM_CACHE_MAX_BYTES = 4 * 1024 ** 3  # 变换结果缓存大小上限（字节），超出后按LRU淘汰
+DEFAULT_CHUNK_COLUMNS = 4096  # 每个压缩块包含的时间列数
+CACHE_FORMAT_VERSION = 1
+
+
+def signal_digest(audio_data, chunk_size=1 << 24):
+    """
+    计算信号样本内容的哈希（BLAKE2b，分块读取，支持memmap），与数据类型和形状一起作为内容标识
+
+    参数:
+        audio_data (np.ndarray): 时域信号
+        chunk_size (int): 每次送入哈希的元素数
+
+    返回:
+        digest (str): 十六进制哈希字符串
+    """
+    audio_data = np.asarray(audio_data)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f'{audio_data.dtype.str}{audio_data.shape}'.encode('utf-8'))
+    flat = audio_data.reshape(-1)
+    for start in range(0, len(flat), chunk_size):
+        h.update(np.ascontiguousarray(flat[start:start + chunk_size]).data)
+    return h.hexdigest()
+
+
+def _jsonable(value):
+    """
+    把参数值转换为可稳定序列化的形式（数组取哈希，numpy标量转为Python标量）
+    """
+    if isinstance(value, np.ndarray):
+        return {'array_sha1': hashlib.sha1(np.ascontiguousarray(value).data).hexdigest(),
+                'dtype': value.dtype.str, 'shape': list(value.shape)}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def transform_key(audio_data, sample_rate, transform, **params):
+    """
+    根据信号内容哈希与全部变换参数（包括变换前的滤波设置）计算缓存键
+
+    参数:
+        audio_data (np.ndarray): 变换（及滤波）前的时域信号
+        sample_rate (int): 采样率
+        transform (str): 变换名称，例如'stft_librosa'、'cwt_fft'
+        params: 影响变换结果的参数
+
+    返回:
+        key (str): 缓存键
+        meta (dict): 参与计算缓存键的元数据
+    """
+    meta = {
+        'version': CACHE_FORMAT_VERSION,
+        'signal': signal_digest(audio_data),
+        'sample_rate': _jsonable(sample_rate),
+        'transform': transform,
+        'params': {name: _jsonable(value) for name, value in sorted(params.items())}
+    }
+    key = hashlib.sha1(json.dumps(meta, sort_keys=True).encode('utf-8')).hexdigest()
+    return key, meta
+
+
+def load_transform(key, cache_dir=DEFAULT_TRANSFORM_CACHE_DIR):
+    """
+    加载缓存的变换结果（幅度或功率矩阵），并刷新其最近使用时间
+
+    返回:
+        (matrix, frequencies, times): 命中时返回结果，未命中时返回None
+    """
+    data_path, meta_path = sidecar_paths(key, cache_dir, '.npz')
+
+    # 元数据文件在数据写完后才生成，作为缓存条目完整的标记
+    if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+        return None
+
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        with np.load(data_path) as archive:
+            matrix = np.empty(tuple(meta['shape']), dtype=meta['dtype'])
+            for i, start in enumerate(range(0, matrix.shape[-1], meta['chunk_columns'])):
+                matrix[..., start:start + meta['chunk_columns']] = archive[f'chunk_{i:05d}']
+            frequencies = archive['frequencies']
+            times = archive['times']
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        remove_entry(key, cache_dir)
+        return None
+
+    os.utime(meta_path)
+    return matrix, frequencies, times
+
+
+def _write_member(archive, name, array):
+    """
+    把数组写为.npz归档中的一个.npy成员（逐个成员压缩写入，不需要整个归档驻留内存）
+    """
+    with archive.open(name + '.npy', 'w', force_zip64=True) as f:
+        np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+
+
+def iter_transform(key, cache_dir=DEFAULT_TRANSFORM_CACHE_DIR):
+    """
+    逐块读取缓存的变换结果（一次只解压一块，整个矩阵不会同时驻留内存），并刷新其最近使用时间
+
+    返回:
+        (frequencies, times, batches): 命中时返回频率、时间与逐块产生矩阵列的生成器，未命中时返回None
+    """
+    data_path, meta_path = sidecar_paths(key, cache_dir, '.npz')
+    if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+        return None
+
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        with np.load(data_path) as archive:
+            frequencies = archive['frequencies']
+            times = archive['times']
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        remove_entry(key, cache_dir)
+        return None
+    os.utime(meta_path)
+
+    def batches():
+        with np.load(data_path) as archive:
+            for i in range(-(-meta['shape'][-1] // meta['chunk_columns'])):
+                yield archive[f'chunk_{i:05d}']
+
+    return frequencies, times, batches()
+
+
+def save_transform_batches(batches, key, meta, frequencies, time_step, cache_dir=DEFAULT_TRANSFORM_CACHE_DIR,
+                           max_bytes=DEFAULT_TRANSFORM_CACHE_MAX_BYTES, chunk_columns=DEFAULT_CHUNK_COLUMNS,
+                           compress_level=1):
+    """
+    原样产生逐批到达的实数矩阵列，同时按chunk_columns列重新分块压缩写入缓存（与save_transform的格式相同）；
+    全部批次产生完后提交条目，中途出错或调用方没有读完时丢弃临时文件
+
+    参数:
+        batches (iterable): 逐批产生shape为(n_freqs, 列数)的实数矩阵（幅度或功率），按时间顺序
+        key (str): 缓存键
+        meta (dict): transform_key返回的元数据
+        frequencies (np.ndarray): 频率数组
+        time_step (float): 相邻两列的时间间隔 (s)，第i列的时间为i * time_step
+        其余参数同save_transform
+
+    返回:
+        generator: 逐批产生与batches相同的矩阵
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path = sidecar_paths(key, cache_dir, '.npz')[0]
+    tmp_path = unique_tmp_path(data_path)
+    buffer, filled, n_chunks, n_columns = None, 0, 0, 0
+
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED,
+                             compresslevel=compress_level) as archive:
+            for batch in batches:
+                batch = np.asarray(batch)
+                if buffer is None:
+                    buffer = np.empty(batch.shape[:-1] + (chunk_columns,), dtype=batch.dtype)
+                # 先复制到分块缓冲区再交给调用方（调用方或上游可能复用这块内存）
+                columns = batch
+                while columns.shape[-1]:
+                    take = min(chunk_columns - filled, columns.shape[-1])
+                    buffer[..., filled:filled + take] = columns[..., :take]
+                    filled += take
+                    columns = columns[..., take:]
+                    if filled == chunk_columns:
+                        _write_member(archive, f'chunk_{n_chunks:05d}', buffer)
+                        n_chunks += 1
+                        filled = 0
+                n_columns += batch.shape[-1]
+                yield batch
+            if buffer is None:
+                return
+            if filled:
+                _write_member(archive, f'chunk_{n_chunks:05d}', buffer[..., :filled])
+            _write_member(archive, 'frequencies', np.asarray(frequencies))
+            _write_member(archive, 'times', np.arange(n_columns) * time_step)
+        os.replace(tmp_path, data_path)
+        meta = dict(meta, shape=list(buffer.shape[:-1]) + [n_columns], dtype=buffer.dtype.str,
+                    chunk_columns=chunk_columns)
+        commit_sidecar(key, meta, cache_dir, max_bytes, remove_stale=False)
+    except OSError as e:
+        print(f"Warning: failed to write transform cache: {e}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_transform(key, meta, matrix, frequencies, times, cache_dir=DEFAULT_TRANSFORM_CACHE_DIR,
+                   max_bytes=DEFAULT_TRANSFORM_CACHE_MAX_BYTES, chunk_columns=DEFAULT_CHUNK_COLUMNS, compress_level=1):
+    """
+    把变换结果按时间列分块、逐块deflate压缩写入.npz文件，然后提交元数据并执行LRU淘汰
+
+    参数:
+        key (str): 缓存键
+        meta (dict): transform_key返回的元数据
+        matrix (np.ndarray): 实数矩阵（幅度或功率），shape为(n_freqs, n_times)，多通道时为(n_channels, n_freqs, n_times)
+        frequencies (np.ndarray): 频率数组
+        times (np.ndarray): 时间数组
+        cache_dir (str): 缓存目录
+        max_bytes (int): 缓存目录大小上限（字节）
+        chunk_columns (int): 每块的时间列数（沿最后一个轴分块）
+        compress_level (int): deflate压缩级别，默认1（速度优先）
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path = sidecar_paths(key, cache_dir, '.npz')[0]
+    tmp_path = unique_tmp_path(data_path)
+
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED,
+                             compresslevel=compress_level) as archive:
+            for i, start in enumerate(range(0, matrix.shape[-1], chunk_columns)):
+                _write_member(archive, f'chunk_{i:05d}', matrix[..., start:start + chunk_columns])
+            _write_member(archive, 'frequencies', np.asarray(frequencies))
+            _write_member(archive, 'times', np.asarray(times))
+        os.replace(tmp_path, data_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    meta = dict(meta, shape=list(matrix.shape), dtype=matrix.dtype.str, chunk_columns=chunk_columns)
+    commit_sidecar(key, meta, cache_dir, max_bytes, remove_stale=False)
+
+
+def cached_transform(compute, audio_data, sample_rate, transform, use_cache=True,
+                     cache_dir=DEFAULT_TRANSFORM_CACHE_DIR, max_bytes=DEFAULT_TRANSFORM_CACHE_MAX_BYTES, **params):
+    """
+    带缓存地执行变换：命中时直接返回缓存结果，否则调用compute()并保存其幅度（复数结果取模）；
+    两种情况都返回幅度，需要相位的调用方（例如相干图）应传入use_cache=False
+
+    参数:
+        compute (callable): 无参数函数，返回(matrix, frequencies, times)，matrix可以是复数
+        audio_data (np.ndarray): 变换（及滤波）前的时域信号，用于计算内容哈希
+        sample_rate (int): 采样率
+        transform (str): 变换名称
+        use_cache (bool): 是否使用缓存，默认True
+        cache_dir (str): 缓存目录
+        max_bytes (int): 缓存目录大小上限（字节）
+        params: 影响变换结果的全部参数（包括滤波设置）
+
+    返回:
+        matrix (np.ndarray): 变换结果的幅度（复数结果取模，实数结果不变）；use_cache=False时为compute()的原始结果
+        frequencies (np.ndarray): 频率数组
+        times (np.ndarray): 时间数组
+        hit (bool): 是否命中缓存
+    """
+    if not use_cache:
+        return (*compute(), False)
+
+    with span('transform_cache_lookup', transform=transform) as current:
+        key, meta = transform_key(audio_data, sample_rate, transform, **params)
+        cached = load_transform(key, cache_dir)
+        current.set(key=key[:12], hit=cached is not None)
+    if cached is not None:
+        print(f"Transform loaded from cache ({key[:12]}, {' x '.join(str(n) for n in cached[0].shape)})")
+        return (*cached, True)
+
+    matrix, frequencies, times = compute()
+    magnitude = np.abs(matrix) if np.iscomplexobj(matrix) else matrix
+    del matrix
+    with span('transform_cache_save', transform=transform, key=key[:12]):
+        try:
+            save_transform(key, meta, magnitude, frequencies, times, cache_dir, max_bytes)
+        except OSError as e:
+            print(f"Warning: failed to write transform cache: {e}")
+
+    return magnitude, frequencies, times, False
@@ -0,0 +1,211 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = 'data/cache/signals'  # 解析后信号的二进制缓存目录
+DEFAULT_CACHE_MAX_BYTES = 8 * 1024 ** 3  # 缓存目录大小上限（字节），超出后按LRU淘汰
+DATA_EXTENSIONS = ('.npy', '.npz')  # 缓存条目数据文件可能的扩展名（信号为.npy，变换结果为.npz）
+
+
+def source_signature(file_path):
+    """
+    获取源文件的标识信息（绝对路径、大小、修改时间），文件改动后标识随之变化
+
+    参数:
+        file_path (str): 源文件路径
+
+    返回:
+        dict: 包含source、size、mtime_ns的字典
+    """
+    stat = os.stat(file_path)
+    return {
+        'source': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+
+def sidecar_key(file_path, channel, sample_rate, dtype):
+    """
+    根据源文件标识、通道、采样率和数据类型计算缓存键
+
+    返回:
+        key (str): 缓存键（SHA1十六进制字符串）
+        meta (dict): 参与计算缓存键的元数据
+    """
+    meta = source_signature(file_path)
+    meta.update({
+        'channel': channel,
+        'requested_rate': sample_rate,
+        'dtype': np.dtype(dtype).str
+    })
+    key = hashlib.sha1(json.dumps(meta, sort_keys=True).encode('utf-8')).hexdigest()
+    return key, meta
+
+
+def sidecar_paths(key, cache_dir=DEFAULT_CACHE_DIR, extension='.npy'):
+    """
+    返回缓存键对应的数据文件（默认.npy）和元数据文件(.json)路径
+    """
+    base = os.path.join(cache_dir, key)
+    return base + extension, base + '.json'
+
+
+def unique_tmp_path(path):
+    """
+    返回与path同目录、对本进程本线程唯一的临时文件路径
+
+    缓存文件先写入临时文件再os.replace到最终路径：多个加载者同时未命中同一条目时，
+    后写入者不会截断先写入者已经内存映射的文件（被替换的旧文件在映射解除前仍然有效）
+    """
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def prepare_sidecar(key, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    确保缓存目录存在，并返回缓存键对应的.npy数据文件路径
+    """
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    return sidecar_paths(key, cache_dir)[0]
+
+
+def load_sidecar(key, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    以内存映射方式加载缓存的信号，并刷新其最近使用时间
+
+    返回:
+        data (np.ndarray): 内存映射的信号数据，未命中时为None
+        meta (dict): 缓存元数据，未命中时为None
+    """
+    data_path, meta_path = sidecar_paths(key, cache_dir)
+
+    # 元数据文件在数据写完后才生成，作为缓存条目完整的标记
+    if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+        return None, None
+
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        data = np.load(data_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None, None
+
+    os.utime(meta_path)
+    return data, meta
+
+
+def commit_sidecar(key, meta, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES, remove_stale=True):
+    """
+    在数据文件写完后写入元数据，清理同一源文件的过期缓存（remove_stale=True时），并执行LRU淘汰
+    """
+    _, meta_path = sidecar_paths(key, cache_dir)
+    tmp_path = unique_tmp_path(meta_path)
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+    if remove_stale:
+        _remove_stale(meta, cache_dir, keep=key)
+    evict_lru(cache_dir, max_bytes, keep=key)
+
+
+def save_sidecar(key, data, meta, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+    """
+    将内存中的信号写为.npy缓存文件（先写临时文件再原子替换）并提交
+    """
+    data_path = prepare_sidecar(key, cache_dir)
+    tmp_path = unique_tmp_path(data_path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(data))
+        os.replace(tmp_path, data_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    commit_sidecar(key, meta, cache_dir, max_bytes)
+
+
+def _iter_entries(cache_dir):
+    """
+    遍历缓存目录中的所有条目，产生(key, 元数据路径, 条目总字节数, 最近使用时间)
+    """
+    if not os.path.isdir(cache_dir):
+        return
+
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.json'):
+            continue
+        key = name[:-len('.json')]
+        meta_path = sidecar_paths(key, cache_dir)[1]
+        try:
+            size = os.path.getsize(meta_path)
+            for extension in DATA_EXTENSIONS:
+                data_path = sidecar_paths(key, cache_dir, extension)[0]
+                if os.path.exists(data_path):
+                    size += os.path.getsize(data_path)
+            yield key, meta_path, size, os.path.getmtime(meta_path)
+        except OSError:
+            continue
+
+
+def remove_entry(key, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    删除一个缓存条目（先删除元数据使其立即失效）
+    """
+    meta_path = sidecar_paths(key, cache_dir)[1]
+    data_paths = [sidecar_paths(key, cache_dir, extension)[0] for extension in DATA_EXTENSIONS]
+    for path in [meta_path] + data_paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _remove_stale(meta, cache_dir, keep):
+    """
+    删除同一源文件、同一通道但文件大小或修改时间已变化的过期缓存
+    """
+    for key, meta_path, _, _ in list(_iter_entries(cache_dir)):
+        if key == keep:
+            continue
+        try:
+            with open(meta_path, 'r') as f:
+                other = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if (other.get('source') == meta.get('source')
+                and other.get('channel') == meta.get('channel')
+                and (other.get('size'), other.get('mtime_ns')) != (meta.get('size'), meta.get('mtime_ns'))):
+            remove_entry(key, cache_dir)
+
+
+def evict_lru(cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES, keep=None):
+    """
+    按最近使用时间淘汰缓存条目，直到目录总大小不超过max_bytes
+
+    参数:
+        cache_dir (str): 缓存目录
+        max_bytes (int): 目录大小上限（字节）
+        keep (str): 不参与淘汰的缓存键（通常是刚写入的条目）
+
+    返回:
+        int: 被淘汰的条目数量
+    """
+    entries = sorted(_iter_entries(cache_dir), key=lambda entry: entry[3])
+    total = sum(entry[2] for entry in entries)
+    removed = 0
+
+    for key, _, size, _ in entries:
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        remove_entry(key, cache_dir)
+        total -= size
+        removed += 1
+
+    return removed
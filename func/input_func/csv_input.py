@@ -1,105 +1,402 @@
-import numpy as np
-import pandas as pd
+import os
 import re
+import struct
+import time
+import numpy as np
+from func.input_func.cache import (DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES, sidecar_key,
+                                   load_sidecar, prepare_sidecar, commit_sidecar, save_sidecar, remove_entry,
+                                   unique_tmp_path)
+from func.output_func.trace import traced
+
+
+CSV_CHANNELS = ('CH1V', 'CH2V')  # 带tInc表头的CSV文件中各列对应的通道名
+DEFAULT_BLOCK_ROWS = 1 << 20  # 分块解析时每块的行数
+NPY_HEADER_SIZE = 128  # 流式写入.npy文件时预留的固定表头长度（字节）
 
 
-def load_data_from_csv(file_path, sample_rate=None, channel='CH2V'):
+def _parse_tinc(header_line):
     """
-    从CSV文件加载单通道采样数据
-    
+    从CSV表头行中提取采样间隔tInc，找不到时返回None
+    """
+    match_tinc = re.search(r'tInc\s*=\s*([-\d.e+]+)', header_line, re.IGNORECASE)
+    if not match_tinc:
+        return None
+    return float(match_tinc.group(1))
+
+
+def _is_data_line(line):
+    """
+    判断一行文本是否为数据行（首个字段可解析为数值）
+    """
+    first_field = line.split(',')[0].strip()
+    try:
+        float(first_field)
+        return True
+    except ValueError:
+        return False
+
+
+def _open_csv_stream(file_path, channel, block_rows, dtype):
+    """
+    只打开一次文件：先读取表头，再返回逐块解析数据的生成器
+
+    channel为通道名时逐块产生一维数组；为通道名元组时在同一次解析中读取这些列，
+    逐块产生shape为(通道数, 行数)的二维数组（仅支持带表头的格式）。
+
+    返回:
+        header_rate (int): 由表头tInc计算出的采样率，表头中没有tInc时为None
+        est_rows (int): 根据文件大小估计的数据行数，用于预分配数组
+        f (file): 打开的文件（生成器读完后自动关闭；生成器未启动就放弃时由调用方关闭）
+        blocks (generator): 逐块产生指定通道数据的生成器
+    """
+    f = open(file_path, 'rb')
+    try:
+        first_line = f.readline().decode('utf-8', errors='replace')
+        tinc = _parse_tinc(first_line)
+
+        if tinc is None and _is_data_line(first_line):
+            if not isinstance(channel, str):
+                raise ValueError("Multi-channel loading requires a CSV file with a CH1V,CH2V,...,tInc header")
+            # 简单格式（无表头，单列数据）：回到文件开头，第一行也是数据
+            f.seek(0)
+            column = 0
+        else:
+            channels = [channel] if isinstance(channel, str) else list(channel)
+            for name in channels:
+                if name not in CSV_CHANNELS:
+                    raise ValueError(f"Channel {name} does not exist in CSV file")
+            columns = [CSV_CHANNELS.index(name) for name in channels]
+            column = columns[0] if isinstance(channel, str) else columns
+
+        # 采样文件开头的一小段估计每行字节数，从而估计总行数
+        data_start = f.tell()
+        sample = f.read(1 << 16)
+        f.seek(data_start)
+        n_lines = max(sample.count(b'\n'), 1)
+        bytes_per_row = max(len(sample) / n_lines, 1.0)
+        remaining = os.fstat(f.fileno()).st_size - data_start
+        est_rows = int(remaining / bytes_per_row * 1.02) + 1
+
+        header_rate = int(1 / tinc) if tinc else None
+    except Exception:
+        f.close()
+        raise
+
+    return header_rate, est_rows, f, _iter_blocks(f, column, block_rows, dtype)
+
+
+def _iter_blocks(f, column, block_rows, dtype):
+    """
+    使用pandas的C解析器逐块读取单列数据（column为列号）并移除NaN值；
+    column为列号列表时产生(列数, 行数)的二维块，并移除任一列为NaN的行
+    """
+    import pandas as pd
+
+    columns = [column] if isinstance(column, int) else column
+    with f:
+        reader = pd.read_csv(
+            f,
+            header=None,
+            usecols=columns,
+            dtype={c: dtype for c in columns},
+            chunksize=block_rows,
+            engine='c'
+        )
+        with reader:
+            for chunk in reader:
+                if isinstance(column, int):
+                    block = chunk[column].to_numpy()
+                    block = block[~np.isnan(block)]
+                else:
+                    block = chunk[columns].to_numpy().T
+                    block = block[:, ~np.isnan(block).any(axis=0)]
+                if block.shape[-1]:
+                    yield block
+
+
+def _npy_header(dtype, n_points):
+    """
+    生成长度固定为NPY_HEADER_SIZE的一维.npy文件表头
+    """
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.dtype(dtype).str, n_points)
+    magic = np.lib.format.magic(1, 0)
+    pad = NPY_HEADER_SIZE - len(magic) - 2 - len(header) - 1
+    header_bytes = (header + ' ' * pad + '\n').encode('latin1')
+    return magic + struct.pack('<H', len(header_bytes)) + header_bytes
+
+
+def _stream_to_array(blocks, est_rows, dtype):
+    """
+    将数据块沿最后一个轴依次写入预分配的数组，估计不足时按1.5倍扩容（支持一维和(通道数, 行数)的二维块）
+    """
+    capacity = max(est_rows, 1)
+    data = None
+    n_points = 0
+
+    for block in blocks:
+        if data is None:
+            data = np.empty(block.shape[:-1] + (capacity,), dtype=dtype)
+        end = n_points + block.shape[-1]
+        if end > capacity:
+            capacity = max(end, int(capacity * 1.5))
+            grown = np.empty(block.shape[:-1] + (capacity,), dtype=dtype)
+            grown[..., :n_points] = data[..., :n_points]
+            data = grown
+        data[..., n_points:end] = block
+        n_points = end
+
+    if data is None:
+        return np.empty(0, dtype=dtype)
+
+    # 估计偏大较多时复制一份，释放多余的内存（二维时也保证返回连续数组）
+    if n_points < capacity * 0.9 or data.ndim > 1:
+        return data[..., :n_points].copy()
+    return data[:n_points]
+
+
+def _stream_to_npy(blocks, out_path, dtype):
+    """
+    将数据块顺序写入临时.npy文件，写完后原子替换到out_path，再以内存映射方式打开
+    （同时写同一路径的其他加载者已映射的文件不会被截断）
+    """
+    n_points = 0
+    tmp_path = unique_tmp_path(out_path)
+    try:
+        with open(tmp_path, 'wb') as out:
+            out.write(b'\0' * NPY_HEADER_SIZE)
+            for block in blocks:
+                out.write(memoryview(np.ascontiguousarray(block, dtype=dtype)))
+                n_points += len(block)
+            out.seek(0)
+            out.write(_npy_header(dtype, n_points))
+
+        if n_points == 0:
+            raise ValueError("No samples found in CSV file")
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return np.load(out_path, mmap_mode='r')
+
+
+def open_csv_blocks(file_path, channel='CH1V', block_rows=DEFAULT_BLOCK_ROWS, dtype=np.float32):
+    """
+    以数据块迭代器的形式读取CSV文件，用于流式处理
+
+    参数:
+        file_path (str): CSV文件路径
+        channel (str): 要读取的通道，'CH1V'或'CH2V'（简单格式文件忽略此参数）
+        block_rows (int): 每块的行数
+        dtype: 输出数据类型，np.float32或np.float64
+
+    返回:
+        header_rate (int): 由表头tInc计算出的采样率，表头中没有tInc时为None
+        blocks (generator): 逐块产生一维np.ndarray的生成器；文件在生成器启动时才打开，
+                            读完、出错或生成器被关闭/回收时关闭
+    """
+    # 这里只读取表头并检查通道；数据由生成器自己打开，调用方放弃生成器时不会留下打开的文件
+    header_rate, _, f, _ = _open_csv_stream(file_path, channel, block_rows, dtype)
+    f.close()
+
+    def blocks():
+        _, _, f, stream = _open_csv_stream(file_path, channel, block_rows, dtype)
+        with f:
+            yield from stream
+
+    return header_rate, blocks()
+
+
+@traced()
+def load_data_from_csv_chunked(file_path, sample_rate=None, channel='CH1V', dtype=np.float32,
+                               block_rows=DEFAULT_BLOCK_ROWS, out_path=None, use_cache=True,
+                               cache_dir=DEFAULT_CACHE_DIR, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES):
+    """
+    分块流式加载CSV文件中的单通道采样数据，内存占用与数据块大小相关而非文件大小
+
+    文件只打开一次：表头（若有）与数据在同一次读取中解析；只解析指定通道，
+    并直接写入预分配的数组，或在指定out_path时写入磁盘上的.npy文件并内存映射返回。
+    同时支持带tInc表头的双通道格式和无表头的单列简单格式。
+
+    启用缓存时，首次解析的结果直接写入缓存目录中的.npy旁路文件（以源文件路径、大小、
+    修改时间、通道、采样率和数据类型为键），之后的加载直接内存映射该文件，无需重新解析。
+
     参数:
         file_path (str): CSV文件路径
         sample_rate (int): 采样率，如果为None则从文件头读取，单位Hz
-        channel (str): 要读取的通道，'CH1V'或'CH2V'，默认'CH2V'
-        
+        channel (str): 要读取的通道，'CH1V'或'CH2V'（简单格式文件忽略此参数）
+        dtype: 输出数据类型，np.float32或np.float64，默认np.float32
+        block_rows (int): 每块解析的行数
+        out_path (str): 若指定，则将数据写入该.npy文件并以内存映射方式返回（不使用缓存）
+        use_cache (bool): 是否使用二进制旁路缓存，默认True
+        cache_dir (str): 缓存目录
+        cache_max_bytes (int): 缓存目录大小上限（字节），超出后按LRU淘汰
+
     返回:
         audio_data (np.ndarray): 音频时域信号
         sample_rate (int): 采样率
     """
+    key = None
     try:
-        # 读取文件头部信息
-        with open(file_path, 'r') as f:
-            header_line = f.readline()
-        
-        # 使用正则表达式提取 tInc
-        match_tinc = re.search(r'tInc\s*=\s*([-\d.e+]+)', header_line, re.IGNORECASE)
-        
-        if not match_tinc:
-            raise ValueError("Cannot find tInc in the CSV header.")
-        
-        tInc = float(match_tinc.group(1))
-        
-        # 计算采样率
-        if sample_rate is None:
-            sample_rate = int(1 / tInc)
-        
-        # 读取数据部分（跳过第一行表头）
-        df = pd.read_csv(
-            file_path,
-            skiprows=1,
-            usecols=[0, 1],
-            header=None,
-            names=['CH1V', 'CH2V']
-        )
-        
-        # 移除NaN值
-        df = df.dropna()
-        
-        # 提取指定通道的数据
-        if channel not in df.columns:
-            raise ValueError(f"Channel {channel} does not exist in CSV file")
-        
-        data = df[channel].values
+        start_time = time.perf_counter()
+
+        if use_cache and not out_path:
+            key, meta = sidecar_key(file_path, channel, sample_rate, dtype)
+            data, cached_meta = load_sidecar(key, cache_dir)
+            if data is not None:
+                sample_rate = cached_meta['sample_rate']
+                elapsed = time.perf_counter() - start_time
+                print(f"Loading (cached): {file_path}")
+                print(f"  Sample rate: {sample_rate / 1e6:.2f} MSa/s")
+                print(f"  Duration: {len(data) / sample_rate:.2f} seconds, {len(data)} samples")
+                print(f"  Memory-mapped in {elapsed * 1e3:.1f} ms")
+                return data, sample_rate
+            out_path = prepare_sidecar(key, cache_dir)
+
+        header_rate, est_rows, f, blocks = _open_csv_stream(file_path, channel, block_rows, dtype)
+        try:
+            if sample_rate is None:
+                if header_rate is None:
+                    raise ValueError("Cannot find tInc in the CSV header.")
+                sample_rate = header_rate
+
+            if out_path:
+                data = _stream_to_npy(blocks, out_path, dtype)
+            else:
+                data = _stream_to_array(blocks, est_rows, dtype)
+        finally:
+            # 生成器未启动时不会执行其中的with语句，需要在这里关闭文件
+            f.close()
+
+        if key is not None:
+            meta.update({'sample_rate': sample_rate, 'n_points': len(data)})
+            commit_sidecar(key, meta, cache_dir, cache_max_bytes)
+
+        elapsed = time.perf_counter() - start_time
         n_points = len(data)
         duration = n_points / sample_rate
-        
+        rows_per_sec = n_points / elapsed if elapsed > 0 else float('inf')
+
         print(f"Loading: {file_path}")
         print(f"  Sample rate: {sample_rate / 1e6:.2f} MSa/s")
         print(f"  Duration: {duration:.2f} seconds, {n_points} samples")
-        print(f"  Channel: {channel}")
-        
+        print(f"  Channel: {channel}" if header_rate else "  Format: Simple (no header, single column)")
+        print(f"  Parsed in {elapsed:.2f} s ({rows_per_sec / 1e6:.2f} M rows/s, {np.dtype(dtype).name})")
+
         return data, sample_rate
 
     except Exception as e:
+        if key is not None:
+            remove_entry(key, cache_dir)
         print(f"Error loading CSV file: {e}")
         return None, None
 
 
-def load_data_from_csv_simple(file_path, sample_rate):
+@traced()
+def load_channels_from_csv(file_path, sample_rate=None, channels=CSV_CHANNELS, dtype=np.float64,
+                           block_rows=DEFAULT_BLOCK_ROWS, use_cache=True,
+                           cache_dir=DEFAULT_CACHE_DIR, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES):
     """
-    从简单格式的CSV文件加载单通道采样数据（无表头，单列数据）
-    
+    在一次解析中加载带表头CSV文件的多个通道，返回shape为(通道数, 采样点数)的数组
+
+    与分别调用load_data_from_csv相比只读取、解析一次文件；启用缓存时整个二维数组写入一个.npy旁路文件。
+
     参数:
-        file_path (str): CSV文件路径
-        sample_rate (int): 采样率，单位Hz（例如：5e6表示5MSa/s）
-        
+        file_path (str): CSV文件路径（必须是带CH1V,CH2V,...,tInc表头的格式）
+        sample_rate (int): 采样率，如果为None则从文件头读取，单位Hz
+        channels (tuple): 要读取的通道名，默认CSV_CHANNELS（全部通道）
+        dtype: 输出数据类型，默认np.float64
+        block_rows (int): 每块解析的行数
+        use_cache (bool): 是否使用二进制旁路缓存，默认True
+        cache_dir (str): 缓存目录
+        cache_max_bytes (int): 缓存目录大小上限（字节），超出后按LRU淘汰
+
     返回:
-        audio_data (np.ndarray): 音频时域信号
+        channel_data (np.ndarray): 各通道时域信号，shape为(len(channels), n_points)
         sample_rate (int): 采样率
     """
+    channels = tuple(channels)
+    key = None
     try:
-        # 读取单列数据，无表头
-        df = pd.read_csv(
-            file_path,
-            header=None
-        )
-        
-        # 转换为numpy数组（取第一列）
-        data = df.iloc[:, 0].values
-        
-        # 移除NaN值
-        data = data[~np.isnan(data)]
-        
-        n_points = len(data)
-        duration = n_points / sample_rate
-        
+        start_time = time.perf_counter()
+
+        if use_cache:
+            key, meta = sidecar_key(file_path, '+'.join(channels), sample_rate, dtype)
+            data, cached_meta = load_sidecar(key, cache_dir)
+            if data is not None:
+                sample_rate = cached_meta['sample_rate']
+                print(f"Loading (cached): {file_path}")
+                print(f"  Channels: {', '.join(channels)}")
+                print(f"  Duration: {data.shape[-1] / sample_rate:.2f} seconds, {data.shape[-1]} samples")
+                print(f"  Memory-mapped in {(time.perf_counter() - start_time) * 1e3:.1f} ms")
+                return data, sample_rate
+
+        header_rate, est_rows, f, blocks = _open_csv_stream(file_path, channels, block_rows, dtype)
+        try:
+            if sample_rate is None:
+                if header_rate is None:
+                    raise ValueError("Cannot find tInc in the CSV header.")
+                sample_rate = header_rate
+
+            data = _stream_to_array(blocks, est_rows, dtype)
+        finally:
+            f.close()
+        if data.shape[-1] == 0:
+            raise ValueError("No samples found in CSV file")
+
+        if key is not None:
+            meta.update({'sample_rate': sample_rate, 'n_points': data.shape[-1]})
+            save_sidecar(key, data, meta, cache_dir, cache_max_bytes)
+
+        elapsed = time.perf_counter() - start_time
         print(f"Loading: {file_path}")
         print(f"  Sample rate: {sample_rate / 1e6:.2f} MSa/s")
-        print(f"  Duration: {duration:.2f} seconds, {n_points} samples")
-        print(f"  Format: Simple (no header, single column)")
-        
+        print(f"  Duration: {data.shape[-1] / sample_rate:.2f} seconds, {data.shape[-1]} samples")
+        print(f"  Channels: {', '.join(channels)}")
+        print(f"  Parsed in {elapsed:.2f} s ({data.shape[-1] / elapsed / 1e6:.2f} M rows/s, {np.dtype(dtype).name})")
+
         return data, sample_rate
 
     except Exception as e:
-        print(f"Error loading simple CSV file: {e}")
+        if key is not None:
+            remove_entry(key, cache_dir)
+        print(f"Error loading CSV file: {e}")
         return None, None
+
+
+def load_data_from_csv(file_path, sample_rate=None, channel='CH2V', use_cache=True):
+    """
+    从CSV文件加载单通道采样数据
+
+    参数:
+        file_path (str): CSV文件路径
+        sample_rate (int): 采样率，如果为None则从文件头读取，单位Hz
+        channel (str): 要读取的通道，'CH1V'或'CH2V'，默认'CH2V'
+        use_cache (bool): 是否使用二进制旁路缓存，默认True
+
+    返回:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 采样率
+    """
+    # 分块解析，只读取指定通道，表头与数据在同一次打开中读取
+    return load_data_from_csv_chunked(file_path, sample_rate, channel=channel, dtype=np.float64,
+                                      use_cache=use_cache)
+
+
+def load_data_from_csv_simple(file_path, sample_rate, use_cache=True, dtype=np.float64, channel='CH1V'):
+    """
+    从简单格式的CSV文件加载单通道采样数据（无表头，单列数据）；带tInc表头的双通道文件读取channel指定的通道
+
+    参数:
+        file_path (str): CSV文件路径
+        sample_rate (int): 采样率，单位Hz（例如：5e6表示5MSa/s）
+        use_cache (bool): 是否使用二进制旁路缓存，默认True
+        dtype: 输出数据类型，默认np.float64（np.float32时直接解析为float32，内存减半）
+        channel (str): 带表头文件要读取的通道，'CH1V'或'CH2V'（简单格式文件忽略此参数），默认'CH1V'
+
+    返回:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 采样率
+    """
+    # 分块解析，直接写入预分配数组，避免构建完整的DataFrame
+    return load_data_from_csv_chunked(file_path, sample_rate, channel=channel, dtype=dtype, use_cache=use_cache)
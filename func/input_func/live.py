@@ -0,0 +1,281 @@
+import io
+import os
+import socket
+import threading
+import time
+from queue import Queue, Empty, Full
+import numpy as np
+from func.input_func.csv_input import CSV_CHANNELS, _parse_tinc, _is_data_line
+
+DEFAULT_CHUNK_BYTES = 1 << 16  # 每次从数据源读取的最大字节数
+DEFAULT_QUEUE_BLOCKS = 64  # 读取线程与处理线程之间队列的容量（块数），队列满时等待或丢弃新块（见LiveReader）
+BINARY_FORMATS = {'f32': ('<f4', 1.0), 'i16': ('<i2', 1 / 32768)}  # 原始二进制采样格式: (dtype, 缩放系数)
+
+
+def follow_file(file_path, chunk_bytes=DEFAULT_CHUNK_BYTES, poll_interval=0.02, from_end=False, stop=None,
+                idle_timeout=None):
+    """
+    持续读取增长中的文件（类似tail -f），逐次产生新追加的字节
+
+    参数:
+        file_path (str): 文件路径
+        chunk_bytes (int): 每次读取的最大字节数
+        poll_interval (float): 没有新数据时的轮询间隔 (s)
+        from_end (bool): 是否从当前文件末尾开始（只显示之后追加的数据），默认False从头读取
+        stop (threading.Event): 置位时结束
+        idle_timeout (float): 超过该时间 (s) 没有新数据时结束，默认None表示一直等待
+
+    返回:
+        generator: 逐次产生bytes
+    """
+    with open(file_path, 'rb') as f:
+        if from_end:
+            f.seek(0, os.SEEK_END)
+        last_data = time.monotonic()
+        while stop is None or not stop.is_set():
+            data = f.read(chunk_bytes)
+            if data:
+                last_data = time.monotonic()
+                yield data
+                continue
+            # 文件被截断（采集重新开始）时从头读取
+            if os.fstat(f.fileno()).st_size < f.tell():
+                f.seek(0)
+                continue
+            if idle_timeout is not None and time.monotonic() - last_data > idle_timeout:
+                return
+            time.sleep(poll_interval)
+
+
+def read_pipe(stream, chunk_bytes=DEFAULT_CHUNK_BYTES, stop=None):
+    """
+    从管道或标准输入（二进制流）逐次读取已到达的字节，直到流结束
+    """
+    read = getattr(stream, 'read1', stream.read)
+    while stop is None or not stop.is_set():
+        data = read(chunk_bytes)
+        if not data:
+            return
+        yield data
+
+
+def read_socket(host, port, chunk_bytes=DEFAULT_CHUNK_BYTES, stop=None):
+    """
+    在本地TCP端口上监听，接受一个数据源连接并逐次产生收到的字节，直到对方关闭连接
+    """
+    with socket.create_server((host, port)) as server:
+        print(f"Waiting for a sample stream on tcp://{host}:{server.getsockname()[1]} ...")
+        server.settimeout(0.5)
+        while True:
+            if stop is not None and stop.is_set():
+                return
+            try:
+                connection, address = server.accept()
+                break
+            except socket.timeout:
+                continue
+    with connection:
+        print(f"Sample stream connected from {address[0]}:{address[1]}")
+        connection.settimeout(0.5)
+        while stop is None or not stop.is_set():
+            try:
+                data = connection.recv(chunk_bytes)
+            except socket.timeout:
+                continue
+            if not data:
+                return
+            yield data
+
+
+class _CsvParser:
+    """
+    把任意切分的CSV文本字节解析为采样块：保留不完整的最后一行；第一行为CH1V,CH2V,tInc表头时
+    从中读取采样率并选择通道列，否则按无表头的单列格式解析
+    """
+
+    def __init__(self, channel='CH1V'):
+        self.channel = channel
+        self.column = None
+        self.sample_rate = None
+        self.pending = b''
+
+    @property
+    def ready(self):
+        return self.column is not None
+
+    def feed(self, data):
+        data = self.pending + data
+        end = data.rfind(b'\n')
+        if end < 0:
+            self.pending = data
+            return np.empty(0)
+        lines, self.pending = data[:end + 1], data[end + 1:]
+
+        if self.column is None:
+            first, _, rest = lines.partition(b'\n')
+            text = first.decode('utf-8', errors='replace')
+            tinc = _parse_tinc(text)
+            if tinc is None and _is_data_line(text):
+                self.column = 0
+            else:
+                if self.channel not in CSV_CHANNELS:
+                    raise ValueError(f"Channel {self.channel} does not exist in CSV stream")
+                self.column = CSV_CHANNELS.index(self.channel)
+                self.sample_rate = 1 / tinc if tinc else None
+                lines = rest
+        if not lines.strip():
+            return np.empty(0)
+
+        import pandas as pd
+        frame = pd.read_csv(io.BytesIO(lines), header=None, usecols=[self.column], dtype=np.float64, engine='c')
+        block = frame[self.column].to_numpy()
+        return block[~np.isnan(block)]
+
+
+class _BinaryParser:
+    """
+    把原始二进制采样（小端float32或int16，可多通道交织）解析为所选通道的采样块
+    """
+
+    def __init__(self, fmt, channel_index=0, n_channels=1):
+        if fmt not in BINARY_FORMATS:
+            raise ValueError(f"Unsupported sample format: {fmt}")
+        dtype, self.scale = BINARY_FORMATS[fmt]
+        self.dtype = np.dtype(dtype)
+        self.channel_index = channel_index
+        self.n_channels = n_channels
+        self.frame_bytes = self.dtype.itemsize * n_channels
+        self.sample_rate = None
+        self.pending = b''
+        self.ready = True
+
+    def feed(self, data):
+        data = self.pending + data
+        usable = len(data) - len(data) % self.frame_bytes
+        self.pending = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype=self.dtype).reshape(-1, self.n_channels)
+        return samples[:, self.channel_index].astype(np.float64) * self.scale
+
+
+def open_live_chunks(source, chunk_bytes=DEFAULT_CHUNK_BYTES, from_end=False, stop=None, idle_timeout=None):
+    """
+    按source选择数据源：'-'为标准输入，'tcp://host:port'为本地TCP监听，其余为（增长中的）文件路径
+    """
+    if source == '-':
+        import sys
+        return read_pipe(sys.stdin.buffer, chunk_bytes, stop)
+    if source.startswith('tcp://'):
+        host, _, port = source[len('tcp://'):].rpartition(':')
+        return read_socket(host or '127.0.0.1', int(port), chunk_bytes, stop)
+    return follow_file(source, chunk_bytes, from_end=from_end, stop=stop, idle_timeout=idle_timeout)
+
+
+class LiveReader:
+    """
+    读取线程：从数据源读取字节、解析为采样块，放入有界队列。处理线程通过blocks()按顺序取块，
+    last_arrival为最近取出的块到达的时间。
+
+    队列满时的两种策略:
+    - drop=False（文件、标准输入等非实时数据源）: 等待处理线程取走（反压），不丢失样本；
+    - drop=True（套接字、--tail跟随）: 丢弃新到的块并计数，使延迟和内存都有上界。丢块后样本不再连续，
+      blocks()在丢块处结束当前一段，调用方重新开始流式处理（清空滤波器、STFT等状态），
+      不会把丢块前后的数据当作连续样本拼接起来计算。
+    """
+
+    def __init__(self, chunks, fmt='csv', channel='CH1V', channel_index=0, n_channels=1,
+                 queue_blocks=DEFAULT_QUEUE_BLOCKS, stop=None, drop=False):
+        self.chunks = chunks
+        self.parser = _CsvParser(channel) if fmt == 'csv' else _BinaryParser(fmt, channel_index, n_channels)
+        self.queue = Queue(maxsize=queue_blocks)
+        self.stop = stop if stop is not None else threading.Event()
+        self.drop = drop
+        self.ready = threading.Event()
+        self.error = None
+        self.finished = False  # 数据源已结束（结束标记已被blocks()取出）
+        self.last_arrival = None
+        self.counts = {'blocks': 0, 'samples': 0, 'dropped_blocks': 0, 'dropped_samples': 0, 'gaps': 0}
+        self._gap = False  # 下一个入队的块之前有丢弃的块
+        self._held = None  # blocks()在不连续处取出、留给下一段的块
+        self._thread = threading.Thread(target=self._run, name='live-reader', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """
+        等待数据源的第一行/第一块到达，返回表头中的采样率（没有时为None）
+        """
+        self.ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.parser.sample_rate
+
+    def _put(self, item):
+        """
+        阻塞入队（队列满时每0.1 s检查一次stop），stop置位时返回False
+        """
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            for data in self.chunks:
+                block = self.parser.feed(data)
+                if self.parser.ready:
+                    self.ready.set()
+                if not len(block):
+                    continue
+                self.counts['blocks'] += 1
+                self.counts['samples'] += len(block)
+                item = (time.perf_counter(), block, self._gap)
+                if not self.drop:
+                    if not self._put(item):
+                        break
+                    continue
+                try:
+                    self.queue.put_nowait(item)
+                    self._gap = False
+                except Full:
+                    self.counts['dropped_blocks'] += 1
+                    self.counts['dropped_samples'] += len(block)
+                    self._gap = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready.set()
+            # 结束标记；处理线程已停止时不等待
+            self._put(None)
+
+    def blocks(self):
+        """
+        按到达顺序产生一段连续的采样块：数据源结束、stop置位，或遇到丢块造成的不连续时返回。
+        不连续时再次调用blocks()从丢块之后的第一块开始新的一段；finished置位后不再有数据。
+        """
+        started = False
+        while not self.stop.is_set():
+            if self._held is not None:
+                item, self._held = self._held, None
+            else:
+                try:
+                    item = self.queue.get(timeout=0.1)
+                except Empty:
+                    continue
+            if item is None:
+                self.finished = True
+                break
+            arrival, block, gap = item
+            if gap and started:
+                self.counts['gaps'] += 1
+                self._held = (arrival, block, False)
+                return
+            started = True
+            self.last_arrival = arrival
+            yield block
+        if self.error is not None:
+            raise self.error
@@ -1,17 +1,282 @@
+import numpy as np
+from scipy import fft as sp_fft
 from func.analysis_func.demodulate import demodulate_hilbert
-from func.analysis_func.stft_librosa import analyze_audio_with_stft_librosa
-from func.analysis_func.stft_scipy import analyze_audio_with_stft_scipy
-from func.analysis_func.cwt_pywavelets import analyze_audio_with_cwt_pywt
-from func.input_func.csv_input import load_data_from_csv, load_data_from_csv_simple
+from func.analysis_func.decimate import decimate_for_analysis
+from func.analysis_func.registry import backend_entry, get_backend
+from func.analysis_func.filter import lowpass_filter
+from func.analysis_func.stft_stream import stream_stft
+from func.analysis_func.multichannel import analyze_channels
+from func.input_func.csv_input import load_data_from_csv, load_data_from_csv_simple, load_channels_from_csv
 from func.input_func.wav_input import load_audio_from_file
+from func.input_func.stream import iter_array_blocks
 from func.output_func.path import generate_output_path, export_to_wav
+from func.output_func.trace import traced, trace_run, write_trace, summary_table
+from func.output_func.tiles import DEFAULT_TILE_SIZE, write_tile_pyramid
+
+# 瓦片金字塔只接受分帧与stream_stft（librosa约定）一致的STFT后端
+TILE_STFT_LIBRARIES = ('librosa', 'native')
+# 瓦片金字塔的分块CWT每段功率的大小上限（字节）
+TILE_CWT_SEGMENT_BYTES = 64 * 1024 ** 2
+
+
+def load_signal(file_path, sample_rate=None, channel='CH1V', channels=None, demodulated=False, demod_method='fft',
+                dtype=None, wav_channel=None, offset=0.0, duration=None):
+    """
+    流水线的加载阶段（命令行、批处理与服务共用）：.wav文件按wav_channel、offset、duration加载（不解调），
+    其他文件按CSV加载channel指定的通道，或在一次解析中加载channels指定的多个通道，并可选地解调
+
+    参数:
+        file_path (str): CSV或WAV文件路径
+        sample_rate (int): CSV的采样率（None表示从文件头读取）或WAV重采样的目标采样率（None表示不重采样）
+        channels (tuple): CSV多通道模式下要加载的通道名，默认None表示只加载channel
+        dtype (str): 浮点精度，默认None表示CSV为float64、WAV为float32
+        其余参数同process_csv_file与process_wav_file
+
+    返回:
+        audio_data (np.ndarray): 时域信号，多通道时shape为(通道数, 采样点数)；加载失败时为None
+        sample_rate (int): 采样率；加载失败时为None
+    """
+    if file_path.lower().endswith('.wav'):
+        return load_audio_from_file(file_path, sample_rate, dtype=dtype or np.float32,
+                                    channel=wav_channel, offset=offset, duration=duration)
+
+    if channels:
+        # 一次解析加载全部所需通道，shape为(通道数, 采样点数)
+        audio_data, sample_rate = load_channels_from_csv(file_path, sample_rate, tuple(channels),
+                                                         dtype=dtype or np.float64)
+    else:
+        # 加载指定通道数据
+        audio_data, sample_rate = load_data_from_csv_simple(file_path, sample_rate, dtype=dtype or np.float64,
+                                                            channel=channel)
+    if audio_data is not None and demodulated:
+        print(f"Demodulating signal...")
+        audio_data = demodulate_hilbert(audio_data, method=demod_method)
+    return audio_data, sample_rate
+
+
+@traced()
+def analyze_signal(audio_data, sample_rate, save_path, n_fft, hop_length, win_length, window, n_mels,
+                   max_height, vmin=-80, filter_cutoff_freq=None, filter_order=5,
+                   library='librosa', transform_method='stft',
+                   wavelet='morl', scale_min=1, scale_max=128, scale_count=256, decimate=False,
+                   cwt_engine='fft', cwt_columns=None, cwt_pooling='mean', render='matplotlib', n_jobs=1,
+                   transform_cache=True, plot_mel=True, channels=None, cross_view=None):
+    """
+    对已加载的信号执行（可选的）抽取，并根据transform_method和library选择变换方法进行分析与绘图
+
+    参数:
+        audio_data (np.ndarray): 时域信号；(通道数, 采样点数)的多通道信号交给analyze_channels批量处理
+        sample_rate (int): 采样率
+        save_path (str): 图像保存路径
+        decimate (bool): 是否在变换前根据max_height和filter_cutoff_freq抽取信号，默认False
+        cwt_engine (str): CWT计算引擎，'fft'或'pywt'，默认'fft'
+        cwt_columns (int): 分块CWT输出的时间列数，默认None表示每个采样点一列
+        cwt_pooling (str): 分块CWT的池化方式，'mean'或'max'，默认'mean'
+        render (str): 出图方式，'matplotlib'、'raster'或'tiles'（多分辨率瓦片金字塔，见analyze_to_tiles），默认'matplotlib'
+        n_jobs (int): 单个信号按时间分片并行变换的进程数（librosa STFT与fft引擎CWT）或native STFT的FFT线程数，默认1
+        transform_cache (bool): 是否使用变换结果缓存（同一信号与参数重新出图时跳过变换），默认True
+        plot_mel (bool): librosa STFT时是否同时绘制Mel频谱图（复用同一STFT），默认True
+        channels (tuple): 多通道信号各行的通道名（仅多通道时使用）
+        cross_view (str): 多通道时的通道间对比图，None、'difference'或'coherence'，默认None
+        其余参数同process_csv_file
+    """
+    decimated = False
+    if decimate:
+        print("\nDecimating signal before transform...")
+        audio_data, params = decimate_for_analysis(
+            audio_data, sample_rate, max_height, n_fft, hop_length, win_length,
+            filter_cutoff_freq=filter_cutoff_freq, scale_min=scale_min, scale_max=scale_max
+        )
+        sample_rate = params['sample_rate']
+        n_fft, hop_length, win_length = params['n_fft'], params['hop_length'], params['win_length']
+        filter_cutoff_freq = params['filter_cutoff_freq']
+        scale_min, scale_max = params['scale_min'], params['scale_max']
+        decimated = params['factor'] > 1
+
+    if render == 'tiles':
+        analyze_to_tiles(
+            audio_data, sample_rate, save_path, n_fft, hop_length, win_length, window, max_height, vmin=vmin,
+            filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order, transform_method=transform_method,
+            library=library, wavelet=wavelet, scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
+            cwt_engine=cwt_engine, cwt_columns=cwt_columns, cwt_pooling=cwt_pooling,
+            transform_cache=transform_cache, channels=channels, decimated=decimated
+        )
+        return
+
+    if audio_data.ndim > 1:
+        analyze_channels(
+            audio_data, sample_rate, channels, save_path, n_fft, hop_length, win_length, window, n_mels,
+            max_height, vmin=vmin, filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
+            library=library, transform_method=transform_method,
+            wavelet=wavelet, scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
+            cwt_engine=cwt_engine, cwt_columns=cwt_columns, cwt_pooling=cwt_pooling, render=render, n_jobs=n_jobs,
+            use_cache=transform_cache, plot_mel=plot_mel, cross_view=cross_view, decimated=decimated
+        )
+        return
+
+    # 根据transform_method和library从登记表中选择变换方法（只导入所选后端）
+    entry = backend_entry(transform_method, library)
+    analyze = get_backend(transform_method, library)
+    if transform_method == 'cwt':
+        print(f"\nUsing {entry['label']} for CWT analysis...")
+        analyze(
+            audio_data, sample_rate, scales=None, wavelet=wavelet,
+            max_len=max_height, save_path=save_path, vmin=vmin,
+            filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
+            scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
+            engine=cwt_engine, n_columns=cwt_columns, pooling=cwt_pooling, render=render, n_jobs=n_jobs,
+            use_cache=transform_cache, decimated=decimated
+        )
+    else:
+        workers = f" ({n_jobs} FFT workers)" if library == 'native' else ''
+        print(f"\nUsing {entry['label']}{workers} for STFT analysis...")
+        options = {'n_mels': n_mels, 'n_jobs': n_jobs, 'plot_mel': plot_mel}
+        analyze(
+            audio_data, sample_rate, n_fft, hop_length, win_length,
+            max_len=max_height, window=window, save_path=save_path, vmin=vmin,
+            filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order, render=render,
+            use_cache=transform_cache, **{name: options[name] for name in entry['options']}
+        )
+
+
+@traced()
+def analyze_to_tiles(audio_data, sample_rate, save_path, n_fft, hop_length, win_length, window, max_height,
+                     vmin=-80, filter_cutoff_freq=None, filter_order=5, library='librosa', transform_method='stft',
+                     wavelet='morl', scale_min=1, scale_max=128, scale_count=256, cwt_engine='fft',
+                     cwt_columns=None, cwt_pooling='mean', transform_cache=True, channels=None,
+                     decimated=False, tile_size=DEFAULT_TILE_SIZE):
+    """
+    把频谱图/尺度图写成多分辨率瓦片金字塔（目录为save_path去掉'.png'后加'_tiles'）
+
+    STFT由stream_stft逐块产生幅度帧（分帧与librosa.stft一致，因此只接受library为'librosa'或'native'），
+    CWT由perform_cwt_blocked按时间段逐段计算（只支持'fft'引擎，cwt_columns与cwt_pooling的含义同分块CWT），
+    都增量写入金字塔，整个变换矩阵不会同时驻留内存。启用transform_cache时，结果在写金字塔的同时按块写入变换缓存，
+    命中时直接逐块读取缓存，跳过滤波与变换。多通道信号每个通道写一个金字塔，目录加'_<通道名>'后缀。
+
+    参数:
+        decimated (bool): 信号是否经过抽取（CWT去除高于奈奎斯特频率的尺度），默认False
+        tile_size (int): 瓦片边长，默认256
+        其余参数同analyze_signal
+
+    返回:
+        index_paths (list): 各金字塔索引文件的路径
+    """
+    if transform_method == 'cwt' and cwt_engine != 'fft':
+        raise ValueError(f"render='tiles' computes the CWT with the blocked 'fft' engine, "
+                         f"cwt_engine={cwt_engine!r} is not supported")
+    if transform_method == 'stft' and library not in TILE_STFT_LIBRARIES:
+        raise ValueError(f"render='tiles' streams librosa-compatible STFT frames, library={library!r} is not "
+                         f"supported (use one of {', '.join(TILE_STFT_LIBRARIES)})")
+
+    base = save_path[:-len('.png')] if save_path.endswith('.png') else save_path
+    signals = audio_data.reshape(-1, audio_data.shape[-1])
+    names = [f'_{name}' for name in channels] if audio_data.ndim > 1 and channels else [''] * len(signals)
+    if len(signals) > 1 and not channels:
+        names = [f'_ch{i}' for i in range(len(signals))]
+
+    index_paths = []
+    for x, name in zip(signals, names):
+        if transform_method == 'cwt':
+            from func.analysis_func.cwt_pywavelets import generate_scales
+            scales = generate_scales(sample_rate, wavelet, scale_min, scale_max, scale_count, decimated=decimated)
+            n_columns = int(min(cwt_columns or len(x), len(x)))
+            time_step = len(x) / n_columns / sample_rate
+            params = {'transform': 'cwt', 'wavelet': wavelet, 'scales': np.asarray(scales).tolist(),
+                      'n_columns': n_columns, 'pooling': cwt_pooling}
+            key_name = 'cwt_blocked'
+        else:
+            frequencies = sp_fft.rfftfreq(n_fft, 1 / sample_rate)
+            time_step = hop_length / sample_rate
+            params = {'transform': 'stft', 'n_fft': n_fft, 'hop_length': hop_length,
+                      'win_length': win_length, 'window': window}
+            key_name = 'stft_stream'
+
+        cached = None
+        if transform_cache:
+            from func.analysis_func.transform_cache import transform_key, iter_transform, save_transform_batches
+            key, meta = transform_key(x, sample_rate, key_name, filter_cutoff_freq=filter_cutoff_freq,
+                                      filter_order=filter_order,
+                                      **{k: v for k, v in params.items() if k != 'transform'})
+            cached = iter_transform(key)
+
+        if cached is not None:
+            print(f"\nTransform loaded from cache ({key[:12]}), streaming into the tile pyramid...")
+            frequencies, _, batches = cached
+        else:
+            if filter_cutoff_freq is not None:
+                print(f"\nApplying lowpass filter before tiling (cutoff: {filter_cutoff_freq} Hz)...")
+                x = lowpass_filter(x, sample_rate, filter_cutoff_freq, order=filter_order)
+            if transform_method == 'cwt':
+                batches, frequencies = _blocked_cwt_batches(x, sample_rate, scales, wavelet, n_columns,
+                                                            cwt_pooling, tile_size)
+            else:
+                print("\nStreaming STFT frames into the tile pyramid...")
+                # 每块约产生一列瓦片宽度的帧，分帧临时数组只有tile_size x n_fft
+                block_size = max(tile_size * hop_length, n_fft)
+                batches = stream_stft(iter_array_blocks(x, block_size), n_fft, hop_length, win_length, window)
+            if transform_cache:
+                batches = save_transform_batches(batches, key, meta, frequencies, time_step)
+
+        if transform_method == 'stft':
+            # 缓存与stream_stft都是幅度，金字塔使用功率
+            batches = (np.square(m, out=m) for m in batches)
+
+        index_paths.append(write_tile_pyramid(
+            batches, frequencies, time_step, f'{base}{name}_tiles', max_len=max_height, tile_size=tile_size,
+            vmin=vmin, sample_rate=sample_rate, filter_cutoff_freq=filter_cutoff_freq, **params
+        ))
+    return index_paths
+
+
+def _blocked_cwt_batches(x, sample_rate, scales, wavelet, n_columns, pooling, tile_size):
+    """
+    把n_columns列的分块CWT按时间段逐段计算（各段共用同一组列边界，结果与一次计算整段相同），
+    每段的功率约TILE_CWT_SEGMENT_BYTES，段宽为tile_size的整数倍
+
+    返回:
+        batches (generator): 逐段产生shape为(n_scales, 段宽)的功率
+        frequencies (np.ndarray): 各尺度对应的频率 (Hz)
+    """
+    import pywt
+    from func.analysis_func.cwt_pywavelets import perform_cwt_blocked
+
+    edges = np.linspace(0, len(x), n_columns + 1).astype(np.int64)
+    segment = max(tile_size, TILE_CWT_SEGMENT_BYTES // (4 * len(scales)) // tile_size * tile_size)
+    print(f"\nStreaming blocked CWT into the tile pyramid ({len(scales)} scales, {n_columns} columns, "
+          f"{pooling} pooling, {segment} columns per segment)...")
+    frequencies = pywt.scale2frequency(wavelet, scales) * sample_rate
+
+    def batches():
+        for start in range(0, n_columns, segment):
+            power, _, _ = perform_cwt_blocked(x, sample_rate, scales, wavelet, pooling=pooling, edges=edges,
+                                              span=(start, min(start + segment, n_columns)))
+            yield power
+
+    return batches(), frequencies
+
+
+def _finish_trace(run, save_path, trace_summary):
+    """
+    写出一次运行的trace文件（保存路径加'_trace.json'后缀）并按需打印汇总表
+    """
+    if run is None:
+        return
+    if save_path:
+        trace_path = write_trace(run, save_path.replace('.png', '_trace.json'))
+        print(f"\nTrace written to {trace_path}")
+    if trace_summary:
+        print('\n' + summary_table(run))
 
 
 def process_csv_file(sample_rate, n_fft, hop_length, win_length, window, n_mels,
                      max_height, channel='CH1V', demodulated=False, vmin=-80,
                      filter_cutoff_freq=None, filter_order=5,
                      library='librosa', transform_method='stft',
-                     wavelet='morl', scale_min=1, scale_max=128, scale_count=256):
+                     wavelet='morl', scale_min=1, scale_max=128, scale_count=256,
+                     decimate=False, cwt_engine='fft', cwt_columns=None, cwt_pooling='mean',
+                     demod_method='fft', render='matplotlib', n_jobs=1, transform_cache=True, plot_mel=True,
+                     channels=None, cross_view=None, dtype=None, trace=True, trace_summary=False, file_path=None,
+                     output_dir='data/output_data', output_prefix=''):
     """
     处理CSV格式的数据文件
 
@@ -25,85 +290,112 @@ def process_csv_file(sample_rate, n_fft, hop_length, win_length, window, n_mels,
         max_height (int): 最大频率高度
 
         channel (str): 要处理的通道，'CH1V'或'CH2V'
+        channels (tuple): 若指定（例如('CH1V', 'CH2V')），则在一次解析中加载这些通道，批量解调、滤波和变换，
+                          输出各通道图像（文件名加'_<通道名>'后缀），此时忽略channel；默认None表示单通道模式
+        cross_view (str): 多通道模式下的通道间对比图，None、'difference'（功率dB差）或'coherence'（幅度平方相干，
+                          仅STFT），文件名加'_<cross_view>'后缀，默认None
         demodulated (bool): 是否对指定通道执行解调操作，默认False
+        demod_method (str): 解调方法，'fft'（整段希尔伯特变换）或'fir'（分块FIR希尔伯特，内存O(块大小)），默认'fft'
         vmin (float): 颜色映射的最小值（dB），默认-80
         filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)，默认None表示不使用滤波
         filter_order (int): 低通滤波器阶数，默认5
 
-        library (str): STFT实现库选择，'librosa'或'scipy'，默认'librosa'（仅用于STFT）
+        library (str): STFT实现库选择，'librosa'、'scipy'、'native'（零拷贝分帧+多线程scipy.fft，float32，
+                       与librosa分帧一致）或'zoom'（只计算0~max_height的带限STFT），默认'librosa'（仅用于STFT）
         transform_method (str): 变换方法选择，'stft'或'cwt'，默认'stft'
 
         wavelet (str): 小波基函数（仅用于CWT），默认'morl'
         scale_min (int): 最小尺度值（仅用于CWT），默认1
         scale_max (int): 最大尺度值（仅用于CWT），默认128
         scale_count (int): 尺度数量（仅用于CWT），默认256
+
+        decimate (bool): 是否在变换前抽取信号至max_height所需的采样率，默认False
+        cwt_engine (str): CWT计算引擎（仅用于CWT），'fft'或'pywt'，默认'fft'
+        cwt_columns (int): 分块CWT输出的时间列数（仅用于CWT），默认None表示每个采样点一列
+        cwt_pooling (str): 分块CWT的池化方式（仅用于CWT），'mean'或'max'，默认'mean'
+        render (str): 出图方式，'matplotlib'（完整坐标轴与图例）、'raster'（查找表着色直接写PNG，批量导出用）
+                      或'tiles'（可缩放浏览的多分辨率瓦片金字塔，写到<图像名>_tiles目录），默认'matplotlib'
+        n_jobs (int): 按时间分片并行变换的进程数（librosa STFT与fft引擎CWT）或native STFT的FFT线程数，
+                      -1表示全部CPU，默认1
+        transform_cache (bool): 是否使用变换结果缓存（按信号内容与全部参数寻址，重新出图时跳过滤波与变换），默认True
+        plot_mel (bool): librosa STFT时是否同时绘制Mel频谱图（由同一STFT结果计算，输出文件名加'_mel'后缀），默认True
+        dtype (str): 整条流水线的浮点精度：'float32'时加载、解调、滤波、抽取与变换都保持float32，频谱为complex64，
+                     内存约减半（dB误差见benchmarks/bench_precision.py）；'float64'为双精度；
+                     默认None表示沿用加载函数的类型（CSV为float64，WAV为float32）
+        trace (bool): 是否记录各阶段的耗时、CPU时间、内存与数组形状，并写出trace event格式的JSON
+                      （保存路径加'_trace.json'后缀，可在chrome://tracing或Perfetto中查看），默认True
+        trace_summary (bool): 结束时是否打印各阶段汇总表（需要trace=True），默认False
+
+        file_path (str): CSV文件路径，默认None表示示例文件
+        output_dir (str): 图像输出目录，默认'data/output_data'
+        output_prefix (str): 输出文件名前缀（批量处理时用于区分不同输入），默认''
+
+    返回:
+        save_path (str): 频谱图保存路径（多通道模式下为各输出文件共同的基础路径），加载失败时返回None
     """
-    file_path = 'data/input_data/fs5e6_tswp500ms_t2s_demo.csv' #input("Path: ")
-
-    # 加载指定通道数据
-    audio_data, sample_rate = load_data_from_csv_simple(file_path, sample_rate)
-    
-    if audio_data is not None:
-        if demodulated:
-            print(f"Demodulating signal...")
-            audio_data = demodulate_hilbert(audio_data)
-            
-            # 导出解调后的音频为 WAV 文件
-            #print("\nExporting demodulated signal to WAV...")
-            #export_to_wav(audio_data, sample_rate, prefix=f"demodulated_{channel}")
+    if file_path is None:
+        file_path = 'data/input_data/fs5e6_tswp500ms_t2s_demo.csv' #input("Path: ")
 
-            if transform_method == 'cwt':
-                save_path = generate_output_path(
-                    prefix=f"demodulated_{channel}_cwt", extension="png"
-                )
-            else:
-                save_path = generate_output_path(
-                    prefix=f"demodulated_{channel}_stft", extension="png"
-                )
+    with trace_run('process_csv_file', enabled=trace, file=file_path, transform=transform_method,
+                   library=library) as run:
+        audio_data, sample_rate = load_signal(file_path, sample_rate, channel=channel, channels=channels,
+                                              demodulated=demodulated, demod_method=demod_method, dtype=dtype)
+        if channels:
+            channels = tuple(channels)
+            channel = '_'.join(channels)
+
+        save_path = None
+        if audio_data is not None:
+            if demodulated:
+                # 导出解调后的音频为 WAV 文件
+                #print("\nExporting demodulated signal to WAV...")
+                #export_to_wav(audio_data, sample_rate, prefix=f"demodulated_{channel}")
+
+                if transform_method == 'cwt':
+                    save_path = generate_output_path(
+                        prefix=f"{output_prefix}demodulated_{channel}_cwt", extension="png", output_dir=output_dir
+                    )
+                else:
+                    save_path = generate_output_path(
+                        prefix=f"{output_prefix}demodulated_{channel}_stft", extension="png", output_dir=output_dir
+                    )
 
-        else:
-            if transform_method == 'cwt':
-                save_path = generate_output_path(prefix=f"csv_{channel}_cwt", extension="png")
             else:
-                save_path = generate_output_path(prefix=f"csv_{channel}_stft", extension="png")
+                if transform_method == 'cwt':
+                    save_path = generate_output_path(prefix=f"{output_prefix}csv_{channel}_cwt", extension="png",
+                                                     output_dir=output_dir)
+                else:
+                    save_path = generate_output_path(prefix=f"{output_prefix}csv_{channel}_stft", extension="png",
+                                                     output_dir=output_dir)
 
-        # 根据transform_method选择变换方法
-        if transform_method == 'cwt':
-            print(f"\nUsing PyWavelets for CWT analysis...")
-            analyze_audio_with_cwt_pywt(
-                audio_data, sample_rate, scales=None, wavelet=wavelet,
-                max_len=max_height, save_path=save_path, vmin=vmin,
-                filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
-                scale_min=scale_min, scale_max=scale_max, scale_count=scale_count
+            analyze_signal(
+                audio_data, sample_rate, save_path, n_fft, hop_length, win_length, window, n_mels,
+                max_height, vmin=vmin, filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
+                library=library, transform_method=transform_method,
+                wavelet=wavelet, scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
+                decimate=decimate, cwt_engine=cwt_engine, cwt_columns=cwt_columns, cwt_pooling=cwt_pooling,
+                render=render, n_jobs=n_jobs, transform_cache=transform_cache, plot_mel=plot_mel,
+                channels=channels, cross_view=cross_view
             )
-        elif transform_method == 'stft':
-            # 根据library选择对应的STFT实现
-            if library == 'scipy':
-                print(f"\nUsing scipy.signal.ShortTimeFFT for STFT analysis...")
-                analyze_audio_with_stft_scipy(
-                    audio_data, sample_rate, n_fft, hop_length, win_length,
-                    max_height, window=window, save_path=save_path, vmin=vmin,
-                    filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
-                )
-            elif library == 'librosa':
-                print(f"\nUsing librosa for STFT analysis...")
-                analyze_audio_with_stft_librosa(
-                    audio_data, sample_rate, n_fft, hop_length, win_length,
-                    n_mels, max_height, window=window, save_path=save_path, vmin=vmin,
-                    filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
-                )
+
+    _finish_trace(run, save_path, trace_summary)
+    return save_path
 
 
 def process_wav_file(sample_rate, n_fft, hop_length, win_length, window, n_mels,
                      max_height, vmin=-80,
                      filter_cutoff_freq=None, filter_order=5,
                      library='librosa', transform_method='stft',
-                     wavelet='morl', scale_min=1, scale_max=128, scale_count=256):
+                     wavelet='morl', scale_min=1, scale_max=128, scale_count=256,
+                     decimate=False, cwt_engine='fft', cwt_columns=None, cwt_pooling='mean',
+                     render='matplotlib', n_jobs=1, transform_cache=True, plot_mel=True, dtype=None, trace=True,
+                     trace_summary=False, file_path=None, output_dir='data/output_data', output_prefix='',
+                     wav_channel=None, offset=0.0, duration=None):
     """
     处理WAV格式的音频文件
 
     参数:
-        sample_rate (int): 采样率
+        sample_rate (int): 重采样的目标采样率，None表示使用文件的原始采样率（PCM/浮点WAV直接内存映射，不解码整个文件）
         n_fft (int): FFT窗口大小（仅用于STFT）
         hop_length (int): 跳跃长度（仅用于STFT）
         win_length (int): 窗口长度（仅用于STFT）
@@ -115,46 +407,67 @@ def process_wav_file(sample_rate, n_fft, hop_length, win_length, window, n_mels,
         filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)，默认None表示不使用滤波
         filter_order (int): 低通滤波器阶数，默认5
 
-        library (str): STFT实现库选择，'librosa'或'scipy'，默认'librosa'（仅用于STFT）
+        library (str): STFT实现库选择，'librosa'、'scipy'、'native'（零拷贝分帧+多线程scipy.fft，float32，
+                       与librosa分帧一致）或'zoom'（只计算0~max_height的带限STFT），默认'librosa'（仅用于STFT）
         transform_method (str): 变换方法选择，'stft'或'cwt'，默认'stft'
 
         wavelet (str): 小波基函数（仅用于CWT），默认'morl'
         scale_min (int): 最小尺度值（仅用于CWT），默认1
         scale_max (int): 最大尺度值（仅用于CWT），默认128
         scale_count (int): 尺度数量（仅用于CWT），默认256
+
+        decimate (bool): 是否在变换前抽取信号至max_height所需的采样率，默认False
+        cwt_engine (str): CWT计算引擎（仅用于CWT），'fft'或'pywt'，默认'fft'
+        cwt_columns (int): 分块CWT输出的时间列数（仅用于CWT），默认None表示每个采样点一列
+        cwt_pooling (str): 分块CWT的池化方式（仅用于CWT），'mean'或'max'，默认'mean'
+        render (str): 出图方式，'matplotlib'（完整坐标轴与图例）、'raster'（查找表着色直接写PNG，批量导出用）
+                      或'tiles'（可缩放浏览的多分辨率瓦片金字塔，写到<图像名>_tiles目录），默认'matplotlib'
+        n_jobs (int): 按时间分片并行变换的进程数（librosa STFT与fft引擎CWT）或native STFT的FFT线程数，
+                      -1表示全部CPU，默认1
+        transform_cache (bool): 是否使用变换结果缓存（按信号内容与全部参数寻址，重新出图时跳过滤波与变换），默认True
+        plot_mel (bool): librosa STFT时是否同时绘制Mel频谱图（由同一STFT结果计算，输出文件名加'_mel'后缀），默认True
+        dtype (str): 整条流水线的浮点精度：'float32'时加载、解调、滤波、抽取与变换都保持float32，频谱为complex64，
+                     内存约减半（dB误差见benchmarks/bench_precision.py）；'float64'为双精度；
+                     默认None表示沿用加载函数的类型（CSV为float64，WAV为float32）
+        trace (bool): 是否记录各阶段的耗时、CPU时间、内存与数组形状，并写出trace event格式的JSON
+                      （保存路径加'_trace.json'后缀，可在chrome://tracing或Perfetto中查看），默认True
+        trace_summary (bool): 结束时是否打印各阶段汇总表（需要trace=True），默认False
+
+        file_path (str): WAV文件路径
+        output_dir (str): 图像输出目录，默认'data/output_data'
+        output_prefix (str): 输出文件名前缀（批量处理时用于区分不同输入），默认''
+        wav_channel (int): 通道序号（从0开始），默认None表示各通道平均为单声道
+        offset (float): 分析的起始时间 (s)，默认0
+        duration (float): 分析的时长 (s)，默认None表示到文件末尾
+
+    返回:
+        save_path (str): 频谱图保存路径，加载失败时返回None
     """
-    file_path = ''
-    audio_data, sample_rate = load_audio_from_file(file_path, sample_rate)
+    if file_path is None:
+        file_path = ''
+    with trace_run('process_wav_file', enabled=trace, file=file_path, transform=transform_method,
+                   library=library) as run:
+        audio_data, sample_rate = load_signal(file_path, sample_rate, dtype=dtype, wav_channel=wav_channel,
+                                              offset=offset, duration=duration)
 
-    if audio_data is not None:
-        # 自动生成输出路径
-        if transform_method == 'cwt':
-            save_path = generate_output_path(prefix="wav_cwt", extension="png")
-        else:
-            save_path = generate_output_path(prefix="wav_stft", extension="png")
-        
-        # 根据transform_method选择变换方法
-        if transform_method == 'cwt':
-            print(f"\nUsing PyWavelets for CWT analysis...")
-            analyze_audio_with_cwt_pywt(
-                audio_data, sample_rate, scales=None, wavelet=wavelet,
-                max_len=max_height, save_path=save_path, vmin=vmin,
-                filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
-                scale_min=scale_min, scale_max=scale_max, scale_count=scale_count
+        save_path = None
+        if audio_data is not None:
+            # 自动生成输出路径
+            if transform_method == 'cwt':
+                save_path = generate_output_path(prefix=f"{output_prefix}wav_cwt", extension="png",
+                                                 output_dir=output_dir)
+            else:
+                save_path = generate_output_path(prefix=f"{output_prefix}wav_stft", extension="png",
+                                                 output_dir=output_dir)
+
+            analyze_signal(
+                audio_data, sample_rate, save_path, n_fft, hop_length, win_length, window, n_mels,
+                max_height, vmin=vmin, filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
+                library=library, transform_method=transform_method,
+                wavelet=wavelet, scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
+                decimate=decimate, cwt_engine=cwt_engine, cwt_columns=cwt_columns, cwt_pooling=cwt_pooling,
+                render=render, n_jobs=n_jobs, transform_cache=transform_cache, plot_mel=plot_mel
             )
-        elif transform_method == 'stft':
-            # 根据library选择对应的STFT实现
-            if library == 'scipy':
-                print(f"\nUsing scipy.signal.ShortTimeFFT for STFT analysis...")
-                analyze_audio_with_stft_scipy(
-                    audio_data, sample_rate, n_fft, hop_length, win_length, max_height, 
-                    window=window, save_path=save_path, vmin=vmin,
-                    filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
-                )
-            elif library == 'librosa':
-                print(f"\nUsing librosa for STFT analysis...")
-                analyze_audio_with_stft_librosa(
-                    audio_data, sample_rate, n_fft, hop_length, win_length, n_mels, max_height, 
-                    window=window, save_path=save_path, vmin=vmin,
-                    filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order
-                )
\ No newline at end of file
+
+    _finish_trace(run, save_path, trace_summary)
+    return save_path
@@ -0,0 +1,23 @@
+import numpy as np
+
+
+DEFAULT_BLOCK_SIZE = 1 << 20  # 流式处理时每个数据块的采样点数
+
+
+def iter_array_blocks(audio_data, block_size=DEFAULT_BLOCK_SIZE, dtype=None):
+    """
+    把内存中的数组或内存映射数组(np.memmap)切分为连续的数据块
+
+    对内存映射数组只在访问每块时读入该块，配合流式处理可以保持内存占用为O(block_size)。
+
+    参数:
+        audio_data (np.ndarray): 一维时域信号
+        block_size (int): 每块的采样点数
+        dtype: 输出数据类型，默认None表示保持原类型
+
+    返回:
+        generator: 逐块产生一维np.ndarray
+    """
+    for start in range(0, len(audio_data), block_size):
+        block = audio_data[start:start + block_size]
+        yield np.asarray(block, dtype=dtype) if dtype is not None else np.asarray(block)
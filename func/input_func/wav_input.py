@@ -1,23 +1,256 @@
+import os
+import struct
+import time
 import librosa
 import numpy as np
+from func.input_func.cache import (DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES, sidecar_key,
+                                   load_sidecar, save_sidecar)
+from func.output_func.trace import traced
 
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
 
-def load_audio_from_file(file_path, sr=44100):
+# (格式, 每个采样的字节数) → (内存映射的numpy类型, 转换为[-1, 1)浮点的缩放系数)；
+# 24位PCM按uint8映射，转换时再拼成int32
+WAV_SAMPLE_TYPES = {
+    (WAVE_FORMAT_PCM, 1): ('u1', 1 / 128),
+    (WAVE_FORMAT_PCM, 2): ('<i2', 1 / 32768),
+    (WAVE_FORMAT_PCM, 3): ('u1', 1 / 8388608),
+    (WAVE_FORMAT_PCM, 4): ('<i4', 1 / 2147483648),
+    (WAVE_FORMAT_IEEE_FLOAT, 4): ('<f4', 1.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 8): ('<f8', 1.0),
+}
+
+# 转换为浮点时每块的帧数，限制整数中间结果占用的内存
+WAV_CONVERT_BLOCK = 1 << 20
+
+
+def read_wav_header(file_path):
+    """
+    解析WAV（RIFF或RF64）文件头，只读取各个块的头部，不读取采样数据
+
+    参数:
+        file_path (str): WAV文件路径
+
+    返回:
+        info (dict): format（WAVE_FORMAT_PCM或WAVE_FORMAT_IEEE_FLOAT）、n_channels、sample_rate、
+                     sample_bytes（每个采样的字节数）、data_offset（采样数据在文件中的偏移）、n_frames
+
+    不是WAV文件或是压缩编码（ADPCM、μ-law等）时抛出ValueError
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff not in (b'RIFF', b'RF64') or wave != b'WAVE':
+            raise ValueError(f"not a RIFF/WAVE file: {file_path}")
+
+        fmt = None
+        ds64_data_size = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"no data chunk in {file_path}")
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            chunk_start = f.tell()
+
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                audio_format, n_channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+                if audio_format == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    # 子格式GUID的前两个字节即格式代码
+                    audio_format = struct.unpack('<H', body[24:26])[0]
+                fmt = (audio_format, n_channels, sample_rate, block_align, bits)
+            elif chunk_id == b'ds64':
+                # RF64（超过4 GB）的真实数据长度在ds64块中，data块的长度字段为0xFFFFFFFF
+                ds64_data_size = struct.unpack('<QQ', f.read(16))[1]
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f"data chunk before fmt chunk in {file_path}")
+                data_size = ds64_data_size if riff == b'RF64' and ds64_data_size is not None else chunk_size
+                # 录音中断或仍在写入的文件，长度字段可能为0或超出文件末尾
+                if data_size == 0 or chunk_start + data_size > file_size:
+                    data_size = file_size - chunk_start
+                break
+
+            f.seek(chunk_start + chunk_size + (chunk_size & 1))
+
+    audio_format, n_channels, sample_rate, block_align, bits = fmt
+    sample_bytes = block_align // n_channels if n_channels else 0
+    if (audio_format, sample_bytes) not in WAV_SAMPLE_TYPES:
+        raise ValueError(f"unsupported WAV encoding in {file_path}: format 0x{audio_format:04x}, {bits} bits")
+    return {
+        'format': audio_format,
+        'n_channels': n_channels,
+        'sample_rate': sample_rate,
+        'sample_bytes': sample_bytes,
+        'data_offset': chunk_start,
+        'n_frames': data_size // block_align
+    }
+
+
+def open_wav_memmap(file_path):
+    """
+    以只读内存映射打开WAV的采样数据（不复制、不转换，只有实际访问到的页才会从磁盘读入）
+
+    参数:
+        file_path (str): WAV文件路径
+
+    返回:
+        frames (np.memmap): 形状为(n_frames, n_channels)的原始采样；24位PCM为(n_frames, n_channels, 3)的字节
+        info (dict): read_wav_header的返回值
+    """
+    info = read_wav_header(file_path)
+    if info['n_frames'] == 0:
+        raise ValueError(f"no samples in {file_path}")
+    raw_type = WAV_SAMPLE_TYPES[(info['format'], info['sample_bytes'])][0]
+    shape = (info['n_frames'], info['n_channels'])
+    if info['sample_bytes'] == 3:
+        shape += (3,)
+    frames = np.memmap(file_path, dtype=raw_type, mode='r', offset=info['data_offset'], shape=shape)
+    return frames, info
+
+
+def _convert_samples(raw, info, dtype):
+    """
+    把一段原始采样（一个通道）转换为[-1, 1)范围的浮点数
+    """
+    scale = WAV_SAMPLE_TYPES[(info['format'], info['sample_bytes'])][1]
+    if info['sample_bytes'] == 3:
+        # 小端24位: 低、中字节无符号，高字节带符号
+        values = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8)
+                  | (raw[:, 2].view(np.int8).astype(np.int32) << 16))
+    elif info['sample_bytes'] == 1:
+        # 8位PCM为无符号，中点128
+        values = raw.astype(np.int16) - 128
+    else:
+        values = raw
+    out = values.astype(dtype)
+    if scale != 1.0:
+        out *= scale
+    return out
+
+
+@traced()
+def load_wav_range(file_path, channel=None, offset=0.0, duration=None, dtype=np.float32):
+    """
+    内存映射读取WAV文件，只把所选通道和时间范围转换为浮点，采样率保持文件原始采样率
+
+    支持8/16/24/32位整数PCM和32/64位浮点（包括WAVE_FORMAT_EXTENSIBLE与RF64）。打开文件只解析文件头，
+    与文件大小无关；单声道浮点WAV且dtype一致时直接返回内存映射视图，不复制数据。
+
+    参数:
+        file_path (str): WAV文件路径
+        channel (int): 通道序号（从0开始），默认None表示各通道平均为单声道（与librosa.load一致）
+        offset (float): 起始时间 (s)，默认0
+        duration (float): 读取时长 (s)，默认None表示读到文件末尾
+        dtype: 输出数据类型，默认np.float32
+
+    返回:
+        audio_data (np.ndarray): 音频时域信号
+        sample_rate (int): 文件的原始采样率
+    """
+    frames, info = open_wav_memmap(file_path)
+    sample_rate, n_channels = info['sample_rate'], info['n_channels']
+    if channel is not None and not 0 <= channel < n_channels:
+        raise ValueError(f"channel {channel} out of range: {file_path} has {n_channels} channel(s)")
+
+    start = min(int(round(offset * sample_rate)), info['n_frames'])
+    stop = info['n_frames'] if duration is None else min(start + int(round(duration * sample_rate)),
+                                                         info['n_frames'])
+    channels = [channel] if channel is not None else list(range(n_channels))
+    dtype = np.dtype(dtype)
+
+    if n_channels == 1 and frames.dtype == dtype:
+        # 单声道且类型一致（浮点WAV）：无需转换，直接返回连续的映射视图
+        return frames[start:stop, 0], sample_rate
+
+    audio_data = np.empty(stop - start, dtype=dtype)
+    for block_start in range(start, stop, WAV_CONVERT_BLOCK):
+        block_stop = min(block_start + WAV_CONVERT_BLOCK, stop)
+        out = audio_data[block_start - start:block_stop - start]
+        out[:] = _convert_samples(frames[block_start:block_stop, channels[0]], info, dtype)
+        for c in channels[1:]:
+            out += _convert_samples(frames[block_start:block_stop, c], info, dtype)
+        if len(channels) > 1:
+            out /= len(channels)
+    return audio_data, sample_rate
+
+
+def _wav_header_or_none(file_path):
+    """
+    可以直接内存映射的WAV（PCM或浮点编码）返回文件头信息，否则返回None
+    """
+    try:
+        return read_wav_header(file_path)
+    except (ValueError, struct.error, OSError):
+        return None
+
+
+@traced()
+def load_audio_from_file(file_path, sr=None, use_cache=True, cache_dir=DEFAULT_CACHE_DIR,
+                         cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, dtype=np.float32,
+                         channel=None, offset=0.0, duration=None):
     """
     从文件加载音频数据
-    
+
+    PCM/浮点WAV且不需要重采样时，直接内存映射文件中的采样数据，只转换所选通道和时间范围（见load_wav_range），
+    加载耗时与文件大小无关。需要重采样或不是WAV（压缩编码、其他格式）时用librosa解码；启用缓存时，
+    解码（及重采样）的结果会写入缓存目录中的.npy旁路文件，之后的加载直接内存映射该文件。
+
     参数:
         file_path (str): 音频文件路径
-        sr (int): 采样率，默认44100Hz
-        
+        sr (int): 目标采样率，默认None表示使用文件的原始采样率（不重采样）
+        use_cache (bool): 是否使用二进制旁路缓存（仅用于需要解码或重采样的情况），默认True
+        cache_dir (str): 缓存目录
+        cache_max_bytes (int): 缓存目录大小上限（字节），超出后按LRU淘汰
+        dtype: 输出数据类型，默认np.float32
+        channel (int): 通道序号（从0开始），默认None表示各通道平均为单声道
+        offset (float): 起始时间 (s)，默认0
+        duration (float): 读取时长 (s)，默认None表示读到文件末尾
+
     返回:
         audio_data (np.ndarray): 音频时域信号
         sample_rate (int): 采样率
     """
     try:
-        # 使用librosa加载音频文件
-        audio_data, sample_rate = librosa.load(file_path, sr=sr)
+        start_time = time.perf_counter()
+        wav_info = _wav_header_or_none(file_path)
+
+        if wav_info is not None and (sr is None or sr == wav_info['sample_rate']):
+            audio_data, sample_rate = load_wav_range(file_path, channel, offset, duration, dtype=dtype)
+            elapsed = time.perf_counter() - start_time
+            print(f"Loading (memory-mapped): {file_path}, {sample_rate} Hz, "
+                  f"{len(audio_data)/sample_rate:.2f} seconds in {elapsed * 1e3:.1f} ms")
+            return audio_data, sample_rate
+
+        if use_cache:
+            key, meta = sidecar_key(file_path, [channel, offset, duration], sr, dtype)
+            audio_data, cached_meta = load_sidecar(key, cache_dir)
+            if audio_data is not None:
+                sample_rate = cached_meta['sample_rate']
+                elapsed = time.perf_counter() - start_time
+                print(f"Loading (cached): {file_path}, {sample_rate} Hz, {len(audio_data)/sample_rate:.2f} seconds, "
+                      f"memory-mapped in {elapsed * 1e3:.1f} ms")
+                return audio_data, sample_rate
+
+        if wav_info is not None:
+            # 只重采样所选的通道与时间范围
+            audio_data, sample_rate = load_wav_range(file_path, channel, offset, duration, dtype=dtype)
+            audio_data = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=sr).astype(dtype, copy=False)
+            sample_rate = sr
+        else:
+            # 使用librosa解码其他格式
+            audio_data, sample_rate = librosa.load(file_path, sr=sr, mono=channel is None, offset=offset,
+                                                   duration=duration, dtype=dtype)
+            if audio_data.ndim > 1:
+                audio_data = audio_data[channel]
         print(f"Loading: {file_path}, {sample_rate} Hz, {len(audio_data)/sample_rate:.2f} seconds")
+
+        if use_cache:
+            meta.update({'sample_rate': int(sample_rate), 'n_points': len(audio_data)})
+            save_sidecar(key, audio_data, meta, cache_dir, cache_max_bytes)
+
         return audio_data, sample_rate
 
     except Exception as e:
@@ -1,27 +1,25 @@
 import os
 from datetime import datetime
 import numpy as np
-from scipy.io import wavfile
 
 
-def generate_output_path(prefix="spectrogram", extension="png"):
+def generate_output_path(prefix="spectrogram", extension="png", output_dir="data/output_data"):
     """
     生成带时间戳的输出文件路径
 
     参数:
         prefix (str): 文件名前缀
         extension (str): 文件扩展名
+        output_dir (str): 输出目录，默认'data/output_data'
 
     返回:
         str: 完整的输出路径
     """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"{prefix}_{timestamp}.{extension}"
-    output_dir = "data/output_data"
 
-    # 确保输出目录存在
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    # 确保输出目录存在（多个进程可能同时创建）
+    os.makedirs(output_dir, exist_ok=True)
 
     return os.path.join(output_dir, filename)
 
@@ -48,6 +46,7 @@ def export_to_wav(audio_data, sample_rate, prefix="demodulated"):
     audio_int16 = np.int16(audio_normalized * 32767)
     
     # 保存为 WAV 文件
+    from scipy.io import wavfile
     wavfile.write(output_path, sample_rate, audio_int16)
     
     print(f"Demodulated audio saved to: {output_path}")
@@ -0,0 +1,211 @@
+import json
+import os
+import shutil
+import numpy as np
+from func.plot_func.raster import db_to_rgb, write_png
+from func.output_func.trace import traced
+
+DEFAULT_TILE_SIZE = 256  # 瓦片的边长（像素/数据单元）
+INDEX_NAME = 'index.json'
+
+
+def tile_path(out_dir, level, row, col, extension='npy'):
+    """
+    瓦片文件路径：{out_dir}/{level}/{row}_{col}.{extension}
+    """
+    return os.path.join(out_dir, str(level), f'{row}_{col}.{extension}')
+
+
+def _pool_pairs(block, axis):
+    """
+    沿axis把相邻两个单元取最大值（奇数长度时最后一个单元单独成组）
+    """
+    block = np.moveaxis(block, axis, 0)
+    n = len(block)
+    pooled = np.maximum(block[0:n - 1:2], block[1:n:2])
+    if n % 2:
+        pooled = np.concatenate((pooled, block[-1:]))
+    return np.moveaxis(pooled, 0, axis)
+
+
+class _Level:
+    """
+    金字塔的一层：缓存不足一列瓦片宽度的数据列，凑满后写出这一列瓦片
+    """
+
+    def __init__(self, level, n_rows, tile_size, out_dir):
+        self.level = level
+        self.n_rows = n_rows
+        self.tile_size = tile_size
+        self.out_dir = out_dir
+        self.buffer = np.empty((n_rows, tile_size), dtype=np.float32)
+        self.filled = 0
+        self.n_cols = 0
+        os.makedirs(os.path.join(out_dir, str(level)), exist_ok=True)
+
+    def append(self, columns):
+        """
+        追加数据列，返回每写满一列瓦片后2x2池化得到的上一层数据
+        """
+        pooled = []
+        while columns.shape[1]:
+            take = min(self.tile_size - self.filled, columns.shape[1])
+            self.buffer[:, self.filled:self.filled + take] = columns[:, :take]
+            self.filled += take
+            columns = columns[:, take:]
+            if self.filled == self.tile_size:
+                pooled.append(self.flush())
+        return pooled
+
+    def flush(self):
+        """
+        写出缓冲区中的瓦片列（可能不足瓦片宽度），返回2x2池化后的数据
+        """
+        data = self.buffer[:, :self.filled]
+        tile_col = self.n_cols // self.tile_size
+        for tile_row, start in enumerate(range(0, self.n_rows, self.tile_size)):
+            np.save(tile_path(self.out_dir, self.level, tile_row, tile_col), data[start:start + self.tile_size])
+        self.n_cols += self.filled
+        self.filled = 0
+        return _pool_pairs(_pool_pairs(data, 1), 0)
+
+    def describe(self):
+        return {
+            'level': self.level,
+            'scale': 2 ** self.level,
+            'n_rows': self.n_rows,
+            'n_cols': self.n_cols,
+            'n_tile_rows': -(-self.n_rows // self.tile_size),
+            'n_tile_cols': -(-self.n_cols // self.tile_size)
+        }
+
+
+def _feed(levels, level, columns, tile_size, out_dir):
+    """
+    把数据列送入第level层，写满的瓦片列池化后逐层向上传递（按需创建上一层）
+    """
+    if level == len(levels):
+        levels.append(_Level(level, columns.shape[0], tile_size, out_dir))
+    for pooled in levels[level].append(columns):
+        _feed(levels, level + 1, pooled, tile_size, out_dir)
+
+
+@traced()
+def write_tile_pyramid(batches, frequencies, time_step, out_dir, max_len=None, tile_size=DEFAULT_TILE_SIZE,
+                       time_start=0.0, png=True, vmin=-80, cmap='jet', **attrs):
+    """
+    把逐批产生的功率矩阵增量写成多分辨率瓦片金字塔，并写出索引文件
+
+    第0层为原始分辨率，第l层的每个单元是第0层2^l x 2^l个单元的最大值（功率域池化），
+    逐层减半直到整层只有一块瓦片。每层只缓存一列瓦片宽度的数据，整个矩阵不会同时驻留内存。
+    瓦片按图像方向存放：第0行为最高频率，时间从左到右。
+    第l层第(row, col)块瓦片覆盖第l层的数据行[row * tile_size, (row + 1) * tile_size)与
+    数据列[col * tile_size, (col + 1) * tile_size)，第l层的第i行/列对应第0层的[i * 2^l, (i + 1) * 2^l)。
+
+    参数:
+        batches (iterable): 逐批产生shape为(len(frequencies), 列数)的功率矩阵，按时间顺序
+        frequencies (np.ndarray): 各行对应的频率（升序或降序）
+        time_step (float): 相邻两列的时间间隔 (s)
+        out_dir (str): 输出目录；已存在的旧金字塔会被替换
+        max_len (float): 最大显示频率，超出的行不写出，默认None表示全部
+        tile_size (int): 瓦片边长，默认256
+        time_start (float): 第0列的时间 (s)，默认0
+        png (bool): 是否同时为每块瓦片写出着色PNG（0 dB为整个金字塔的最大功率），默认True
+        vmin (float): PNG颜色映射的最小值（dB），默认-80
+        cmap (str): PNG颜色映射名称，默认'jet'
+        attrs: 写入索引文件的其他参数（如采样率、变换参数）
+
+    返回:
+        index_path (str): 索引文件路径
+    """
+    frequencies = np.asarray(frequencies)
+    kept = np.flatnonzero(frequencies <= max_len) if max_len is not None else np.arange(len(frequencies))
+    if not len(kept):
+        raise ValueError(f"No frequencies below max_len={max_len}")
+    # 频率单调，保留的行是连续的一段；升序时倒序取行使最高频率在上（切片视图，不复制）
+    low, high = kept[0], kept[-1] + 1
+    if frequencies[0] <= frequencies[-1]:
+        select = slice(high - 1, low - 1 if low else None, -1)
+    else:
+        select = slice(low, high)
+
+    if os.path.exists(os.path.join(out_dir, INDEX_NAME)):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    levels = []
+    max_power = 0.0
+    for batch in batches:
+        columns = np.asarray(batch)[select]
+        if columns.shape[1]:
+            max_power = max(max_power, float(np.max(columns)))
+            _feed(levels, 0, columns, tile_size, out_dir)
+    if not levels:
+        raise ValueError("No columns to write")
+
+    # 自下而上写出各层不足一列瓦片的剩余数据，到整层只有一块瓦片为止
+    level = 0
+    while True:
+        if levels[level].filled:
+            pooled = levels[level].flush()
+        else:
+            pooled = None
+        if levels[level].n_cols <= tile_size and levels[level].n_rows <= tile_size:
+            break
+        if pooled is not None:
+            _feed(levels, level + 1, pooled, tile_size, out_dir)
+        level += 1
+
+    # 提前写满瓦片而产生的多余上层
+    for extra in levels[level + 1:]:
+        shutil.rmtree(os.path.join(out_dir, str(extra.level)))
+    levels = levels[:level + 1]
+
+    if png:
+        render_tile_pngs(out_dir, levels, max_power, vmin=vmin, cmap=cmap)
+
+    infos = [lv.describe() for lv in levels]
+    index = {
+        'tile_size': tile_size,
+        'value': 'power',
+        'pooling': 'max',
+        'dtype': 'float32',
+        'max_power': max_power,
+        'time_start': time_start,
+        'time_step': time_step,
+        'frequencies': frequencies[select].tolist(),
+        'levels': infos,
+        'png': png,
+        'vmin': vmin,
+        'cmap': cmap
+    }
+    index.update(attrs)
+
+    index_path = os.path.join(out_dir, INDEX_NAME)
+    with open(index_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    n_tiles = sum(info['n_tile_rows'] * info['n_tile_cols'] for info in infos)
+    print(f"Tile pyramid written to {out_dir}: {len(levels)} levels, {n_tiles} tiles")
+    return index_path
+
+
+def render_tile_pngs(out_dir, levels, max_power, vmin=-80, cmap='jet'):
+    """
+    逐块读取已写出的功率瓦片，按相对max_power的dB着色写出同名PNG
+    """
+    ref_db = 10 * np.log10(max(max_power, 1e-12))
+    for lv in levels:
+        info = lv.describe()
+        for row in range(info['n_tile_rows']):
+            for col in range(info['n_tile_cols']):
+                power = np.load(tile_path(out_dir, lv.level, row, col))
+                power_db = 10 * np.log10(np.maximum(power, 1e-12)) - ref_db
+                write_png(tile_path(out_dir, lv.level, row, col, 'png'), db_to_rgb(power_db, vmin=vmin, cmap=cmap))
+
+
+def load_tile_index(out_dir):
+    """
+    读取金字塔的索引文件
+    """
+    with open(os.path.join(out_dir, INDEX_NAME), 'r') as f:
+        return json.load(f)
@@ -0,0 +1,290 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# 当前记录中的Trace，为None时span/traced不做任何记录；与区间栈一样按线程（上下文）隔离，
+# 服务等多线程进程中一个线程的记录不会混入其他线程的区间
+_active = contextvars.ContextVar('active_trace', default=None)
+_local = threading.local()
+
+
+def _rss_mb():
+    """
+    当前常驻内存 (MB)，只在Linux上通过/proc读取，其他平台返回None
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb():
+    """
+    进程峰值常驻内存 (MB)；Linux上ru_maxrss单位为KB，macOS上为字节
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak * 1024 / 1e6
+
+
+def describe(value):
+    """
+    记录数组的形状与类型；元组/列表中的数组逐个记录，其他值返回None
+    """
+    if isinstance(value, np.ndarray):
+        return {'shape': list(value.shape), 'dtype': value.dtype.name}
+    if isinstance(value, (tuple, list)):
+        arrays = [describe(v) for v in value if isinstance(v, np.ndarray)]
+        return arrays or None
+    return None
+
+
+class Span:
+    """
+    一个计时区间，可在区间内补充属性或记录输出
+    """
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def output(self, value):
+        self.attrs['outputs'] = describe(value)
+        return value
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+    def output(self, value):
+        return value
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """
+    一次运行中记录的所有区间（trace event格式的完整事件'X'与内存计数器'C'）
+    """
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.events = []
+        self.start = time.perf_counter()
+        self.started = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.pid = os.getpid()
+
+    def _timestamp(self, t):
+        return (t - self.start) * 1e6  # 微秒
+
+    def record(self, span, depth, start, end, cpu_seconds):
+        rss, peak = _rss_mb(), _peak_rss_mb()
+        args = dict(span.attrs, cpu_ms=round(cpu_seconds * 1e3, 3), depth=depth)
+        if rss is not None:
+            args['rss_mb'] = round(rss, 1)
+        if peak is not None:
+            args['peak_rss_mb'] = round(peak, 1)
+
+        tid = threading.get_ident()
+        self.events.append({'name': span.name, 'ph': 'X', 'ts': self._timestamp(start),
+                            'dur': (end - start) * 1e6, 'pid': self.pid, 'tid': tid, 'args': args})
+        if rss is not None:
+            self.events.append({'name': 'memory', 'ph': 'C', 'ts': self._timestamp(end), 'pid': self.pid,
+                                'args': {'rss_mb': round(rss, 1)}})
+
+    def spans(self):
+        return [e for e in self.events if e['ph'] == 'X']
+
+
+def start_trace(name, **attrs):
+    """
+    开始在当前线程（上下文）中记录一次运行（同时只有一个活动的Trace，新的会替换旧的）
+    """
+    trace = Trace(name, **attrs)
+    _active.set(trace)
+    return trace
+
+
+def stop_trace():
+    """
+    停止当前线程（上下文）中的记录，返回记录完成的Trace（没有活动的Trace时返回None）
+    """
+    trace = _active.get()
+    _active.set(None)
+    return trace
+
+
+@contextlib.contextmanager
+def trace_run(name, enabled=True, **attrs):
+    """
+    在with块内记录一次运行，整个运行本身也是最外层的区间；enabled为False时产生None且不做任何记录
+
+    用法:
+        with trace_run('process_csv_file', file=path) as trace:
+            ...
+        write_trace(trace, 'run_trace.json')
+    """
+    if not enabled:
+        yield None
+        return
+
+    trace = start_trace(name, **attrs)
+    try:
+        with span(name, **attrs):
+            yield trace
+    finally:
+        if _active.get() is trace:
+            stop_trace()
+
+
+@contextlib.contextmanager
+def span(name, inputs=None, **attrs):
+    """
+    记录一个嵌套区间的墙钟时间、CPU时间、结束时的常驻内存/峰值常驻内存，以及输入输出数组的形状与类型
+
+    没有活动的Trace时只产生一个空操作对象，开销可以忽略（可以一直保留在代码中）。
+    峰值常驻内存是进程级的高水位（单调不减），某区间的值明显高于其前一区间时说明峰值发生在该区间内。
+    CPU时间只统计当前进程，按时间分片并行时工作进程的CPU时间不计入（墙钟时间远大于CPU时间）。
+
+    参数:
+        name (str): 区间名称
+        inputs: 输入数组（或数组的字典/元组），只记录形状与类型
+        attrs: 额外记录的属性（需可JSON序列化）
+
+    返回:
+        Span: 可调用set(**attrs)补充属性、output(value)记录输出
+    """
+    trace = _active.get()
+    if trace is None:
+        yield _NULL_SPAN
+        return
+
+    if inputs is not None:
+        attrs['inputs'] = ({k: describe(v) for k, v in inputs.items()} if isinstance(inputs, dict)
+                           else describe(inputs))
+    current = Span(name, attrs)
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+
+    depth = len(stack)
+    stack.append(current)
+    start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end, cpu_end = time.perf_counter(), time.process_time()
+        stack.pop()
+        # 记录期间Trace可能已经被替换，此时丢弃该区间
+        if _active.get() is trace:
+            trace.record(current, depth, start, end, cpu_end - cpu_start)
+
+
+def traced(name=None):
+    """
+    函数装饰器：调用时记录为一个区间，位置参数与关键字参数中的数组作为输入，返回值作为输出
+
+    参数:
+        name (str): 区间名称，默认使用函数名
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+        code = func.__code__
+        arg_names = code.co_varnames[:code.co_argcount]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active.get() is None:
+                return func(*args, **kwargs)
+
+            inputs = {k: v for k, v in zip(arg_names, args) if isinstance(v, np.ndarray)}
+            inputs.update((k, v) for k, v in kwargs.items() if isinstance(v, np.ndarray))
+            with span(span_name, inputs=inputs or None) as current:
+                return current.output(func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def write_trace(trace, path):
+    """
+    把Trace写为trace event格式的JSON（可在chrome://tracing或Perfetto中打开）
+
+    返回:
+        path (str): 写出的路径
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    report = {
+        'traceEvents': trace.events,
+        'displayTimeUnit': 'ms',
+        'otherData': dict(trace.attrs, name=trace.name, pid=trace.pid, started=trace.started)
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, default=str)
+
+    return path
+
+
+def _format_shape(described):
+    if isinstance(described, list):
+        described = described[0] if described else None
+    if not described:
+        return ''
+    return f"{'x'.join(str(n) for n in described['shape'])} {described['dtype']}"
+
+
+def summary_table(trace):
+    """
+    按区间名称与嵌套深度汇总（同名同深度的区间合并），每个阶段一行：调用次数、墙钟时间、CPU时间、峰值常驻内存与输出形状
+
+    返回:
+        table (str): 按首次开始时间排序、按嵌套深度缩进的文本表格
+    """
+    rows = {}
+    for event in sorted(trace.spans(), key=lambda e: e['ts']):
+        args = event['args']
+        # 同名区间按嵌套深度分开汇总，递归调用（例如多通道逐通道计算）不会重复计时
+        row = rows.setdefault((event['name'], args['depth']), {'calls': 0, 'seconds': 0.0, 'cpu': 0.0,
+                                                               'peak': None, 'output': ''})
+        row['calls'] += 1
+        row['seconds'] += event['dur'] / 1e6
+        row['cpu'] += args['cpu_ms'] / 1e3
+        if args.get('peak_rss_mb') is not None:
+            row['peak'] = max(row['peak'] or 0, args['peak_rss_mb'])
+        row['output'] = _format_shape(args.get('outputs')) or row['output']
+
+    lines = [f"{'stage':<36} {'calls':>5} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}  output",
+             '-' * 90]
+    for (name, depth), row in rows.items():
+        label = ('  ' * depth + name)[:36]
+        peak = f"{row['peak']:9.1f}" if row['peak'] is not None else f"{'-':>9}"
+        lines.append(f"{label:<36} {row['calls']:>5} {row['seconds']:9.3f} {row['cpu']:9.3f} {peak}  "
+                     f"{row['output']}")
+    return '\n'.join(lines)
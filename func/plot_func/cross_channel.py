@@ -0,0 +1,70 @@
+import numpy as np
+from func.plot_func.pixel_reduce import reduce_for_display, pool_coords
+from func.plot_func.raster import save_raster_spectrogram
+from func.plot_func.style import get_pyplot
+from func.output_func.trace import traced
+
+
+@traced()
+def plot_cross_channel(values, frequencies, times, max_len, save_path=None, title='通道差异图',
+                       param_text='', vmin=-20, vmax=20, cmap='RdBu_r', colorbar_format='%+2.0f dB',
+                       render='matplotlib'):
+    """
+    绘制通道间对比图（dB差或相干系数），数值直接着色，不再转换为dB
+
+    参数:
+        values (np.ndarray): 对比矩阵，shape为(n_freqs, n_times)
+        frequencies (np.ndarray): 各行对应的频率
+        times (np.ndarray): 各列对应的时间
+        max_len (int): 最大显示频率
+        save_path (str): 保存路径，如果为None则不保存
+        title (str): 标题
+        param_text (str): 底部参数说明
+        vmin (float): 颜色映射的最小值，默认-20
+        vmax (float): 颜色映射的最大值，默认20
+        cmap (str): 颜色映射方案，默认'RdBu_r'（发散型，0居中）
+        colorbar_format (str): colorbar刻度格式，默认'%+2.0f dB'
+        render (str): 'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG，不显示窗口），默认'matplotlib'
+    """
+    frequencies = np.asarray(frequencies)
+    times = np.asarray(times)
+
+    # 对比值在像素内取平均（最大值池化会偏向一侧通道）
+    if render == 'raster':
+        if save_path:
+            save_raster_spectrogram(values, frequencies, times, save_path, max_len, vmin=vmin, vmax=vmax,
+                                    cmap=cmap, pooling='mean', to_db=False,
+                                    metadata={'Title': title, 'Parameters': param_text})
+        return
+
+    plt = get_pyplot()
+    plt.figure(figsize=(22, 18), dpi=300)
+    values, frequencies, col_edges = reduce_for_display(values, frequencies, max_len, pooling='mean')
+    times = pool_coords(times, col_edges)
+
+    img = plt.pcolormesh(times, frequencies, values, cmap=cmap, vmin=vmin, vmax=vmax, shading='auto')
+
+    # 调整colorbar(图例栏)
+    cbar = plt.colorbar(img, format=colorbar_format)
+    cbar.ax.tick_params(labelsize=24)
+
+    plt.xlabel('Time(s)', fontsize=36, labelpad=16)
+    plt.ylabel('Frequency(Hz)', fontsize=36, labelpad=16)
+    plt.xticks(fontsize=24)
+    plt.yticks(fontsize=24)
+
+    plt.title(title, fontsize=40, pad=20)
+    plt.ylim(0, max_len)  # 限制显示频率范围
+
+    # 在图形底部添加参数说明（白色背景，无边框）
+    plt.figtext(0.5, 0.015, param_text,
+                ha='center', fontsize=28,
+                bbox=dict(facecolor='white', edgecolor='none', alpha=0.9, pad=5))
+
+    plt.tight_layout(rect=[0, 0.05, 1, 1])  # 为底部文字留出更多空间
+
+    if save_path:
+        plt.savefig(save_path, dpi=300)
+
+    plt.show()
+    plt.close()
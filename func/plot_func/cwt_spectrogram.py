@@ -1,11 +1,16 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from func.plot_func.pixel_reduce import reduce_for_display
+from func.plot_func.raster import save_raster_spectrogram
+from func.plot_func.style import get_pyplot
+from func.output_func.trace import traced
 
 
+@traced()
 def cwt_plot_scalogram(coefficients, frequencies, audio_data, sample_rate,
                        wavelet, scales, max_len, save_path=None, cmap='jet', vmin=-80,
                        scale_min=1, scale_max=128, scale_count=256,
-                       filter_cutoff_freq=None, filter_order=5):
+                       filter_cutoff_freq=None, filter_order=5, is_power=False, pooling='max',
+                       render='matplotlib'):
     """
     绘制CWT频谱图（Scalogram）
 
@@ -25,19 +30,38 @@ def cwt_plot_scalogram(coefficients, frequencies, audio_data, sample_rate,
         scale_count (int): 尺度数量
         filter_cutoff_freq (float): 低通滤波器截止频率 (Hz)
         filter_order (int): 低通滤波器阶数
+        is_power (bool): coefficients是否已经是功率矩阵|系数|^2，默认False
+        pooling (str): 渲染前降采样到像素网格的池化方式（功率域），'max'或'mean'，默认'max'
+        render (str): 'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG，不显示窗口），默认'matplotlib'
     """
+    filter_text = f'  |  Filter: {filter_cutoff_freq} Hz (Order {filter_order})' if filter_cutoff_freq else ''
+    param_text = f'Sample Rate = {sample_rate} Hz  |  Wavelet = {wavelet}  |  Scales = {scale_count} ({scale_min}-{scale_max}){filter_text}'
+    duration = len(audio_data) / sample_rate
+
+    # 计算功率谱，参考值取整幅最大值，再裁剪到0~max_len并池化到像素网格
+    power = coefficients if is_power else np.abs(coefficients) ** 2
+
+    if render == 'raster':
+        if save_path:
+            times = np.linspace(0, duration, power.shape[1])
+            save_raster_spectrogram(power, np.asarray(frequencies), times, save_path, max_len, vmin=vmin, cmap=cmap,
+                                    ref=np.max(power) + 1e-12, pooling=pooling,
+                                    metadata={'Title': 'CWT scalogram', 'Parameters': param_text})
+        return
+
+    plt = get_pyplot()
     plt.figure(figsize=(22, 18), dpi=400)
+    ref_db = 10 * np.log10(np.max(power) + 1e-12)
+    power, frequencies, col_edges = reduce_for_display(power, np.asarray(frequencies), max_len, pooling=pooling)
 
-    # 计算功率谱并转换为dB刻度
-    power = np.abs(coefficients) ** 2
+    # 转换为dB刻度
     power_db = 10 * np.log10(power + 1e-12)  # 添加小常数避免log(0)
-    
+
     # 归一化到0dB最大值
-    power_db = power_db - np.max(power_db)
+    power_db = power_db - ref_db
 
-    # 计算时间轴
-    duration = len(audio_data) / sample_rate
-    time = np.linspace(0, duration, coefficients.shape[1])
+    # 计算时间轴（各池化列内原始时间点的平均值）
+    time = (col_edges[:-1] + col_edges[1:] - 1) / 2 * duration / max(coefficients.shape[1] - 1, 1)
 
     # 绘制频谱图
     img = plt.pcolormesh(
@@ -64,8 +88,6 @@ def cwt_plot_scalogram(coefficients, frequencies, audio_data, sample_rate,
     plt.ylim(0, max_len)  # 限制显示频率范围
 
     # 在图形底部添加参数说明（白色背景，无边框）
-    filter_text = f'  |  Filter: {filter_cutoff_freq} Hz (Order {filter_order})' if filter_cutoff_freq else ''
-    param_text = f'Sample Rate = {sample_rate} Hz  |  Wavelet = {wavelet}  |  Scales = {scale_count} ({scale_min}-{scale_max}){filter_text}'
     plt.figtext(0.5, 0.015, param_text,
                 ha='center', fontsize=28,
                 bbox=dict(facecolor='white', edgecolor='none', alpha=0.9, pad=5))
@@ -76,3 +98,4 @@ def cwt_plot_scalogram(coefficients, frequencies, audio_data, sample_rate,
         plt.savefig(save_path, dpi=300)
 
     plt.show()
+    plt.close()
@@ -0,0 +1,104 @@
+import os
+import time
+import numpy as np
+from func.plot_func.raster import save_raster_spectrogram
+from func.plot_func.style import get_pyplot
+
+
+def _ring_times(total, n_cols, frame_step):
+    """
+    环形缓冲区各列（按时间顺序）对应的流时间 (s)，最后一列为最新帧
+    """
+    return (total - n_cols + np.arange(n_cols)) * frame_step
+
+
+def live_matplotlib_display(ring, frequencies, frame_step, max_len, fps=10, vmin=-80, cmap='jet',
+                            on_frame=None, stop=None):
+    """
+    在matplotlib窗口中以固定帧率刷新滚动频谱图（0 dB为当前缓冲区最大值），关闭窗口或stop置位时返回
+
+    参数:
+        ring (RollingSpectrogram): 环形频谱缓冲区
+        frequencies (np.ndarray): 各行对应的频率（升序）
+        frame_step (float): 相邻两帧的时间间隔 (s)
+        max_len (float): 最大显示频率
+        fps (float): 刷新帧率，默认10
+        vmin (float): 颜色映射的最小值（dB），默认-80
+        cmap (str): 颜色映射名称，默认'jet'
+        on_frame (callable): 每次刷新后调用on_frame(arrivals, shown_time)，用于统计延迟
+        stop (threading.Event): 置位时关闭窗口
+    """
+    from matplotlib.animation import FuncAnimation
+    plt = get_pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    span = ring.n_cols * frame_step
+    img = ax.imshow(np.full(ring.power.shape, vmin, dtype=np.float32), origin='lower', aspect='auto',
+                    cmap=cmap, vmin=vmin, vmax=0, interpolation='nearest',
+                    extent=(-span, 0, frequencies[0], frequencies[-1]))
+    fig.colorbar(img, ax=ax, format='%+2.0f dB')
+    ax.set_xlabel('Time(s)')
+    ax.set_ylabel('Frequency(Hz)')
+    ax.set_ylim(0, max_len)
+    title = ax.set_title('Live spectrogram')
+
+    def _update(_):
+        if stop is not None and stop.is_set():
+            plt.close(fig)
+            return img,
+        power, total, arrivals = ring.snapshot()
+        power_db = 10 * np.log10(np.maximum(power, 1e-12)) - 10 * np.log10(max(float(np.max(power)), 1e-12))
+        img.set_data(power_db)
+        end = total * frame_step
+        img.set_extent((end - span, end, frequencies[0], frequencies[-1]))
+        ax.set_xlim(end - span, end)
+        title.set_text(f'Live spectrogram  |  t = {end:.2f} s')
+        if on_frame is not None:
+            on_frame(arrivals, time.perf_counter())
+        return img,
+
+    animation = FuncAnimation(fig, _update, interval=1000 / fps, cache_frame_data=False)
+    plt.show()
+    return animation
+
+
+def live_raster_display(ring, frequencies, frame_step, max_len, save_path, fps=2, vmin=-80, cmap='jet',
+                        on_frame=None, stop=None):
+    """
+    无窗口模式：以固定帧率把滚动频谱图着色写成PNG（先写临时文件再原子替换，读者不会看到半张图），
+    直到stop置位
+
+    参数:
+        ring (RollingSpectrogram): 环形频谱缓冲区
+        frequencies (np.ndarray): 各行对应的频率（升序）
+        frame_step (float): 相邻两帧的时间间隔 (s)
+        max_len (float): 最大显示频率
+        save_path (str): PNG路径，每次刷新覆盖
+        fps (float): 刷新帧率，默认2
+        vmin (float): 颜色映射的最小值（dB），默认-80
+        cmap (str): 颜色映射名称，默认'jet'
+        on_frame (callable): 每次刷新后调用on_frame(arrivals, shown_time)，用于统计延迟
+        stop (threading.Event): 置位时返回
+    """
+    os.makedirs(os.path.dirname(save_path) or '.', exist_ok=True)
+    tmp_path = save_path + '.tmp'
+    interval = 1 / fps
+    next_frame = time.perf_counter()
+    while stop is None or not stop.is_set():
+        power, total, arrivals = ring.snapshot()
+        if total:
+            times = _ring_times(total, ring.n_cols, frame_step)
+            save_raster_spectrogram(power, frequencies, times, tmp_path, max_len, vmin=vmin, cmap=cmap,
+                                    overlay=True, compress_level=1,
+                                    metadata={'Title': 'Live spectrogram', 'Frames': str(total)})
+            os.replace(tmp_path, save_path)
+        if on_frame is not None:
+            on_frame(arrivals, time.perf_counter())
+        # 固定帧率：渲染超时则跳过错过的刷新时刻，不累积延迟
+        next_frame += interval
+        now = time.perf_counter()
+        if next_frame < now:
+            next_frame = now + interval - (now - next_frame) % interval
+        if stop is not None:
+            stop.wait(next_frame - now)
+        else:
+            time.sleep(next_frame - now)
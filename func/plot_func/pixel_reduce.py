@@ -0,0 +1,117 @@
+import numpy as np
+
+# 绘图函数使用的画布尺寸（英寸）与保存分辨率，决定输出图像的像素网格上限
+DISPLAY_FIGSIZE = (22, 18)
+DISPLAY_DPI = 300
+
+
+def pixel_grid(figsize=DISPLAY_FIGSIZE, dpi=DISPLAY_DPI):
+    """
+    计算保存图像的像素网格大小（整幅画布，热力图区域不会超过它）
+
+    参数:
+        figsize (tuple): 画布尺寸（宽, 高），单位英寸
+        dpi (int): 保存分辨率
+
+    返回:
+        (n_rows, n_cols) (tuple): 像素行数（高）与列数（宽）
+    """
+    return int(figsize[1] * dpi), int(figsize[0] * dpi)
+
+
+def crop_rows(frequencies, max_len, f_min=0.0):
+    """
+    找出频率落在[f_min, max_len]内的行（频率可升序或降序），两端各多保留一行使显示范围的边界被覆盖
+
+    参数:
+        frequencies (np.ndarray): 各行对应的频率（单调）
+        max_len (float): 最大显示频率
+        f_min (float): 最小显示频率，默认0
+
+    返回:
+        rows (slice): 需要保留的行
+    """
+    inside = np.flatnonzero((frequencies >= f_min) & (frequencies <= max_len))
+    if not len(inside):
+        return slice(0, len(frequencies))
+    start = max(inside[0] - 1, 0)
+    stop = min(inside[-1] + 2, len(frequencies))
+    return slice(start, stop)
+
+
+def group_edges(n_in, n_out):
+    """
+    把n_in个元素均匀分成min(n_in, n_out)组，返回各组的起止下标
+
+    返回:
+        edges (np.ndarray): 长度为组数+1的整数数组，第i组为[edges[i], edges[i+1])
+    """
+    n_out = max(1, min(int(n_in), int(n_out)))
+    return np.linspace(0, n_in, n_out + 1).astype(np.int64)
+
+
+def pool_axis(matrix, edges, axis, pooling='max'):
+    """
+    沿指定轴按edges分组池化（组数等于原长度时直接返回原矩阵，不复制）
+
+    参数:
+        matrix (np.ndarray): 二维矩阵（功率域）
+        edges (np.ndarray): group_edges返回的分组边界
+        axis (int): 池化的轴
+        pooling (str): 'max'（保留瞬态峰值）或'mean'（保留平均能量）
+
+    返回:
+        pooled (np.ndarray): 池化后的矩阵
+    """
+    if len(edges) - 1 == matrix.shape[axis]:
+        return matrix
+    if pooling == 'max':
+        return np.maximum.reduceat(matrix, edges[:-1], axis=axis)
+    elif pooling == 'mean':
+        widths = np.diff(edges).reshape([-1 if ax == axis else 1 for ax in range(matrix.ndim)])
+        return np.add.reduceat(matrix, edges[:-1], axis=axis) / widths
+    raise ValueError(f"Unsupported pooling: {pooling}. Use 'max' or 'mean'")
+
+
+def pool_coords(coords, edges):
+    """
+    计算各分组内坐标的平均值，作为池化后每行/列的中心坐标
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if len(edges) - 1 == len(coords):
+        return coords
+    return np.add.reduceat(coords, edges[:-1]) / np.diff(edges)
+
+
+def reduce_for_display(power, frequencies, max_len, f_min=0.0, shape=None, pooling='max'):
+    """
+    渲染前的降采样：先裁剪到[f_min, max_len]频带，再在功率域池化到输出像素网格
+
+    热力图传给matplotlib的矩阵大小只与图像像素数有关，与信号长度无关。
+
+    参数:
+        power (np.ndarray): 功率矩阵，shape为(n_freqs, n_times)
+        frequencies (np.ndarray): 各行对应的频率
+        max_len (float): 最大显示频率
+        f_min (float): 最小显示频率，默认0
+        shape (tuple): 目标像素网格(n_rows, n_cols)，默认None表示pixel_grid()
+        pooling (str): 'max'或'mean'，默认'max'
+
+    返回:
+        reduced (np.ndarray): 裁剪并池化后的功率矩阵
+        frequencies (np.ndarray): 池化后各行的中心频率
+        col_edges (np.ndarray): 池化后各列在原矩阵中的起止列下标（长度为列数+1）
+    """
+    if shape is None:
+        shape = pixel_grid()
+
+    rows = crop_rows(frequencies, max_len, f_min)
+    power = power[rows]
+    frequencies = frequencies[rows]
+
+    row_edges = group_edges(power.shape[0], shape[0])
+    col_edges = group_edges(power.shape[1], shape[1])
+
+    reduced = pool_axis(pool_axis(power, col_edges, axis=1, pooling=pooling), row_edges, axis=0, pooling=pooling)
+
+    return reduced, pool_coords(frequencies, row_edges), col_edges
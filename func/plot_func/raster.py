@@ -0,0 +1,214 @@
+import struct
+import zlib
+from functools import lru_cache
+import numpy as np
+from func.plot_func.pixel_reduce import reduce_for_display, pool_coords
+
+# 直接栅格输出的默认像素网格(n_rows, n_cols)
+RASTER_SHAPE = (1080, 1920)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+@lru_cache(maxsize=8)
+def colormap_lut(cmap='jet', n_colors=256):
+    """
+    预先计算颜色映射查找表（与matplotlib的同名colormap一致）
+
+    参数:
+        cmap (str): 颜色映射名称，默认'jet'
+        n_colors (int): 查找表长度，默认256
+
+    返回:
+        lut (np.ndarray): uint8数组，shape为(n_colors, 3)，只读
+    """
+    from matplotlib import colormaps
+
+    colors = colormaps[cmap].resampled(n_colors)(np.arange(n_colors))[:, :3]
+    lut = (colors * 255).astype(np.uint8)  # 与matplotlib的to_rgba(bytes=True)相同，截断取整
+    lut.setflags(write=False)
+    return lut
+
+
+def db_to_rgb(power_db, vmin=-80, vmax=0, cmap='jet'):
+    """
+    把dB矩阵通过查找表映射为RGB图像（与matplotlib的Normalize(vmin, vmax)+colormap一致，超出范围的值截断到两端颜色）
+
+    参数:
+        power_db (np.ndarray): dB矩阵，shape为(H, W)
+        vmin (float): 颜色映射的最小值（dB）
+        vmax (float): 颜色映射的最大值（dB），默认0
+        cmap (str): 颜色映射名称，默认'jet'
+
+    返回:
+        rgb (np.ndarray): uint8数组，shape为(H, W, 3)
+    """
+    lut = colormap_lut(cmap)
+    n_colors = len(lut)
+    scaled = (np.asarray(power_db, dtype=np.float32) - vmin) * (n_colors / (vmax - vmin))
+    index = np.clip(np.nan_to_num(scaled, nan=0.0), 0, n_colors - 1).astype(np.uint8)
+    return lut[index]
+
+
+def write_png(save_path, rgb, metadata=None, compress_level=6):
+    """
+    用zlib直接写出RGB PNG文件（不经过matplotlib/PIL）
+
+    参数:
+        save_path (str): 保存路径
+        rgb (np.ndarray): uint8数组，shape为(H, W, 3)
+        metadata (dict): 写入tEXt块的键值对（Latin-1文本），默认None
+        compress_level (int): zlib压缩级别0~9，默认6
+    """
+    with open(save_path, 'wb') as f:
+        f.write(encode_png(rgb, metadata, compress_level))
+
+
+def encode_png(rgb, metadata=None, compress_level=6):
+    """
+    把RGB图像编码为PNG字节串（参数同write_png）
+    """
+    rgb = np.ascontiguousarray(rgb, dtype=np.uint8)
+    height, width = rgb.shape[:2]
+
+    def _chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    # 每行前加一个滤波类型字节(0: None)
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+
+    chunks = [_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))]
+    for key, value in (metadata or {}).items():
+        text = f'{key}'.encode('latin-1', 'replace')[:79] + b'\x00' + f'{value}'.encode('latin-1', 'replace')
+        chunks.append(_chunk(b'tEXt', text))
+    chunks.append(_chunk(b'IDAT', zlib.compress(raw.tobytes(), compress_level)))
+    chunks.append(_chunk(b'IEND', b''))
+
+    return PNG_SIGNATURE + b''.join(chunks)
+
+
+def _nice_ticks(lo, hi, n_ticks=6):
+    """
+    在[lo, hi]内生成步长为1/2/5×10^k的刻度值
+    """
+    if hi <= lo:
+        return np.array([lo])
+    raw_step = (hi - lo) / n_ticks
+    magnitude = 10 ** np.floor(np.log10(raw_step))
+    step = magnitude * min((m for m in (1, 2, 5, 10) if m * magnitude >= raw_step))
+    return np.arange(np.ceil(lo / step) * step, hi + step * 1e-9, step)
+
+
+def _cell_edges(coords):
+    """
+    由各行的中心坐标（升序）计算单元格边界（与pcolormesh的shading='auto'一致）
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if len(coords) == 1:
+        return np.array([coords[0] - 0.5, coords[0] + 0.5])
+    mids = (coords[:-1] + coords[1:]) / 2
+    return np.concatenate(([2 * coords[0] - mids[0]], mids, [2 * coords[-1] - mids[-1]]))
+
+
+def draw_overlay(rgb, max_len, times, color=(255, 255, 255), tick_length=None):
+    """
+    在图像上绘制轻量的坐标叠加层：1像素边框和左侧（频率）、底部（时间）刻度线
+
+    参数:
+        rgb (np.ndarray): uint8图像，shape为(H, W, 3)，纵轴为0~max_len的线性频率（第0行为最高频率），原地修改
+        max_len (float): 最大显示频率
+        times (np.ndarray): 各列对应的时间（升序）
+        color (tuple): 叠加层颜色，默认白色
+        tick_length (int): 刻度线长度（像素），默认为图像较短边的2%
+
+    返回:
+        ticks (dict): 刻度值，{'frequency': [...], 'time': [...]}，可写入图像元数据
+    """
+    height, width = rgb.shape[:2]
+    if tick_length is None:
+        tick_length = max(4, min(height, width) // 50)
+
+    rgb[0, :] = rgb[-1, :] = color
+    rgb[:, 0] = rgb[:, -1] = color
+
+    freq_ticks = _nice_ticks(0, max_len)
+    rows = np.round((1 - freq_ticks / max_len) * (height - 1)).astype(np.int64)
+    for row in rows:
+        rgb[row, :tick_length] = color
+
+    time_ticks = _nice_ticks(times[0], times[-1])
+    centers = (np.arange(len(times)) + 0.5) * width / len(times)
+    cols = np.round(np.interp(time_ticks, times, centers)).astype(np.int64)
+    for col in np.clip(cols, 0, width - 1):
+        rgb[height - tick_length:, col] = color
+
+    return {'frequency': freq_ticks.tolist(), 'time': time_ticks.tolist()}
+
+
+def save_raster_spectrogram(power, frequencies, times, save_path, max_len, vmin=-80, cmap='jet', ref=None,
+                            pooling='max', shape=RASTER_SHAPE, overlay=False, metadata=None, compress_level=6,
+                            vmax=0, to_db=True):
+    """
+    不经过matplotlib直接导出频谱热力图：裁剪并池化到像素网格 → dB → 查找表着色 → PNG
+
+    纵轴与matplotlib版本相同，为0~max_len的线性频率，每个像素行取覆盖该频率的数据行
+    （非线性的CWT尺度也按频率正确排布），没有数据覆盖的区域为白色。
+
+    参数:
+        power (np.ndarray): 功率矩阵，shape为(n_freqs, n_times)
+        frequencies (np.ndarray): 各行对应的频率（升序或降序）
+        times (np.ndarray): 各列对应的时间
+        save_path (str): 保存路径
+        max_len (float): 最大显示频率
+        vmin (float): 颜色映射的最小值（dB），默认-80
+        cmap (str): 颜色映射名称，默认'jet'
+        ref (float): 0 dB对应的功率，默认None表示整幅最大值
+        pooling (str): 池化方式，'max'或'mean'，默认'max'
+        shape (tuple): 输出像素网格(n_rows, n_cols)；列数少于n_cols时按整数倍最近邻放大
+        overlay (bool): 是否绘制边框与刻度叠加层，默认False
+        metadata (dict): 额外写入PNG tEXt块的参数说明
+        compress_level (int): zlib压缩级别，默认6
+        vmax (float): 颜色映射的最大值，默认0 dB
+        to_db (bool): 是否把power按ref转换为dB，默认True；False时power直接作为着色值
+                      （例如通道间dB差或相干系数），ref不再使用
+    """
+    if ref is None and to_db:
+        ref = np.max(power)
+
+    frequencies = np.asarray(frequencies)
+    power, frequencies, col_edges = reduce_for_display(power, frequencies, max_len, shape=shape, pooling=pooling)
+    times = pool_coords(times, col_edges)
+
+    # 统一为频率升序
+    if frequencies[0] > frequencies[-1]:
+        power, frequencies = power[::-1], frequencies[::-1]
+
+    if to_db:
+        power = 10 * np.log10(np.maximum(power, 1e-12)) - 10 * np.log10(max(ref, 1e-12))
+    colored = db_to_rgb(power, vmin=vmin, vmax=vmax, cmap=cmap)
+
+    # 每个像素行（第0行为最高频率）取覆盖其中心频率的数据行
+    n_rows = shape[0]
+    pixel_freqs = (np.arange(n_rows)[::-1] + 0.5) * max_len / n_rows
+    row_index = np.searchsorted(_cell_edges(frequencies), pixel_freqs, side='right') - 1
+    covered = (row_index >= 0) & (row_index < len(frequencies))
+    rgb = colored[np.clip(row_index, 0, len(frequencies) - 1)]
+    rgb[~covered] = 255
+
+    # 列数少于像素网格时按整数倍放大
+    col_repeat = max(1, shape[1] // rgb.shape[1])
+    if col_repeat > 1:
+        rgb = np.repeat(rgb, col_repeat, axis=1)
+
+    info = {'Software': 'Audio-Spectrogram-Generator',
+            'Frequency range (Hz)': f'0-{max_len:.6g}',
+            'Time range (s)': f'{times[0]:.6g}-{times[-1]:.6g}',
+            'Value range' if not to_db else 'dB range': f'{vmin}-{vmax}', 'Colormap': cmap}
+    if overlay:
+        ticks = draw_overlay(rgb, max_len, times)
+        info['Frequency ticks (Hz)'] = ', '.join(f'{t:g}' for t in ticks['frequency'])
+        info['Time ticks (s)'] = ', '.join(f'{t:g}' for t in ticks['time'])
+    info.update(metadata or {})
+
+    write_png(save_path, rgb, metadata=info, compress_level=compress_level)
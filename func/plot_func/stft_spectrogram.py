@@ -1,11 +1,14 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
+from func.plot_func.pixel_reduce import reduce_for_display
+from func.plot_func.raster import save_raster_spectrogram
+from func.plot_func.style import get_pyplot
+from func.output_func.trace import traced
 
 
+@traced()
 def stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, window, n_fft,
-                          max_len, save_path=None, cmap='jet', vmin=-80):
+                          max_len, save_path=None, cmap='jet', vmin=-80, frequencies=None, pooling='max',
+                          render='matplotlib'):
     """
     绘制频谱图
 
@@ -20,11 +23,34 @@ def stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, wind
         save_path (str): 保存路径，如果为None则不保存
         cmap (str): 颜色映射方案
         vmin (float): 颜色映射的最小值（dB），默认-80
+        frequencies (np.ndarray): 各行对应的频率，默认None表示0~sample_rate/2的n_fft/2+1个线性频点
+        pooling (str): 渲染前降采样到像素网格的池化方式（功率域），'max'或'mean'，默认'max'
+        render (str): 'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG，不显示窗口），默认'matplotlib'
     """
+    if frequencies is None:
+        frequencies = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+
+    param_text = f'Sample Rate = {sample_rate} Hz  |  FFT Size = {n_fft}  |  Hop Length = {hop_length}  |  Window Length = {win_length}  |  Window = {window}'
+
+    # 在功率域计算参考值（整幅最大值，与amplitude_to_db(ref=np.max)一致），再裁剪并池化到像素网格
+    power = np.abs(stft_result) ** 2
+    ref = np.max(power)
+
+    if render == 'raster':
+        if save_path:
+            times = np.arange(power.shape[1]) * hop_length / sample_rate
+            save_raster_spectrogram(power, frequencies, times, save_path, max_len, vmin=vmin, cmap=cmap, ref=ref,
+                                    pooling=pooling, metadata={'Title': 'Spectrogram', 'Parameters': param_text})
+        return
+
+    import librosa.display
+    plt = get_pyplot()
     plt.figure(figsize=(22, 18), dpi=400)
+    power, frequencies, col_edges = reduce_for_display(power, frequencies, max_len, pooling=pooling)
+    times = (col_edges[:-1] + col_edges[1:] - 1) / 2 * hop_length / sample_rate
 
     # 转换为dB刻度
-    magnitude_db = librosa.amplitude_to_db(np.abs(stft_result), ref=np.max)
+    magnitude_db = librosa.power_to_db(power, ref=ref)
 
     # 绘制频谱图热力图
     img = librosa.display.specshow(
@@ -33,6 +59,8 @@ def stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, wind
         hop_length=hop_length,
         x_axis='time',
         y_axis='hz',
+        x_coords=times,
+        y_coords=frequencies,
         cmap=cmap,  # 使用jet配色：蓝紫色(低)到红色(高)
         vmin=vmin,  # 颜色映射的最小值
         vmax=0  # 颜色映射的最大值
@@ -52,7 +80,6 @@ def stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, wind
     plt.ylim(0, max_len)  # 限制显示频率范围
     
     # 在图形底部添加参数说明（白色背景，无边框）
-    param_text = f'Sample Rate = {sample_rate} Hz  |  FFT Size = {n_fft}  |  Hop Length = {hop_length}  |  Window Length = {win_length}  |  Window = {window}'
     plt.figtext(0.5, 0.015, param_text, 
                 ha='center', fontsize=28,
                 bbox=dict(facecolor='white', edgecolor='none', alpha=0.9, pad=5))
@@ -63,15 +90,18 @@ def stft_plot_spectrogram(stft_result, sample_rate, hop_length, win_length, wind
         plt.savefig(save_path, dpi=300)
 
     plt.show()
+    plt.close()
 
 
-def plot_mel_spectrogram(audio_data, sample_rate, n_fft, hop_length, win_length, window, n_mels,
-                         max_len, save_path=None, vmin=-80):
+@traced()
+def plot_mel_spectrogram(mel_spectrogram, mel_frequencies, sample_rate, n_fft, hop_length, win_length, window,
+                         n_mels, max_len, save_path=None, vmin=-80, pooling='max', render='matplotlib'):
     """
     绘制Mel频谱图（更符合人耳感知，热力图形式）
 
     参数:
-        audio_data (np.ndarray): 音频时域信号
+        mel_spectrogram (np.ndarray): Mel功率谱（由stft_to_mel从已计算的STFT得到），shape为(n_mels, n_frames)
+        mel_frequencies (np.ndarray): 各Mel频带对应的频率 (Hz)
         sample_rate (int): 采样率
         n_fft (int): FFT窗口大小
         hop_length (int): 帧移大小
@@ -81,22 +111,30 @@ def plot_mel_spectrogram(audio_data, sample_rate, n_fft, hop_length, win_length,
         max_len (int): 最大显示频率
         save_path (str): 保存路径
         vmin (float): 颜色映射的最小值（dB），默认-80
+        pooling (str): 渲染前降采样到像素网格的池化方式（功率域），'max'或'mean'，默认'max'
+        render (str): 'matplotlib'（完整坐标轴与图例）或'raster'（查找表着色直接写PNG，不显示窗口），默认'matplotlib'
     """
-    plt.figure(figsize=(22, 18), dpi=300)
+    param_text = f'Sample Rate = {sample_rate} Hz  |  FFT Size = {n_fft}  |  Hop Length = {hop_length}  |  Window Length = {win_length}  |  Window = {window}  |  Mel Bands = {n_mels}'
 
-    # 使用librosa原生函数计算Mel频谱图
-    mel_spectrogram = librosa.feature.melspectrogram(
-        y=audio_data,
-        sr=sample_rate,
-        n_fft=n_fft,
-        hop_length=hop_length,
-        win_length=win_length,
-        window=window,
-        n_mels=n_mels
-    )
+    # 裁剪到0~max_len并池化到像素网格（参考值取整幅最大值）
+    ref = np.max(mel_spectrogram)
+
+    if render == 'raster':
+        if save_path:
+            times = np.arange(mel_spectrogram.shape[1]) * hop_length / sample_rate
+            save_raster_spectrogram(mel_spectrogram, mel_frequencies, times, save_path, max_len, vmin=vmin, ref=ref,
+                                    pooling=pooling, metadata={'Title': 'Mel spectrogram', 'Parameters': param_text})
+        return
+
+    import librosa.display
+    plt = get_pyplot()
+    plt.figure(figsize=(22, 18), dpi=300)
+    mel_spectrogram, mel_frequencies, col_edges = reduce_for_display(mel_spectrogram, mel_frequencies, max_len,
+                                                                     pooling=pooling)
+    times = (col_edges[:-1] + col_edges[1:] - 1) / 2 * hop_length / sample_rate
 
     # 转换为dB刻度
-    mel_spectrogram_db = librosa.power_to_db(mel_spectrogram, ref=np.max)
+    mel_spectrogram_db = librosa.power_to_db(mel_spectrogram, ref=ref)
 
     # 绘制Mel频谱图热力图
     img = librosa.display.specshow(
@@ -105,6 +143,8 @@ def plot_mel_spectrogram(audio_data, sample_rate, n_fft, hop_length, win_length,
         hop_length=hop_length,
         x_axis='time',
         y_axis='mel',
+        x_coords=times,
+        y_coords=mel_frequencies,
         cmap='jet',  # 使用jet配色：蓝紫色(低)到红色(高)
         vmin=vmin,  # 颜色映射的最小值
         vmax=0  # 颜色映射的最大值
@@ -124,7 +164,6 @@ def plot_mel_spectrogram(audio_data, sample_rate, n_fft, hop_length, win_length,
     plt.ylim(0, max_len)  # 限制显示频率范围
     
     # 在图形底部添加参数说明（Mel频谱图包含n_mels参数，白色背景，无边框）
-    param_text = f'Sample Rate = {sample_rate} Hz  |  FFT Size = {n_fft}  |  Hop Length = {hop_length}  |  Window Length = {win_length}  |  Window = {window}  |  Mel Bands = {n_mels}'
     plt.figtext(0.5, 0.015, param_text, 
                 ha='center', fontsize=28,
                 bbox=dict(facecolor='white', edgecolor='none', alpha=0.9, pad=5))
@@ -134,4 +173,5 @@ def plot_mel_spectrogram(audio_data, sample_rate, n_fft, hop_length, win_length,
     if save_path:
         plt.savefig(save_path, dpi=300)
 
-    plt.show()
\ No newline at end of file
+    plt.show()
+    plt.close()
\ No newline at end of file
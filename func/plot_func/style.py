@@ -0,0 +1,17 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def get_pyplot():
+    """
+    导入matplotlib.pyplot并设置中文字体（只在第一次需要matplotlib出图时导入与设置，
+    raster/tiles出图或只做变换时不加载matplotlib）
+
+    返回:
+        plt (module): matplotlib.pyplot
+    """
+    import matplotlib.pyplot as plt
+
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
@@ -0,0 +1,204 @@
+"""
+实时滚动频谱图：从增长中的文件、管道/标准输入或本地TCP端口读取采样，对每个新到的数据块增量执行
+解调 → 抽取 → 因果低通滤波 → STFT，把新帧写入固定大小的环形缓冲区，并以固定帧率刷新显示。
+
+用法示例:
+    python live.py data/input_data/capture.csv --tail                    # 跟随采集程序正在写入的CSV
+    producer | python live.py - --format f32 --sample-rate 5000000       # 标准输入的float32原始采样
+    python live.py tcp://127.0.0.1:9000 --format i16 --display raster --output data/output_data/live.png
+
+线程结构: 读取线程（解析并放入有界队列）→ 处理线程（流式DSP，写环形缓冲区）→ 主线程（按--fps刷新显示）。
+处理跟不上时，文件与标准输入等待处理线程（反压，不丢样本）；TCP套接字和--tail跟随丢弃新块并计数，
+丢块处的前后数据不拼接：流式DSP从丢块后的第一块重新开始（见--drop）。
+内存上界为 队列块数 x 块大小 + 环形缓冲区，不随运行时间增长。
+端到端延迟 = 显示刷新时刻 - 该帧依赖的最新数据块被读取线程收到的时刻；
+另外给出算法延迟（FIR与居中STFT窗口需要等待的后续样本时长）。
+"""
+import argparse
+import json
+import signal
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from func.analysis_func.decimate import plan_decimation, decimated_params
+from func.analysis_func.rolling import RollingSpectrogram, live_stft_frames, live_algorithmic_delay
+from func.input_func.live import LiveReader, open_live_chunks, DEFAULT_CHUNK_BYTES, DEFAULT_QUEUE_BLOCKS
+
+
+class LiveStats:
+    """
+    运行统计：端到端延迟（保留最近的样本）、显示帧数、处理的帧数与采样数
+    """
+
+    def __init__(self, reader, ring, sample_rate, history=10000):
+        self.reader = reader
+        self.ring = ring
+        self.sample_rate = sample_rate
+        self.latencies = deque(maxlen=history)
+        self.renders = 0
+        self.start = time.perf_counter()
+
+    def on_frame(self, arrivals, shown_time):
+        self.renders += 1
+        self.latencies.extend(shown_time - arrival for arrival in arrivals)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        latencies = np.asarray(self.latencies) * 1e3
+        counts = dict(self.reader.counts)
+        return {
+            'elapsed_s': elapsed,
+            'renders': self.renders,
+            'frames': self.ring.total,
+            'samples': counts['samples'],
+            'realtime_factor': counts['samples'] / self.sample_rate / elapsed if elapsed else 0.0,
+            'queue_blocks': self.reader.queue.qsize(),
+            'dropped_blocks': counts['dropped_blocks'],
+            'dropped_samples': counts['dropped_samples'],
+            'gaps': counts['gaps'],
+            'latency_ms': {
+                'mean': float(np.mean(latencies)) if len(latencies) else None,
+                'p95': float(np.percentile(latencies, 95)) if len(latencies) else None,
+                'max': float(np.max(latencies)) if len(latencies) else None
+            }
+        }
+
+    def print_line(self):
+        s = self.summary()
+        latency = s['latency_ms']
+        latency_text = (f"latency mean {latency['mean']:.1f} / p95 {latency['p95']:.1f} / max {latency['max']:.1f} ms"
+                        if latency['mean'] is not None else "latency -")
+        print(f"[{s['elapsed_s']:7.1f} s] frames {s['frames']}  samples {s['samples']} "
+              f"({s['realtime_factor']:.2f}x real time)  {latency_text}  "
+              f"queue {s['queue_blocks']}  dropped {s['dropped_blocks']} blocks ({s['gaps']} gaps)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling spectrogram of a live sample stream")
+    parser.add_argument('source', help="Growing file path, '-' for stdin, or tcp://host:port to listen on")
+    parser.add_argument('--format', choices=['csv', 'f32', 'i16'], default='csv',
+                        help="csv text (optional CH1V,CH2V,tInc header) or little-endian raw samples")
+    parser.add_argument('--channel', default='CH1V', help="CSV channel column (when the stream has a header)")
+    parser.add_argument('--n-channels', type=int, default=1, help="Interleaved channels in raw streams")
+    parser.add_argument('--channel-index', type=int, default=0, help="Channel to show from raw streams")
+    parser.add_argument('--sample-rate', type=float, default=5e6, help="Sample rate when the stream has no header")
+    parser.add_argument('--tail', action='store_true', help="Start at the end of the file (only new samples)")
+    parser.add_argument('--demodulated', action=argparse.BooleanOptionalAction, default=True,
+                        help="Hilbert envelope demodulation (streaming FIR)")
+    parser.add_argument('--decimate', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--max-height', type=float, default=4000, help="Maximum displayed frequency (Hz)")
+    parser.add_argument('--filter-cutoff', type=float, default=20000, help="Causal lowpass cutoff (Hz), 0 = off")
+    parser.add_argument('--filter-order', type=int, default=4)
+    parser.add_argument('--n-fft', type=int, default=32768 * 4, help="FFT size at the input sample rate")
+    parser.add_argument('--win-length', type=int, default=None, help="Window length (default: n-fft)")
+    parser.add_argument('--hop-length', type=int, default=None, help="Hop length (default: win-length // 8)")
+    parser.add_argument('--window', default='hann')
+    parser.add_argument('--seconds', type=float, default=10.0, help="Time span kept in the ring buffer")
+    parser.add_argument('--fps', type=float, default=10.0, help="Display refresh rate")
+    parser.add_argument('--vmin', type=float, default=-60)
+    parser.add_argument('--cmap', default='jet')
+    parser.add_argument('--display', choices=['matplotlib', 'raster'], default='matplotlib',
+                        help="Interactive window, or a PNG rewritten at --fps (headless)")
+    parser.add_argument('--output', default='data/output_data/live.png', help="PNG path for --display raster")
+    parser.add_argument('--queue-blocks', type=int, default=DEFAULT_QUEUE_BLOCKS,
+                        help="Blocks buffered between reader and DSP")
+    parser.add_argument('--drop', action=argparse.BooleanOptionalAction, default=None,
+                        help="Drop new blocks when the queue is full and restart the DSP after the gap, instead of "
+                             "waiting (default: drop for tcp:// sources and --tail, wait for files and stdin)")
+    parser.add_argument('--chunk-bytes', type=int, default=DEFAULT_CHUNK_BYTES)
+    parser.add_argument('--idle-timeout', type=float, default=None,
+                        help="Stop after this many seconds without new file data")
+    parser.add_argument('--duration', type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument('--stats-interval', type=float, default=2.0, help="Seconds between stats lines, 0 = off")
+    parser.add_argument('--json', help="Write the final stats to this JSON file")
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    chunks = open_live_chunks(args.source, args.chunk_bytes, from_end=args.tail, stop=stop,
+                              idle_timeout=args.idle_timeout)
+    drop = args.drop if args.drop is not None else args.source.startswith('tcp://') or args.tail
+    reader = LiveReader(chunks, args.format, args.channel, args.channel_index, args.n_channels,
+                        args.queue_blocks, stop, drop=drop).start()
+    sample_rate = reader.wait_ready() or args.sample_rate
+    if sample_rate == int(sample_rate):
+        sample_rate = int(sample_rate)
+
+    # 抽取与变换参数的换算与离线流水线相同（n_fft等按输入采样率给出）
+    win_length = args.win_length or args.n_fft
+    hop_length = args.hop_length or win_length // 8
+    filter_cutoff_freq = args.filter_cutoff or None
+    stages = plan_decimation(sample_rate, args.max_height, filter_cutoff_freq) if args.decimate else []
+    params = decimated_params(sample_rate, int(np.prod(stages)) if stages else 1,
+                              args.n_fft, hop_length, win_length, filter_cutoff_freq)
+    rate, n_fft, hop = params['sample_rate'], params['n_fft'], params['hop_length']
+    frame_step = hop / rate
+
+    frequencies = np.arange(n_fft // 2 + 1) * rate / n_fft
+    frequencies = frequencies[:min(len(frequencies), int(np.floor(args.max_height * n_fft / rate)) + 1)]
+    ring = RollingSpectrogram(len(frequencies), max(1, int(round(args.seconds / frame_step))))
+    stats = LiveStats(reader, ring, sample_rate)
+
+    delay = live_algorithmic_delay(sample_rate, n_fft, hop, args.demodulated, stages)
+    print(f"Live spectrogram: {sample_rate} Hz, decimation {stages or 'none'} -> {rate:g} Hz, "
+          f"n_fft={n_fft}, hop={hop} ({frame_step * 1e3:.2f} ms/frame), "
+          f"{len(frequencies)} x {ring.n_cols} ring ({ring.power.nbytes / 1e6:.1f} MB), "
+          f"algorithmic delay {delay * 1e3:.1f} ms")
+
+    def _process():
+        try:
+            # 每段连续样本各自从头开始流式处理（丢块后不沿用滤波器与STFT状态）
+            while not (reader.finished or stop.is_set()):
+                for power in live_stft_frames(reader.blocks(), sample_rate, n_fft, hop, params['win_length'],
+                                              args.window, args.demodulated, stages,
+                                              params['filter_cutoff_freq'], args.filter_order, args.max_height):
+                    ring.write(power, reader.last_arrival)
+        except Exception as e:
+            print(f"Live processing failed: {e}")
+        finally:
+            # 数据源结束后再刷新一次显示（最后一帧计入延迟统计）
+            time.sleep(2 / args.fps)
+            stop.set()
+
+    def _stop(*_):
+        stop.set()
+
+    signal.signal(signal.SIGINT, _stop)
+    threading.Thread(target=_process, name='live-dsp', daemon=True).start()
+    timer = None
+    if args.duration is not None:
+        timer = threading.Timer(args.duration, stop.set)
+        timer.daemon = True
+        timer.start()
+
+    last_report = [time.perf_counter()]
+
+    def _on_frame(arrivals, shown_time):
+        stats.on_frame(arrivals, shown_time)
+        if args.stats_interval and shown_time - last_report[0] >= args.stats_interval:
+            last_report[0] = shown_time
+            stats.print_line()
+
+    if args.display == 'raster':
+        from func.plot_func.live_display import live_raster_display
+        live_raster_display(ring, frequencies, frame_step, args.max_height, args.output, fps=args.fps,
+                            vmin=args.vmin, cmap=args.cmap, on_frame=_on_frame, stop=stop)
+    else:
+        from func.plot_func.live_display import live_matplotlib_display
+        live_matplotlib_display(ring, frequencies, frame_step, args.max_height, fps=args.fps,
+                                vmin=args.vmin, cmap=args.cmap, on_frame=_on_frame, stop=stop)
+    stop.set()
+    if timer is not None:
+        timer.cancel()
+
+    stats.print_line()
+    report = dict(stats.summary(), sample_rate=sample_rate, stages=stages, n_fft=n_fft, hop_length=hop,
+                  frame_step_s=frame_step, algorithmic_delay_ms=delay * 1e3)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
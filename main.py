@@ -3,11 +3,13 @@ from func.input_func.process import process_csv_file, process_wav_file
 
 def main():
     transform_method = 'cwt'  # 'stft' 或 'cwt'
-    library = 'librosa'  # 'librosa' 或 'scipy'
+    library = 'librosa'  # 'librosa'、'scipy'、'native'(零拷贝分帧+多线程scipy.fft，float32) 或 'zoom'(只计算0~max_height的带限STFT)
 
     sample_rate = int(5e6)  # 采样率 (Hz)
     max_height = 4000  # 最大显示频率 (Hz)
     vmin = -60  # 颜色映射的最小值（dB），控制频谱图的动态范围
+    render = 'matplotlib'  # 出图方式: 'matplotlib'(完整坐标轴与图例)、'raster'(查找表着色直接写PNG，速度快)
+    #                        或 'tiles'(可缩放浏览的多分辨率瓦片金字塔+索引文件，适合很长的采集)
 
     n_fft = 32768 * 4  # FFT窗口大小
     win_length = 32768 * 4  # 窗口长度
@@ -19,12 +21,29 @@ def main():
     scale_min = 1  # 最小尺度值
     scale_max = 100000  # 最大尺度值
     scale_count = 256  # 尺度数量，影响频率分辨率
+    cwt_engine = 'fft'  # CWT计算引擎: 'fft'(频域核组，float32) 或 'pywt'(pywt.cwt)
+    cwt_columns = 4096  # 分块CWT输出的时间列数，None表示每个采样点一列
+    cwt_pooling = 'mean'  # 分块CWT的池化方式: 'mean'(功率均值) 或 'max'(功率最大值)
 
     filter_cutoff_freq = 20000  # 截止频率 (Hz)，设置为None表示不使用滤波
     filter_order = 4  # 滤波器阶数
 
     channel = 'CH1V'  # 通道选择: 'CH1V' 或 'CH2V'
     demodulated = True  # 是否进行希尔伯特解调
+    demod_method = 'fft'  # 解调方法: 'fft'(整段希尔伯特变换) 或 'fir'(分块FIR希尔伯特，内存O(块大小))
+    wav_sample_rate = None  # WAV重采样的目标采样率 (Hz)，None表示使用文件的原始采样率（直接内存映射，不解码整个文件）
+    wav_channel = None  # WAV通道序号（从0开始），None表示各通道平均为单声道
+    offset = 0.0  # WAV分析的起始时间 (s)
+    duration = None  # WAV分析的时长 (s)，None表示到文件末尾
+    decimate = True  # 是否在变换前抽取信号（根据max_height和截止频率自动选择抽取因子）
+    n_jobs = 1  # 单个信号按时间分片并行变换的进程数（librosa STFT与fft引擎CWT）或native STFT的FFT线程数，-1表示全部CPU
+    plot_mel = True  # librosa STFT时是否同时绘制Mel频谱图（复用同一STFT结果，只多一次稀疏矩阵乘法）
+    channels = None  # 多通道模式: 例如('CH1V', 'CH2V')，一次解析、批量变换并输出各通道图像；None表示只处理channel
+    cross_view = None  # 多通道对比图: None、'difference'(功率dB差) 或 'coherence'(相干，仅STFT)
+    transform_cache = True  # 是否缓存变换结果（同一信号与参数只改变出图设置时跳过变换），目录为data/cache/transforms
+    dtype = None  # 计算精度: 'float32'(内存减半，dB误差可忽略) 或 'float64'；None表示CSV用float64、WAV用float32
+    trace = True  # 是否记录各阶段耗时/CPU/内存/数组形状，并在图像旁写出<图像名>_trace.json（trace event格式）
+    trace_summary = True  # 结束时是否打印各阶段汇总表
 
     process_csv_file(
         sample_rate=sample_rate, n_fft=n_fft, hop_length=hop_length,
@@ -32,17 +51,24 @@ def main():
         channel=channel, demodulated=demodulated, vmin=vmin,
         filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
         library=library, transform_method=transform_method,
-        wavelet=wavelet, scale_min=scale_min, scale_max=scale_max, scale_count=scale_count
+        wavelet=wavelet, scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
+        decimate=decimate, cwt_engine=cwt_engine, cwt_columns=cwt_columns, cwt_pooling=cwt_pooling,
+        demod_method=demod_method, render=render, n_jobs=n_jobs, transform_cache=transform_cache,
+        plot_mel=plot_mel, channels=channels, cross_view=cross_view, dtype=dtype,
+        trace=trace, trace_summary=trace_summary
     )
 
     '''
     process_wav_file(
-        sample_rate=sample_rate, n_fft=n_fft, hop_length=hop_length,
+        sample_rate=wav_sample_rate, n_fft=n_fft, hop_length=hop_length,
         win_length=win_length, window=window, n_mels=n_mels, max_height=max_height,
-        channel=channel, demodulated=demodulated, vmin=vmin,
+        wav_channel=wav_channel, offset=offset, duration=duration, vmin=vmin,
         filter_cutoff_freq=filter_cutoff_freq, filter_order=filter_order,
         library=library, transform_method=transform_method,
-        wavelet=wavelet, scale_min=scale_min, scale_max=scale_max, scale_count=scale_count
+        wavelet=wavelet, scale_min=scale_min, scale_max=scale_max, scale_count=scale_count,
+        decimate=decimate, cwt_engine=cwt_engine, cwt_columns=cwt_columns, cwt_pooling=cwt_pooling,
+        render=render, n_jobs=n_jobs, transform_cache=transform_cache,
+        plot_mel=plot_mel, dtype=dtype, trace=trace, trace_summary=trace_summary
     )'''
 
 
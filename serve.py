@@ -0,0 +1,570 @@
+"""
+本地频谱图服务：常驻进程，在有界内存缓存中保留已加载（解调、抽取）的信号和计算好的频谱，
+只调整出图参数（vmin、max_height等）的重复请求无需重新解析CSV和重新变换。
+
+用法示例:
+    python serve.py --port 8765 --signal-cache-mb 2048 --spectrum-cache-mb 2048
+    curl "http://127.0.0.1:8765/spectrogram.png?file=data/input_data/demo.csv&vmin=-50" -o out.png
+
+接口（参数均为查询字符串，名称与默认值同main.py，见PARAMS）:
+    GET /spectrogram.png              频谱图/尺度图PNG（render=raster或matplotlib）
+    GET /mel.png                      Mel频谱图PNG（仅librosa STFT，由缓存的同一频谱计算）
+    GET /raw.npz                      0~max_height的功率矩阵、频率与时间（np.load读取）
+    GET /tiles/index.json             瓦片金字塔索引（见func/output_func/tiles.py）
+    GET /tiles/<level>/<row>_<col>.png|.npy   瓦片（PNG按vmin着色，npy为功率）
+    GET /stats                        各缓存的条目数、字节数、命中/合并/淘汰计数
+
+加载、解调与变换阶段与命令行共用（process.load_signal、multichannel.transform_channels），磁盘上的旁路缓存
+与变换结果缓存也与命令行共用。channels=CH1V,CH2V时一次解析加载多个通道并批量变换，channel选择出图的通道。
+相同参数的并发请求只计算一次（其余请求等待同一结果），响应头X-Cache给出各层缓存状态。
+只监听本机地址（默认127.0.0.1）。瓦片目录中之前的服务进程留下的金字塔在启动时删除。
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+from func.analysis_func.decimate import plan_decimation, decimate_signal, decimated_params
+from func.analysis_func.cwt_pywavelets import generate_scales
+from func.analysis_func.mel import stft_to_mel
+from func.analysis_func.multichannel import transform_channels
+from func.input_func.process import load_signal
+from func.plot_func.stft_spectrogram import stft_plot_spectrogram, plot_mel_spectrogram
+from func.plot_func.cwt_spectrogram import cwt_plot_scalogram
+from func.plot_func.raster import db_to_rgb, encode_png
+from func.output_func.tiles import write_tile_pyramid, load_tile_index, tile_path
+
+DEFAULT_TILE_DIR = 'data/cache/service_tiles'
+
+
+def _optional(parse):
+    return lambda text: None if text.lower() in ('', 'none', 'null') else parse(text)
+
+
+def _bool(text):
+    if text.lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    if text.lower() in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f"not a boolean: {text}")
+
+
+# 请求参数: 名称 → (解析函数, 默认值)；默认值与main.py一致
+PARAMS = {
+    'file': (str, None),
+    'sample_rate': (_optional(float), None),  # None: CSV从表头读取，WAV使用原始采样率
+    'channel': (str, 'CH1V'),
+    'channels': (_optional(lambda text: tuple(text.split(','))), None),  # CSV一次解析加载的多个通道（逗号分隔）
+    'wav_channel': (_optional(int), None),  # WAV通道序号，None: 各通道平均为单声道
+    'offset': (float, 0.0),  # WAV分析的起始时间 (s)
+    'duration': (_optional(float), None),  # WAV分析的时长 (s)，None: 到文件末尾
+    'demodulated': (_bool, True),
+    'demod_method': (str, 'fft'),
+    'dtype': (_optional(str), None),
+    'decimate': (_bool, True),
+    'transform': (str, 'stft'),
+    'library': (str, 'librosa'),
+    'n_fft': (int, 32768 * 4),
+    'win_length': (_optional(int), None),  # None: 等于n_fft
+    'hop_length': (_optional(int), None),  # None: win_length // 8
+    'window': (str, 'hann'),
+    'n_mels': (int, 256),
+    'wavelet': (str, 'morl'),
+    'scale_min': (float, 1.0),
+    'scale_max': (float, 100000.0),
+    'scale_count': (int, 256),
+    'cwt_engine': (str, 'fft'),
+    'cwt_columns': (_optional(int), 4096),
+    'cwt_pooling': (str, 'mean'),
+    'filter_cutoff_freq': (_optional(float), 20000.0),
+    'filter_order': (int, 4),
+    'n_jobs': (int, 1),
+    'transform_cache': (_bool, True),
+    'max_height': (float, 4000.0),
+    'vmin': (float, -60.0),
+    'render': (str, 'raster'),
+    'tile_size': (int, 256),
+}
+
+
+def parse_params(query):
+    """
+    把查询字符串解析为完整的参数字典（未给出的参数取默认值），未知参数或无法解析的值抛出ValueError
+    """
+    values = {}
+    for name, items in parse_qs(query, keep_blank_values=True).items():
+        if name not in PARAMS:
+            raise ValueError(f"unknown parameter: {name}")
+        try:
+            values[name] = PARAMS[name][0](items[-1])
+        except ValueError as e:
+            raise ValueError(f"invalid value for {name}: {items[-1]} ({e})")
+
+    params = {name: values.get(name, default) for name, (_, default) in PARAMS.items()}
+    if not params['file']:
+        raise ValueError("missing parameter: file")
+    params['win_length'] = params['win_length'] or params['n_fft']
+    params['hop_length'] = params['hop_length'] or max(params['win_length'] // 8, 1)
+    if params['channels'] and params['channel'] not in params['channels']:
+        raise ValueError(f"channel {params['channel']} is not one of channels={','.join(params['channels'])}")
+    return params
+
+
+def _nbytes(value):
+    """
+    估算缓存值占用的内存（数组与字节串之和）
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class MemoryCache:
+    """
+    按字节数限制大小的线程安全LRU缓存；同一键的并发计算只执行一次，其余调用者等待其结果
+    """
+
+    def __init__(self, name, max_bytes, size=_nbytes, on_evict=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.size = size
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.counts = {'hit': 0, 'miss': 0, 'coalesced': 0, 'evicted': 0}
+
+    def get_or_compute(self, key, compute):
+        """
+        返回:
+            value: 缓存的或新计算的值
+            status (str): 'hit'、'miss'（本次调用计算）或'coalesced'（等待了并发的同一计算）
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.counts['hit'] += 1
+                return self._entries[key][0], 'hit'
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._inflight[key] = _Flight()
+                self.counts['miss'] += 1
+            else:
+                self.counts['coalesced'] += 1
+
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, 'coalesced'
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None:
+                    self._insert(key, flight.value)
+            flight.event.set()
+        return flight.value, 'miss'
+
+    def _insert(self, key, value):
+        size = self.size(value)
+        if size > self.max_bytes:
+            # 超过整个缓存上限的值不保留，同样交给on_evict释放（例如删除磁盘上的目录）
+            self.counts['evicted'] += 1
+            if self.on_evict:
+                self.on_evict(key, value)
+            return
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            old_key, (old_value, old_size) = self._entries.popitem(last=False)
+            self.bytes -= old_size
+            self.counts['evicted'] += 1
+            if self.on_evict:
+                self.on_evict(old_key, old_value)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    **self.counts}
+
+
+def _jsonable(value):
+    return value.tolist() if isinstance(value, np.ndarray) else str(value)
+
+
+def _key(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=_jsonable).encode()).hexdigest()
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def remove_stale_pyramids(tile_dir):
+    """
+    删除瓦片目录中之前的服务进程留下的金字塔（目录名为缓存键的前16位；键只保存在内存中，重启后不会再命中）
+
+    返回:
+        removed (int): 删除的目录数
+    """
+    if not os.path.isdir(tile_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(tile_dir):
+        path = os.path.join(tile_dir, name)
+        if len(name) == 16 and all(c in '0123456789abcdef' for c in name) and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class SpectrogramService:
+    """
+    加载 → 解调 → 抽取 → 滤波+变换 → 出图，每一步的结果按其全部输入参数缓存在内存中：
+    - signals: 解调后的信号，以及按抽取级数区分的抽取结果
+    - spectra: 功率矩阵（STFT为|S|^2，CWT为功率），变换同时经过磁盘变换缓存（与命令行共用）
+    - images: 编码好的PNG
+    - pyramids: 磁盘上的瓦片金字塔（按目录大小计，淘汰时删除目录）
+    """
+
+    def __init__(self, signal_cache_mb=2048, spectrum_cache_mb=2048, image_cache_mb=256, tile_cache_mb=2048,
+                 tile_dir=DEFAULT_TILE_DIR):
+        mb = 1024 * 1024
+        self.signals = MemoryCache('signals', signal_cache_mb * mb)
+        self.spectra = MemoryCache('spectra', spectrum_cache_mb * mb)
+        self.images = MemoryCache('images', image_cache_mb * mb)
+        self.pyramids = MemoryCache('pyramids', tile_cache_mb * mb, size=lambda path: _dir_bytes(path),
+                                    on_evict=lambda key, path: shutil.rmtree(path, ignore_errors=True))
+        self.tile_dir = tile_dir
+        removed = remove_stale_pyramids(tile_dir)
+        if removed:
+            print(f"Removed {removed} tile pyramid(s) left by a previous run in {tile_dir}")
+        # matplotlib的pyplot接口不是线程安全的
+        self._plot_lock = threading.Lock()
+
+    def stats(self):
+        return {cache.name: cache.stats() for cache in (self.signals, self.spectra, self.images, self.pyramids)}
+
+    def _signal(self, p, status):
+        """
+        加载（并解调）信号；文件大小或修改时间变化后键也随之变化
+        """
+        path = os.path.abspath(p['file'])
+        st = os.stat(path)
+        if p['channels'] and path.lower().endswith('.wav'):
+            raise ValueError("channels applies to CSV captures; use wav_channel for WAV files")
+        key = _key('signal', path, st.st_size, st.st_mtime_ns, p['channels'] or p['channel'], p['sample_rate'],
+                   p['demodulated'], p['demod_method'], p['dtype'], p['wav_channel'], p['offset'], p['duration'])
+
+        def load():
+            sr = int(p['sample_rate']) if p['sample_rate'] else None
+            audio_data, sample_rate = load_signal(
+                path, sr, channel=p['channel'], channels=p['channels'], demodulated=p['demodulated'],
+                demod_method=p['demod_method'], dtype=p['dtype'], wav_channel=p['wav_channel'],
+                offset=p['offset'], duration=p['duration'])
+            if audio_data is None:
+                raise ValueError(f"failed to load {p['file']}")
+            return np.asarray(audio_data), sample_rate
+
+        (audio_data, sample_rate), status['signal'] = self.signals.get_or_compute(key, load)
+        return key, audio_data, sample_rate
+
+    def _decimated(self, p, status):
+        """
+        按max_height与截止频率抽取信号；只要抽取级数不变，调整max_height仍命中同一条目
+        """
+        key, audio_data, sample_rate = self._signal(p, status)
+        stages = plan_decimation(sample_rate, p['max_height'], p['filter_cutoff_freq']) if p['decimate'] else []
+        factor = int(np.prod(stages)) if stages else 1
+        params = decimated_params(sample_rate, factor, p['n_fft'], p['hop_length'], p['win_length'],
+                                  p['filter_cutoff_freq'], p['scale_min'], p['scale_max'])
+        if not stages:
+            return key, audio_data, params
+
+        key = _key(key, 'decimate', stages)
+        audio_data, status['decimate'] = self.signals.get_or_compute(
+            key, lambda: decimate_signal(audio_data, stages))
+        return key, audio_data, params
+
+    def spectrum(self, p, status):
+        """
+        返回:
+            power (np.ndarray): float32功率矩阵，shape为(频点数, 列数)；多通道时为channel所选的通道
+            frequencies (np.ndarray): 各行频率
+            times (np.ndarray): 各列时间 (s)
+            params (dict): 抽取后的变换参数（sample_rate、n_fft等）
+            audio_data (np.ndarray): 变换前的信号（matplotlib尺度图需要其时长）
+        """
+        signal_key, audio_data, d = self._decimated(p, status)
+        sr = d['sample_rate']
+        is_cwt = p['transform'] == 'cwt'
+        scales = generate_scales(sr, p['wavelet'], d['scale_min'], d['scale_max'], p['scale_count'],
+                                 decimated=d['factor'] > 1) if is_cwt else None
+
+        def compute():
+            matrix, frequencies, times, _ = transform_channels(
+                audio_data, sr, d['n_fft'], d['hop_length'], d['win_length'], p['window'], p['max_height'],
+                filter_cutoff_freq=d['filter_cutoff_freq'], filter_order=p['filter_order'], library=p['library'],
+                transform_method=p['transform'], wavelet=p['wavelet'], scales=scales, cwt_engine=p['cwt_engine'],
+                cwt_columns=p['cwt_columns'], cwt_pooling=p['cwt_pooling'], n_jobs=p['n_jobs'],
+                use_cache=p['transform_cache'])
+            if is_cwt and p['cwt_engine'] == 'fft':
+                power = np.asarray(matrix, dtype=np.float32)
+            else:
+                power = np.square(np.abs(matrix), dtype=np.float32)
+            if not len(times):
+                times = np.arange(power.shape[-1]) / sr
+            return power, np.asarray(frequencies), np.asarray(times)
+
+        if is_cwt:
+            transform_params = (p['wavelet'], p['scale_count'], p['cwt_engine'], p['cwt_columns'], p['cwt_pooling'])
+        else:
+            # 带限STFT的频带取决于max_height
+            transform_params = (p['library'], p['window'], p['max_height'] if p['library'] == 'zoom' else None)
+        key = _key(signal_key, p['transform'], transform_params, d, p['filter_order'])
+        (power, frequencies, times), status['spectrum'] = self.spectra.get_or_compute(key, compute)
+
+        if p['channels']:
+            # 多通道一起变换并缓存，按channel取出所选的通道
+            row = p['channels'].index(p['channel'])
+            key = _key(key, p['channel'])
+            power, audio_data = power[row], audio_data[row]
+        return key, power, frequencies, times, d, audio_data
+
+    def _render_png(self, p, plot):
+        """
+        在临时目录中调用plot(save_path)出图并返回PNG字节串（matplotlib出图时加锁）
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            save_path = os.path.join(tmp, 'spectrogram.png')
+            if p['render'] == 'raster':
+                plot(save_path)
+            else:
+                with self._plot_lock:
+                    plot(save_path)
+            with open(save_path, 'rb') as f:
+                return f.read()
+
+    def image(self, p, status):
+        """
+        渲染整幅频谱图/尺度图为PNG字节串
+        """
+        spectrum_key, power, frequencies, times, d, audio_data = self.spectrum(p, status)
+        key = _key(spectrum_key, 'image', p['max_height'], p['vmin'], p['render'])
+
+        def render():
+            sr = d['sample_rate']
+            if p['transform'] == 'cwt':
+                scales = generate_scales(sr, p['wavelet'], d['scale_min'], d['scale_max'], p['scale_count'],
+                                         decimated=d['factor'] > 1)
+                plot = lambda save_path: cwt_plot_scalogram(
+                    power, frequencies, audio_data, sr, p['wavelet'], scales, p['max_height'],
+                    save_path=save_path, vmin=p['vmin'], scale_min=d['scale_min'], scale_max=d['scale_max'],
+                    scale_count=p['scale_count'], filter_cutoff_freq=d['filter_cutoff_freq'],
+                    filter_order=p['filter_order'], is_power=True, render=p['render'])
+            else:
+                # stft_plot_spectrogram按|S|^2计算功率，传入幅度
+                plot = lambda save_path: stft_plot_spectrogram(
+                    np.sqrt(power), sr, d['hop_length'], d['win_length'], p['window'], d['n_fft'],
+                    p['max_height'], save_path=save_path, vmin=p['vmin'], frequencies=frequencies,
+                    render=p['render'])
+            return self._render_png(p, plot)
+
+        png, status['image'] = self.images.get_or_compute(key, render)
+        return png
+
+    def mel(self, p, status):
+        """
+        由缓存的STFT功率渲染Mel频谱图为PNG字节串（与命令行的plot_mel相同，仅librosa STFT）
+        """
+        if p['transform'] != 'stft' or p['library'] != 'librosa':
+            raise ValueError("Mel spectrograms are drawn from the librosa STFT (transform=stft, library=librosa)")
+        spectrum_key, power, _, _, d, _ = self.spectrum(p, status)
+        key = _key(spectrum_key, 'mel', p['n_mels'], p['max_height'], p['vmin'], p['render'])
+
+        def render():
+            sr = d['sample_rate']
+            mel_spectrogram, mel_frequencies = stft_to_mel(np.sqrt(power), sr, d['n_fft'], p['n_mels'],
+                                                           fmax=p['max_height'])
+            return self._render_png(p, lambda save_path: plot_mel_spectrogram(
+                mel_spectrogram, mel_frequencies, sr, d['n_fft'], d['hop_length'], d['win_length'], p['window'],
+                len(mel_frequencies), p['max_height'], save_path=save_path, vmin=p['vmin'], render=p['render']))
+
+        png, status['mel'] = self.images.get_or_compute(key, render)
+        return png
+
+    def raw(self, p, status):
+        """
+        0~max_height的功率矩阵、频率与时间，打包为npz字节串
+        """
+        _, power, frequencies, times, d, _ = self.spectrum(p, status)
+        rows = frequencies <= p['max_height']
+        buffer = io.BytesIO()
+        np.savez(buffer, power=power[rows], frequencies=frequencies[rows], times=times,
+                 sample_rate=d['sample_rate'])
+        return buffer.getvalue()
+
+    def pyramid(self, p, status):
+        """
+        由缓存的功率矩阵生成瓦片金字塔（0~max_height），返回目录
+        """
+        spectrum_key, power, frequencies, times, d, _ = self.spectrum(p, status)
+        key = _key(spectrum_key, 'tiles', p['max_height'], p['tile_size'])
+
+        def build():
+            out_dir = os.path.join(self.tile_dir, key[:16])
+            tile_size = p['tile_size']
+            batches = (power[:, start:start + tile_size] for start in range(0, power.shape[1], tile_size))
+            time_step = float(times[1] - times[0]) if len(times) > 1 else 1 / d['sample_rate']
+            write_tile_pyramid(batches, frequencies, time_step, out_dir, max_len=p['max_height'],
+                               tile_size=tile_size, time_start=float(times[0]), png=False,
+                               transform=p['transform'], sample_rate=d['sample_rate'])
+            return out_dir
+
+        out_dir, status['tiles'] = self.pyramids.get_or_compute(key, build)
+        if not os.path.isdir(out_dir):
+            raise ValueError(f"the tile pyramid is larger than the tile cache ({self.pyramids.max_bytes >> 20} MB); "
+                             f"raise --tile-cache-mb or lower max_height")
+        return out_dir
+
+    def tile(self, p, status, level, row, col, extension):
+        out_dir = self.pyramid(p, status)
+        path = tile_path(out_dir, level, row, col)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"no tile {level}/{row}_{col}")
+        if extension == 'npy':
+            with open(path, 'rb') as f:
+                return f.read()
+        index = load_tile_index(out_dir)
+        power = np.load(path)
+        power_db = 10 * np.log10(np.maximum(power, 1e-12)) - 10 * np.log10(max(index['max_power'], 1e-12))
+        return encode_png(db_to_rgb(power_db, vmin=p['vmin']), compress_level=1)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, code, body, content_type, status=None):
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            if status:
+                self.send_header('X-Cache', ', '.join(f'{k}={v}' for k, v in status.items()))
+            self.send_header('X-Elapsed-Ms', f'{(time.perf_counter() - self._start) * 1e3:.1f}')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, code, value, status=None):
+            self._send(code, json.dumps(value, indent=2).encode(), 'application/json', status)
+
+        def do_GET(self):
+            self._start = time.perf_counter()
+            url = urlparse(self.path)
+            path = unquote(url.path)
+            status = {}
+            try:
+                if path == '/stats':
+                    return self._json(200, service.stats())
+                p = parse_params(url.query)
+                if path == '/spectrogram.png':
+                    self._send(200, service.image(p, status), 'image/png', status)
+                elif path == '/mel.png':
+                    self._send(200, service.mel(p, status), 'image/png', status)
+                elif path == '/raw.npz':
+                    self._send(200, service.raw(p, status), 'application/octet-stream', status)
+                elif path == '/tiles/index.json':
+                    index = load_tile_index(service.pyramid(p, status))
+                    self._json(200, index, status)
+                elif path.startswith('/tiles/'):
+                    level, name = path[len('/tiles/'):].split('/')
+                    stem, extension = name.rsplit('.', 1)
+                    row, col = stem.split('_')
+                    if extension not in ('png', 'npy'):
+                        raise ValueError(f"unsupported tile format: {extension}")
+                    body = service.tile(p, status, int(level), int(row), int(col), extension)
+                    self._send(200, body, 'image/png' if extension == 'png' else 'application/octet-stream',
+                               status)
+                else:
+                    self._json(404, {'error': f'unknown path: {path}'})
+            except (FileNotFoundError, ValueError) as e:
+                self._json(404 if isinstance(e, FileNotFoundError) else 400, {'error': str(e)}, status)
+            except Exception as e:
+                traceback.print_exc()
+                self._json(500, {'error': f'{type(e).__name__}: {e}'}, status)
+
+        def log_message(self, format, *args):
+            print(f"[{time.strftime('%H:%M:%S')}] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def make_server(service, host='127.0.0.1', port=8765):
+    """
+    创建（未启动的）HTTP服务器；port=0时由系统分配端口（server.server_address[1]）
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve spectrograms from in-memory caches")
+    parser.add_argument('--host', default='127.0.0.1', help="Listen address (local only by default)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--signal-cache-mb', type=int, default=2048, help="Memory for loaded/decimated signals")
+    parser.add_argument('--spectrum-cache-mb', type=int, default=2048, help="Memory for computed spectra")
+    parser.add_argument('--image-cache-mb', type=int, default=256, help="Memory for encoded PNGs")
+    parser.add_argument('--tile-cache-mb', type=int, default=2048, help="Disk space for tile pyramids")
+    parser.add_argument('--tile-dir', default=DEFAULT_TILE_DIR)
+    args = parser.parse_args()
+
+    service = SpectrogramService(args.signal_cache_mb, args.spectrum_cache_mb, args.image_cache_mb,
+                                 args.tile_cache_mb, args.tile_dir)
+    server = make_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Serving spectrograms on http://{host}:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()